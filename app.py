@@ -1,19 +1,61 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, send_from_directory
+from flask import Flask, render_template, stream_template, request, redirect, url_for, flash, get_flashed_messages, jsonify, send_from_directory, g, has_request_context, Response, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
+from jinja2 import FileSystemBytecodeCache
 from flask_wtf import FlaskForm
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
 from werkzeug.security import check_password_hash, generate_password_hash
 from wtforms import StringField, TextAreaField, SelectField, RadioField, SubmitField, BooleanField, PasswordField, FileField
 from wtforms.validators import DataRequired, Length, Email, EqualTo, ValidationError
 from datetime import datetime, timedelta
+from collections import OrderedDict
+from contextlib import contextmanager
 import os
 import json
+import queue
+import threading
+import time
 import uuid
-from werkzeug.utils import secure_filename
+from werkzeug.utils import secure_filename, safe_join
 import re
 import markdown
+from markdown.extensions import Extension
+from markdown.treeprocessors import Treeprocessor
+from markdown.extensions.tables import TableExtension
+from markupsafe import Markup, escape
+from urllib.parse import urlsplit
 from dotenv import load_dotenv
 import ast
+import atexit
+import contextvars
+import hashlib
+import gzip
+import zlib
+import tracemalloc
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+import mimetypes
+import click
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+# Brotli圧縮（オプション。未インストールの場合はgzipのみ）
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+# 画像の寸法取得・縮小版の作成（オプション。未インストールの場合は寸法を記録せず、原寸の画像のみ表示）
+try:
+    from PIL import Image, ImageOps, features as pil_features
+    PIL_AVAILABLE = True
+    WEBP_AVAILABLE = pil_features.check('webp')
+except ImportError:
+    PIL_AVAILABLE = False
+    WEBP_AVAILABLE = False
 
 # AI機能のためのインポート（オプション）
 try:
@@ -41,15 +83,296 @@ else:
 
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+# テンプレートのコンパイル結果をディスクに保存し、ワーカー間・再起動後も再利用する
+jinja_cache_dir = os.environ.get('JINJA_CACHE_DIR', os.path.join(app.instance_path, 'jinja_cache'))
+os.makedirs(jinja_cache_dir, exist_ok=True)
+app.jinja_options = dict(app.jinja_options, bytecode_cache=FileSystemBytecodeCache(jinja_cache_dir))
+
+# 報告一覧の1ページあたりの件数
+REPORT_PAGE_SIZE = int(os.environ.get('REPORT_PAGE_SIZE', '30'))
+
+# 通知の保持設定（既読かつ保持日数を過ぎた通知をアーカイブへ移動、または削除）
+NOTIFICATION_RETENTION_DAYS = int(os.environ.get('NOTIFICATION_RETENTION_DAYS', '90'))
+NOTIFICATION_RETENTION_POLICY = os.environ.get('NOTIFICATION_RETENTION_POLICY', 'archive')  # archive, delete
+NOTIFICATION_COMPACT_BATCH_SIZE = int(os.environ.get('NOTIFICATION_COMPACT_BATCH_SIZE', '500'))
+NOTIFICATION_ARCHIVE_PAGE_SIZE = 50
+
+# 通知のまとめ表示（同じ種類の未読通知が期間内にあれば1件に集約する。0分で無効）
+NOTIFICATION_DIGEST_WINDOW_MINUTES = int(os.environ.get('NOTIFICATION_DIGEST_WINDOW_MINUTES', '60'))
+NOTIFICATION_DIGEST_TYPES = set(filter(None, os.environ.get('NOTIFICATION_DIGEST_TYPES', 'report_created').split(',')))
+
+# バックグラウンドジョブ（ワーカースレッド数が0の場合は flask run-jobs で実行する）
+BACKGROUND_JOB_WORKERS = int(os.environ.get('BACKGROUND_JOB_WORKERS', '2'))
+BACKGROUND_JOB_MAX_ATTEMPTS = int(os.environ.get('BACKGROUND_JOB_MAX_ATTEMPTS', '5'))
+BACKGROUND_JOB_RETRY_DELAY = int(os.environ.get('BACKGROUND_JOB_RETRY_DELAY', '10'))  # 秒（試行ごとに倍）
+BACKGROUND_JOB_POLL_INTERVAL = int(os.environ.get('BACKGROUND_JOB_POLL_INTERVAL', '5'))  # 秒
+BACKGROUND_JOB_LOCK_TIMEOUT = int(os.environ.get('BACKGROUND_JOB_LOCK_TIMEOUT', '600'))  # 秒（超えた実行中ジョブは再実行）
+BACKGROUND_JOB_RETENTION_DAYS = int(os.environ.get('BACKGROUND_JOB_RETENTION_DAYS', '7'))  # 完了したジョブを残す日数
+BACKGROUND_JOB_PRUNE_INTERVAL = int(os.environ.get('BACKGROUND_JOB_PRUNE_INTERVAL', '3600'))  # 秒（ワーカーが完了ジョブを削除する間隔）
+
 # 画像アップロード設定
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
 app.config['UPLOAD_FOLDER'] = os.environ.get('UPLOAD_PRODUCT_GROUPS_DIR', 'static/uploads/product_groups')
 app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get('MAX_CONTENT_LENGTH_MB', '16')) * 1024 * 1024
 
+# 商品群画像の縮小版（幅px）。各幅の WebP 版も作成し、テンプレートは srcset で表示幅に合うものを選ぶ
+THUMBNAIL_WIDTHS = tuple(sorted({int(width) for width in os.environ.get('THUMBNAIL_WIDTHS', '160,480,1024').split(',') if width.strip()}))
+THUMBNAIL_SOURCE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.webp'}  # GIF はアニメーションを保つため原寸のみ
+THUMBNAIL_MAX_AGE = 30 * 24 * 3600  # 縮小版はアップロードごとに一意なファイル名のため長期キャッシュ可
+app.config['THUMBNAIL_FOLDER'] = os.path.join(app.config['UPLOAD_FOLDER'], 'thumbs')
+
 # アップロードフォルダを作成
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+os.makedirs(app.config['THUMBNAIL_FOLDER'], exist_ok=True)
 
 db = SQLAlchemy(app)
+
+# SQLクエリ計測（DB_QUERY_STATS=1 でレスポンスヘッダーに件数・時間を出力）
+DB_QUERY_STATS_ENABLED = os.environ.get('DB_QUERY_STATS') == '1'
+
+# エンドポイントごとのSQL文の上限（テスト・計測時に超過を検出する）
+QUERY_BUDGETS = {
+    'mentor_dashboard': 8,
+    'mentor_dashboard_reports': 6,
+    'mentee_dashboard': 6,
+    'new_report': 14,
+    'view_report': 8,
+    'product_group_analysis': 8,
+    'product_group_details': 8,
+    'get_notifications': 3,
+}
+
+# エンドポイントごとの累計（DB_QUERY_STATS 有効時のみ記録）
+db_query_stats = {}
+
+# query_budget() で監視中のカウンター（別スレッドのリクエスト・ジョブのSQLを数えないようコンテキストごとに持つ）
+_query_budget_counters = contextvars.ContextVar('query_budget_counters', default=())
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _record_query_start(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start_times', []).append(time.perf_counter())
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _record_query_end(conn, cursor, statement, parameters, context, executemany):
+    elapsed_ms = (time.perf_counter() - conn.info['query_start_times'].pop()) * 1000
+    
+    for counter in _query_budget_counters.get():
+        counter['statements'].append(statement)
+    
+    if has_request_context():
+        stats = g.setdefault('db_stats', {'count': 0, 'time_ms': 0.0, 'slowest_ms': 0.0, 'slowest_sql': None})
+        stats['count'] += 1
+        stats['time_ms'] += elapsed_ms
+        if elapsed_ms > stats['slowest_ms']:
+            stats['slowest_ms'] = elapsed_ms
+            stats['slowest_sql'] = statement
+
+@app.before_request
+def start_db_query_stats():
+    """リクエストごとのSQL計測を開始（アプリケーションコンテキストを共有するテスト時にも前のリクエスト分を持ち越さない）"""
+    if DB_QUERY_STATS_ENABLED:
+        g.db_stats = {'count': 0, 'time_ms': 0.0, 'slowest_ms': 0.0, 'slowest_sql': None}
+
+def _record_endpoint_query_stats(endpoint, stats):
+    """1リクエスト分のSQL件数・時間をエンドポイント別の累計に加え、上限超過を警告"""
+    totals = db_query_stats.setdefault(endpoint, {
+        'requests': 0, 'statements': 0, 'time_ms': 0.0, 'slowest_ms': 0.0, 'slowest_sql': None
+    })
+    totals['requests'] += 1
+    totals['statements'] += stats['count']
+    totals['time_ms'] += stats['time_ms']
+    if stats['slowest_ms'] > totals['slowest_ms']:
+        totals['slowest_ms'] = stats['slowest_ms']
+        totals['slowest_sql'] = stats['slowest_sql']
+    
+    budget = QUERY_BUDGETS.get(endpoint)
+    if budget is not None and stats['count'] > budget:
+        print(f"SQL件数が上限を超えました: {endpoint} {stats['count']}件 (上限 {budget}件)")
+
+@app.after_request
+def add_db_query_stats(response):
+    """
+    リクエスト中のSQL件数・時間をヘッダーに付与し、エンドポイント別に集計
+    
+    ストリーミング送出のレスポンスは本文の生成中にもSQLが発行されるため、ヘッダーは付与せず
+    送出の完了時に集計する。
+    """
+    if not DB_QUERY_STATS_ENABLED:
+        return response
+    
+    # ストリーミング中のSQLも同じ辞書に加算されるよう g に置いておく
+    stats = g.setdefault('db_stats', {'count': 0, 'time_ms': 0.0, 'slowest_ms': 0.0, 'slowest_sql': None})
+    endpoint = request.endpoint or 'unknown'
+    if response.is_streamed:
+        response.call_on_close(lambda: _record_endpoint_query_stats(endpoint, stats))
+        return response
+    
+    response.headers['X-DB-Queries'] = str(stats['count'])
+    response.headers['X-DB-Time-ms'] = f"{stats['time_ms']:.1f}"
+    response.headers['X-DB-Slowest-ms'] = f"{stats['slowest_ms']:.1f}"
+    _record_endpoint_query_stats(endpoint, stats)
+    return response
+
+class QueryBudgetExceeded(AssertionError):
+    """SQL文の件数が上限を超えた"""
+
+@contextmanager
+def query_budget(max_statements, label='query_budget'):
+    """
+    ブロック内で発行されたSQL文の件数が上限を超えたら QueryBudgetExceeded を送出する（テスト用）
+    
+    例: with query_budget(QUERY_BUDGETS['mentor_dashboard']): client.get('/mentor/dashboard')
+    """
+    counter = {'statements': []}
+    token = _query_budget_counters.set(_query_budget_counters.get() + (counter,))
+    try:
+        yield counter
+    finally:
+        _query_budget_counters.reset(token)
+    
+    statements = counter['statements']
+    if len(statements) > max_statements:
+        listing = '\n'.join(f"  {i + 1}. {statement}" for i, statement in enumerate(statements))
+        raise QueryBudgetExceeded(f"{label}: SQL文が{len(statements)}件発行されました（上限 {max_statements}件）\n{listing}")
+
+def assert_endpoint_query_budget(client, endpoint, url, method='GET', **kwargs):
+    """
+    テストクライアントでリクエストし、QUERY_BUDGETS の上限内か検証してレスポンスを返す
+    
+    ストリーミング送出のページは本文の生成中にもSQLが発行されるため、本文を読み切るまで計測する。
+    """
+    with query_budget(QUERY_BUDGETS[endpoint], label=endpoint):
+        response = client.open(url, method=method, **kwargs)
+        response.get_data()
+        response.close()
+    return response
+
+class LRUCache:
+    """件数上限付きのLRUキャッシュ（スレッドセーフ、ヒット・ミス数を記録）"""
+    
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+    
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+    
+    def get_or_create(self, key, factory):
+        value = self.get(key)
+        if value is None:
+            value = factory()
+            self.set(key, value)
+        return value
+    
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+    
+    def stats(self):
+        with self._lock:
+            return {'size': len(self._data), 'maxsize': self.maxsize, 'hits': self.hits, 'misses': self.misses}
+
+# ダッシュボードの商品群進捗・進捗カードHTMLのキャッシュ（メンティの data_version と日付で無効化）
+fragment_cache = LRUCache(int(os.environ.get('FRAGMENT_CACHE_SIZE', '512')))
+
+# マークダウンのHTML変換結果のキャッシュ（入力テキスト・拡張機能・変換ルールの版のハッシュがキー）
+# MARKDOWN_CACHE_DIR を指定すると、プロセス間で共有するファイルキャッシュも使う
+MARKDOWN_CACHE_DIR = os.environ.get('MARKDOWN_CACHE_DIR')
+MARKDOWN_CACHE_MAX_AGE_DAYS = int(os.environ.get('MARKDOWN_CACHE_MAX_AGE_DAYS', '30'))  # ファイルキャッシュを残す日数
+MARKDOWN_CACHE_MAX_MB = int(os.environ.get('MARKDOWN_CACHE_MAX_MB', '100'))  # ファイルキャッシュの合計サイズの上限
+markdown_cache = LRUCache(int(os.environ.get('MARKDOWN_CACHE_SIZE', '1024')))
+markdown_render_stats = {'renders': 0, 'render_time_ms': 0.0, 'persistent_hits': 0}
+_markdown_render_stats_lock = threading.Lock()
+_markdown_converters = threading.local()
+
+# 通知のSSE配信（ハートビート間隔と、1接続を保持する最大秒数。切断後はブラウザが自動再接続する）
+NOTIFICATION_STREAM_HEARTBEAT = int(os.environ.get('NOTIFICATION_STREAM_HEARTBEAT', '15'))
+NOTIFICATION_STREAM_MAX_AGE = int(os.environ.get('NOTIFICATION_STREAM_MAX_AGE', '300'))
+# 同時に保持するSSE接続の上限（接続ごとにワーカースレッドを1つ占有するため、サーバーのスレッド数より小さくする）
+NOTIFICATION_STREAM_MAX_CONNECTIONS = int(os.environ.get('NOTIFICATION_STREAM_MAX_CONNECTIONS', '50'))
+
+class NotificationBroker:
+    """
+    ユーザー単位のプロセス内pub/sub（スレッドセーフ）
+
+    購読ごとにキューを割り当て、publish したイベントを同じユーザーの全購読へ配る。
+    プロセスをまたいだ配信は行わないため、届かない環境ではクライアント側のポーリングで補う。
+    """
+
+    def __init__(self, max_queue_size=100):
+        self.max_queue_size = max_queue_size
+        self._subscribers = {}
+        self._stream_count = 0
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id, max_streams=None):
+        """購読を追加してキューを返す（全ユーザーの購読数が max_streams に達している場合は None）"""
+        subscriber = queue.Queue(maxsize=self.max_queue_size)
+        with self._lock:
+            if max_streams is not None and self._stream_count >= max_streams:
+                return None
+            self._subscribers.setdefault(user_id, set()).add(subscriber)
+            self._stream_count += 1
+        return subscriber
+
+    def unsubscribe(self, user_id, subscriber):
+        with self._lock:
+            subscribers = self._subscribers.get(user_id)
+            if subscribers is not None and subscriber in subscribers:
+                subscribers.discard(subscriber)
+                self._stream_count -= 1
+                if not subscribers:
+                    del self._subscribers[user_id]
+
+    def publish(self, user_id, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(event)
+            except queue.Full:
+                # 読み出しが滞っている接続は取りこぼしを許容（再接続時に一覧を取り直す）
+                pass
+
+    def stats(self):
+        with self._lock:
+            return {'users': len(self._subscribers), 'streams': self._stream_count}
+
+notification_broker = NotificationBroker()
+
+def queue_notification_event(user_id, notification=None):
+    """
+    通知イベントを現在のセッションに積み、コミット成功後に配信する
+
+    notification を省略した場合は未読件数の変化のみを通知する。ロールバック時は破棄される。
+    """
+    db.session.info.setdefault('pending_notification_events', []).append((user_id, notification))
+
+@event.listens_for(Session, 'after_commit')
+def _publish_pending_notification_events(session):
+    for user_id, notification in session.info.pop('pending_notification_events', []):
+        notification_broker.publish(user_id, {'notification': notification})
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_pending_notification_events(session):
+    session.info.pop('pending_notification_events', None)
+
 login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.login_view = 'login'
@@ -69,6 +392,11 @@ class User(UserMixin, db.Model):
     role = db.Column(db.String(20), default='mentee')  # mentee, mentor, admin
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    # 未読通知数。通知の作成・既読化のたびに同じトランザクションで増減させる（repair-notification-counts で再計算）
+    unread_notification_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    # 通知の作成・既読化のたびに加算するバージョン（/notifications の ETag に使う）
+    notification_version = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    
     def set_password(self, password):
         self.password_hash = generate_password_hash(password)
     
@@ -81,6 +409,9 @@ class Mentee(db.Model):
     email = db.Column(db.String(120), unique=True, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    # 表示用データ（報告・商品群）のバージョン。変更のたびに加算し、キャッシュのキーに使う
+    data_version = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    
     # リレーションシップ
     reports = db.relationship('WeeklyReport', backref='mentee', lazy=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
@@ -111,14 +442,22 @@ class MenteeTodoList(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 class WeeklyReport(db.Model):
+    __table_args__ = (
+        db.Index('ix_weekly_report_mentee_report_date', 'mentee_id', 'report_date'),
+        db.Index('ix_weekly_report_group_report_date', 'product_group_id', 'report_date'),
+        db.Index('ix_weekly_report_mentee_week_start', 'mentee_id', 'week_start'),
+        db.Index('ix_weekly_report_report_date', 'report_date', 'id'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     mentee_id = db.Column(db.Integer, db.ForeignKey('mentee.id'), nullable=False)
     
     # 企画ステージ
     planning_stage = db.Column(db.String(50), nullable=False)  # 提案前/提案済み/発注済み/完了
     
-    # 代表商品群
+    # 代表商品群（参照は product_group_id で行う。名称は作成時点のもので、表示には product_group_name を使う）
     product_group = db.Column(db.Text, nullable=False)
+    product_group_id = db.Column(db.Integer, db.ForeignKey('product_group.id'), nullable=True)
     
     # 今週の進捗（JSON形式で保存）
     progress_items = db.Column(db.Text)  # チェックリスト項目
@@ -154,7 +493,17 @@ class MentorComment(db.Model):
     # リレーションシップ
     mentor = db.relationship('User', backref='mentor_comments')
 
+# メンターコメントの有無（一覧表示用、EXISTSサブクエリ。必要なクエリでのみ undefer する）
+WeeklyReport.has_comment = db.column_property(
+    db.exists().where(MentorComment.report_id == WeeklyReport.id),
+    deferred=True
+)
+
 class DailyReport(db.Model):
+    __table_args__ = (
+        db.Index('ix_daily_report_mentee_report_date', 'mentee_id', 'report_date'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     mentee_id = db.Column(db.Integer, db.ForeignKey('mentee.id'), nullable=False)
     weekly_report_id = db.Column(db.Integer, db.ForeignKey('weekly_report.id'), nullable=True)
@@ -168,6 +517,11 @@ class DailyReport(db.Model):
     generated_content = db.Column(db.Text, nullable=False)  # AI生成された日報内容
     manual_edits = db.Column(db.Text)  # 手動で編集された内容
     
+    # 表示用HTML（保存時にマークダウンから生成・無害化。NULLは未生成）
+    summary_html = db.Column(db.Text)
+    generated_content_html = db.Column(db.Text)
+    html_version = db.Column(db.Integer)  # 生成時の SAFE_HTML_VERSION
+    
     # ステータス
     status = db.Column(db.String(20), default='draft')  # draft, published, archived
     
@@ -184,15 +538,64 @@ class ProductGroup(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text)
-    images = db.Column(db.Text)  # JSON形式で画像パスのリストを保存
-    mentee_id = db.Column(db.Integer, db.ForeignKey('mentee.id'), nullable=False)
+    mentee_id = db.Column(db.Integer, db.ForeignKey('mentee.id'), nullable=False, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # リレーションシップ
     mentee = db.relationship('Mentee', backref='product_groups')
+    images = db.relationship('ProductGroupImage', backref='product_group', cascade='all, delete-orphan',
+                             order_by='ProductGroupImage.position')
+
+# 表示用の代表商品群名（商品群マスタの現在の名称。未紐付けの旧データは作成時点の名称）
+# 相関サブクエリで報告と同じSELECTで取得するため、名称変更時に報告の行を更新する必要がない
+WeeklyReport.product_group_name = db.column_property(
+    db.func.coalesce(
+        db.select(ProductGroup.name).where(ProductGroup.id == WeeklyReport.product_group_id).scalar_subquery(),
+        WeeklyReport.product_group
+    )
+)
+
+class ProductGroupImage(db.Model):
+    """代表商品群の画像（1画像1行、position の昇順に表示し先頭がカバー画像）"""
+    __table_args__ = (
+        db.Index('ix_product_group_image_group_position', 'product_group_id', 'position'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    product_group_id = db.Column(db.Integer, db.ForeignKey('product_group.id'), nullable=False)
+    position = db.Column(db.Integer, nullable=False, default=0)
+    filename = db.Column(db.String(255), nullable=False)  # UPLOAD_FOLDER 内のファイル名
+    byte_size = db.Column(db.Integer)
+    width = db.Column(db.Integer)  # ピクセル寸法（Pillow 未インストール時は NULL）
+    height = db.Column(db.Integer)
+    content_hash = db.Column(db.String(64))  # ファイル内容の SHA-256
+    thumbnail_widths = db.Column(db.Text)  # 作成済みの縮小版の幅（カンマ区切り。NULL は未作成、空文字は作成不要）
+    has_webp = db.Column(db.Boolean, default=False, nullable=False)  # 縮小版の WebP 版があるか
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class ProductGroupStatus(db.Model):
+    """商品群の進捗状態（週次報告から導出した読み取り用モデル、商品群ごとに1行）"""
+    product_group_id = db.Column(db.Integer, db.ForeignKey('product_group.id'), primary_key=True)
+    mentee_id = db.Column(db.Integer, db.ForeignKey('mentee.id'), nullable=False, index=True)
+    latest_stage = db.Column(db.String(50))  # 正規化済みステージ（s0~s13）
+    stage_entered_at = db.Column(db.DateTime)  # 現在のステージに入った報告日
+    first_report_date = db.Column(db.DateTime)
+    last_report_date = db.Column(db.DateTime)
+    report_count = db.Column(db.Integer, default=0, nullable=False)
+    is_completed = db.Column(db.Boolean, default=False, nullable=False)
+    is_cancelled = db.Column(db.Boolean, default=False, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # リレーションシップ
+    product_group = db.relationship('ProductGroup', backref=db.backref('status', uselist=False, cascade='all, delete-orphan'))
 
 class Notification(db.Model):
+    __table_args__ = (
+        db.Index('ix_notification_user_read_created', 'user_id', 'is_read', 'created_at'),
+        db.Index('ix_notification_read_created', 'is_read', 'created_at'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     title = db.Column(db.String(200), nullable=False)
@@ -202,11 +605,51 @@ class Notification(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # 関連データのID（オプション）
-    related_id = db.Column(db.Integer, nullable=True)  # 報告IDやコメントIDなど
+    related_id = db.Column(db.Integer, nullable=True)  # 報告IDやコメントIDなど（まとめ通知では最新のもの）
+    
+    # まとめ通知: 集約したイベント数と関連IDの一覧（JSON。1件のみの場合は NULL）
+    event_count = db.Column(db.Integer, default=1, server_default='1', nullable=False)
+    related_ids = db.Column(db.Text, nullable=True)
     
     # リレーションシップ
     user = db.relationship('User', backref='notifications')
 
+class NotificationArchive(db.Model):
+    """保持期間を過ぎた既読通知の保管先（IDは元の通知IDを引き継ぐ）"""
+    __table_args__ = (
+        db.Index('ix_notification_archive_user_id', 'user_id', 'id'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    title = db.Column(db.String(200), nullable=False)
+    message = db.Column(db.Text, nullable=False)
+    type = db.Column(db.String(50), nullable=False)
+    related_id = db.Column(db.Integer, nullable=True)
+    event_count = db.Column(db.Integer, default=1, server_default='1', nullable=False)
+    related_ids = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class BackgroundJob(db.Model):
+    """リクエスト後に実行する処理の永続キュー"""
+    __table_args__ = (
+        db.Index('ix_background_job_status_run_after', 'status', 'run_after'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)  # JOB_HANDLERS のキー
+    payload = db.Column(db.Text, nullable=False, default='{}')  # 処理関数へのキーワード引数（JSON）
+    idempotency_key = db.Column(db.String(200), unique=True, nullable=True)
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, running, succeeded, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=BACKGROUND_JOB_MAX_ATTEMPTS)
+    run_after = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    locked_at = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
 # フォームクラス
 class RegistrationForm(FlaskForm):
     username = StringField('ユーザー名', 
@@ -452,23 +895,33 @@ def parse_json_with_fallback(text):
         except Exception:
             return {}
 
+# 旧ステージコード → 新ステージコード
+STAGE_ALIASES = {
+    'proposal_pre': 's0',
+    'estimate_completed': 's1',
+    's_creation_approved': 's2',
+    'proposal_decision_obtained': 's3',
+    'pre_production_s_confirmed': 's4',
+    'first_order': 's5',
+    'temporary_listing': 's9',
+    'page_up': 's10',
+    'second_lot_ordered': 's12',
+    'project_cancelled': 's13',
+}
+
+# 企画ステージの並び順（s0~s13）
+STAGE_ORDER = ['s0', 's1', 's2', 's3', 's4', 's5', 's6', 's7', 's8_1', 's8_2', 's9', 's10', 's11', 's12', 's13']
+
+def stage_sort_key(stage):
+    """企画ステージの並び順（不明なステージは末尾）"""
+    key = (stage or '').replace('.', '_')
+    return STAGE_ORDER.index(key) if key in STAGE_ORDER else len(STAGE_ORDER)
+
 def normalize_stage(stage: str) -> str:
     """旧ステージコードを新ステージコード(s0~s13)へ正規化"""
     if not stage:
         return stage
-    aliases = {
-        'proposal_pre': 's0',
-        'estimate_completed': 's1',
-        's_creation_approved': 's2',
-        'proposal_decision_obtained': 's3',
-        'pre_production_s_confirmed': 's4',
-        'first_order': 's5',
-        'temporary_listing': 's9',
-        'page_up': 's10',
-        'second_lot_ordered': 's12',
-        'project_cancelled': 's13',
-    }
-    return aliases.get(stage, stage)
+    return STAGE_ALIASES.get(stage, stage)
 
 def generate_daily_report_from_weekly(weekly_report, report_date=None):
     """
@@ -480,7 +933,7 @@ def generate_daily_report_from_weekly(weekly_report, report_date=None):
     # 週次報告のデータを取得
     mentee = weekly_report.mentee
     planning_stage = weekly_report.planning_stage
-    product_group = weekly_report.product_group
+    product_group = weekly_report.product_group_name
     progress_items = weekly_report.progress_items or ""
     insights_concerns = weekly_report.insights_concerns or ""
     self_evaluation = weekly_report.self_evaluation
@@ -634,28 +1087,106 @@ def generate_outlook_text(planning_stage, product_group, insights):
     
     return base_outlook
 
+def apply_product_group_status(status, reports):
+    """報告履歴（報告日の新しい順）から商品群の進捗状態を設定"""
+    status.report_count = len(reports)
+    if not reports:
+        status.latest_stage = None
+        status.stage_entered_at = None
+        status.first_report_date = None
+        status.last_report_date = None
+        status.is_completed = False
+        status.is_cancelled = False
+        return status
+
+    latest_stage = normalize_stage(reports[0].planning_stage)
+    stage_entered_at = reports[0].report_date
+    for report in reports[1:]:
+        if normalize_stage(report.planning_stage) != latest_stage:
+            break
+        stage_entered_at = report.report_date
+
+    status.latest_stage = latest_stage
+    status.stage_entered_at = stage_entered_at
+    status.first_report_date = reports[-1].report_date
+    status.last_report_date = reports[0].report_date
+    status.is_completed = latest_stage == 's12'
+    status.is_cancelled = latest_stage == 's13'
+    return status
+
+def refresh_product_group_status(mentee_id, product_group_ids=None):
+    """
+    指定した商品群の進捗状態を週次報告から再計算する
+    
+    週次報告を変更した処理と同じトランザクション内で呼び出し、コミットは呼び出し側で行う。
+    product_group_ids を省略した場合はメンティの全商品群が対象。
+    """
+    db.session.flush()
+    
+    pg_query = ProductGroup.query.filter_by(mentee_id=mentee_id)
+    if product_group_ids is not None:
+        pg_query = pg_query.filter(ProductGroup.id.in_(set(product_group_ids)))
+    product_groups = pg_query.all()
+    if not product_groups:
+        return
+    
+    reports = db.session.query(
+        WeeklyReport.product_group_id,
+        WeeklyReport.planning_stage,
+        WeeklyReport.report_date
+    ).filter(
+        WeeklyReport.product_group_id.in_([pg.id for pg in product_groups])
+    ).order_by(WeeklyReport.report_date.desc(), WeeklyReport.id.desc()).all()
+    
+    reports_by_group = {}
+    for report in reports:
+        reports_by_group.setdefault(report.product_group_id, []).append(report)
+    
+    statuses = {
+        status.product_group_id: status
+        for status in ProductGroupStatus.query.filter(
+            ProductGroupStatus.product_group_id.in_([pg.id for pg in product_groups])
+        )
+    }
+    for pg in product_groups:
+        status = statuses.get(pg.id)
+        if status is None:
+            status = ProductGroupStatus(product_group_id=pg.id, mentee_id=mentee_id)
+            db.session.add(status)
+        apply_product_group_status(status, reports_by_group.get(pg.id, []))
+
+def rebuild_product_group_status(missing_only=False):
+    """商品群の進捗状態を全件再構築する（missing_only=True の場合は未作成分のみ）"""
+    query = db.session.query(ProductGroup.mentee_id).distinct()
+    if missing_only:
+        query = query.outerjoin(ProductGroupStatus).filter(ProductGroupStatus.product_group_id.is_(None))
+    else:
+        ProductGroupStatus.query.delete()
+    
+    mentee_ids = [mentee_id for (mentee_id,) in query.all()]
+    for mentee_id in mentee_ids:
+        refresh_product_group_status(mentee_id)
+    db.session.commit()
+    return len(mentee_ids)
+
 def get_product_group_latest_stages(mentee_id):
     """
     商品群ごとの最新の進捗ステージを取得
     """
-    # メンティの商品群を取得
-    product_groups = ProductGroup.query.filter_by(mentee_id=mentee_id).all()
+    # メンティの商品群と進捗状態を取得
+    rows = db.session.query(ProductGroup, ProductGroupStatus).outerjoin(
+        ProductGroupStatus, ProductGroupStatus.product_group_id == ProductGroup.id
+    ).filter(ProductGroup.mentee_id == mentee_id).all()
     product_group_stages = {}
     
-    for pg in product_groups:
-        # 各商品群の最新の週次報告を取得
-        latest_report = WeeklyReport.query.filter_by(
-            mentee_id=mentee_id,
-            product_group=pg.name
-        ).order_by(WeeklyReport.report_date.desc()).first()
-        
-        if latest_report:
+    for pg, status in rows:
+        if status and status.report_count:
             # ステージの日本語名を取得（企画ステージフォームの表示形式に合わせる）
             product_group_stages[pg.id] = {
                 'name': pg.name,
-                'latest_stage': normalize_stage(latest_report.planning_stage),
-                'latest_stage_name': get_stage_display_name(latest_report.planning_stage),
-                'last_report_date': latest_report.report_date.strftime('%Y年%m月%d日'),
+                'latest_stage': status.latest_stage,
+                'latest_stage_name': get_stage_display_name(status.latest_stage),
+                'last_report_date': status.last_report_date.strftime('%Y年%m月%d日'),
                 'has_reports': True
             }
         else:
@@ -778,8 +1309,32 @@ def generate_enhanced_outlook(planning_stage, product_group, insights):
     
     return base_outlook
 
+def describe_image_file(file_path):
+    """画像ファイルのバイト数・ピクセル寸法・内容ハッシュ（SHA-256）を取得"""
+    digest = hashlib.sha256()
+    byte_size = 0
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            digest.update(chunk)
+            byte_size += len(chunk)
+    
+    width = height = None
+    if PIL_AVAILABLE:
+        try:
+            # ヘッダーのみ読み込まれ、画素データは展開されない
+            with Image.open(file_path) as image:
+                width, height = image.size
+        except Exception:
+            pass
+    
+    return {'byte_size': byte_size, 'width': width, 'height': height, 'content_hash': digest.hexdigest()}
+
 def save_uploaded_files(files):
-    """アップロードされたファイルを保存"""
+    """
+    アップロードされたファイルを保存
+    
+    保存した画像ごとに ProductGroupImage の列値（filename, byte_size, width, height, content_hash）の辞書を返す。
+    """
     saved_files = []
     for file in files:
         if file and file.filename and allowed_file(file.filename):
@@ -791,16 +1346,485 @@ def save_uploaded_files(files):
             # ファイルを保存
             file_path = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
             file.save(file_path)
-            saved_files.append(unique_filename)
+            saved_files.append(dict(describe_image_file(file_path), filename=unique_filename))
     
     return saved_files
 
+def add_product_group_images(product_group_id, saved_images):
+    """
+    保存済みの画像を商品群の末尾に追加（既存の画像行は変更しない）
+    
+    縮小版・WebP版はコミット後にバックグラウンドジョブで作成する。
+    """
+    if not saved_images:
+        return
+    last_position = db.session.query(db.func.max(ProductGroupImage.position)).filter(
+        ProductGroupImage.product_group_id == product_group_id
+    ).scalar()
+    start = 0 if last_position is None else last_position + 1
+    images = [
+        ProductGroupImage(product_group_id=product_group_id, position=start + offset, **image)
+        for offset, image in enumerate(saved_images)
+    ]
+    db.session.add_all(images)
+    db.session.flush()
+    enqueue_job('generate_image_derivatives', {'image_ids': [image.id for image in images]})
+
+def get_product_group_previews(product_group_ids, limit=1):
+    """
+    商品群ごとの先頭の画像（limit 枚まで）と画像枚数を1クエリで取得
+    
+    戻り値は {商品群ID: {'images': [画像, ...], 'image_count': 画像枚数}}。画像のない商品群は含まない。
+    各画像は filename, width, thumbnail_widths, has_webp の辞書（JSON化でき、image_url() などにそのまま渡せる）。
+    """
+    product_group_ids = set(product_group_ids)
+    product_group_ids.discard(None)
+    if not product_group_ids:
+        return {}
+    
+    group_window = {'partition_by': ProductGroupImage.product_group_id}
+    ranked = db.session.query(
+        ProductGroupImage.product_group_id,
+        ProductGroupImage.filename,
+        ProductGroupImage.width,
+        ProductGroupImage.thumbnail_widths,
+        ProductGroupImage.has_webp,
+        db.func.row_number().over(
+            order_by=(ProductGroupImage.position, ProductGroupImage.id), **group_window
+        ).label('image_rank'),
+        db.func.count().over(**group_window).label('image_count')
+    ).filter(ProductGroupImage.product_group_id.in_(product_group_ids)).subquery()
+    
+    previews = {}
+    for row in db.session.query(ranked).filter(ranked.c.image_rank <= limit).order_by(
+        ranked.c.product_group_id, ranked.c.image_rank
+    ):
+        preview = previews.setdefault(row.product_group_id, {'images': [], 'image_count': row.image_count})
+        preview['images'].append({
+            'filename': row.filename,
+            'width': row.width,
+            'thumbnail_widths': row.thumbnail_widths,
+            'has_webp': row.has_webp
+        })
+    return previews
+
+def thumbnail_filename(filename, width, webp=False):
+    """縮小版のファイル名（例: photo_1a2b3c4d.jpg → photo_1a2b3c4d_480w.jpg / photo_1a2b3c4d_480w.webp）"""
+    stem, ext = os.path.splitext(filename)
+    return f"{stem}_{width}w{'.webp' if webp else ext}"
+
+def _save_derivative(image, output_path, ext):
+    """縮小した画像を形式に合わせて保存（書き込み途中のファイルは配信されない）"""
+    temp_path = f'{output_path}.{uuid.uuid4().hex}.tmp'
+    if ext in ('.jpg', '.jpeg'):
+        image.convert('RGB').save(temp_path, 'JPEG', quality=82, optimize=True, progressive=True)
+    elif ext == '.png':
+        image.save(temp_path, 'PNG', optimize=True)
+    else:
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA')
+        image.save(temp_path, 'WEBP', quality=80, method=4)
+    os.replace(temp_path, output_path)
+
+def generate_image_derivatives(filename):
+    """
+    アップロード画像の縮小版（THUMBNAIL_WIDTHS の各幅。元の形式と WebP）を作成する
+    
+    元画像の幅以上の縮小版は作らない。(作成した幅のリスト, WebP 版の有無) を返す。
+    Pillow 未インストール・対象外の形式・ファイルがない場合は何も作らない。
+    """
+    source_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+    ext = os.path.splitext(filename)[1].lower()
+    if not PIL_AVAILABLE or ext not in THUMBNAIL_SOURCE_EXTENSIONS or not os.path.isfile(source_path):
+        return [], False
+    
+    with Image.open(source_path) as source:
+        # JPEG は必要な大きさまで縮小しながらデコードする（大きな写真でもメモリ・時間を抑える）
+        if THUMBNAIL_WIDTHS:
+            source.draft('RGB', (THUMBNAIL_WIDTHS[-1], THUMBNAIL_WIDTHS[-1]))
+        image = ImageOps.exif_transpose(source)  # スマートフォン写真の向きを反映
+    if image.mode in ('P', '1'):
+        image = image.convert('RGBA')  # パレット画像のままでは縮小時に補間されない
+    
+    widths = [width for width in THUMBNAIL_WIDTHS if width < image.width]
+    has_webp = WEBP_AVAILABLE and bool(widths)
+    # 大きい幅から順に、直前の縮小結果をさらに縮小する
+    for width in reversed(widths):
+        height = max(1, round(image.height * width / image.width))
+        image = image.resize((width, height), Image.LANCZOS)
+        _save_derivative(image, os.path.join(app.config['THUMBNAIL_FOLDER'], thumbnail_filename(filename, width)), ext)
+        if has_webp and ext != '.webp':
+            _save_derivative(image, os.path.join(app.config['THUMBNAIL_FOLDER'], thumbnail_filename(filename, width, webp=True)), '.webp')
+    return widths, has_webp
+
 def delete_uploaded_files(filenames):
-    """アップロードされたファイルを削除"""
+    """アップロードされたファイルを削除（縮小版も削除）"""
+    thumbnail_names = os.listdir(app.config['THUMBNAIL_FOLDER']) if os.path.isdir(app.config['THUMBNAIL_FOLDER']) else []
     for filename in filenames:
         file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
         if os.path.exists(file_path):
             os.remove(file_path)
+        # 設定変更前の幅で作成したものも含め、{元のファイル名}_{幅}w.{拡張子} をすべて削除
+        thumbnail_pattern = re.compile(re.escape(os.path.splitext(filename)[0]) + r'_\d+w\.\w+')
+        for thumbnail_name in thumbnail_names:
+            if thumbnail_pattern.fullmatch(thumbnail_name):
+                os.remove(os.path.join(app.config['THUMBNAIL_FOLDER'], thumbnail_name))
+
+# ジョブ名 → 処理関数
+JOB_HANDLERS = {}
+
+def prune_background_jobs(days=None):
+    """
+    完了から days 日（既定: BACKGROUND_JOB_RETENTION_DAYS）を過ぎた成功済みジョブを削除し、件数を返す
+    
+    失敗したジョブは原因調査のため残す。
+    """
+    days = BACKGROUND_JOB_RETENTION_DAYS if days is None else days
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    result = db.session.execute(
+        db.delete(BackgroundJob).where(BackgroundJob.status == 'succeeded', BackgroundJob.finished_at < cutoff)
+    )
+    db.session.commit()
+    return result.rowcount
+
+def background_job(name):
+    """バックグラウンドジョブの処理関数を登録するデコレーター"""
+    def decorator(func):
+        JOB_HANDLERS[name] = func
+        return func
+    return decorator
+
+# 重複する idempotency_key を無視して追加できる INSERT（DBごとの ON CONFLICT DO NOTHING）
+ON_CONFLICT_INSERTS = {
+    'sqlite': sqlite.insert,
+    'postgresql': postgresql.insert,
+}
+
+def enqueue_job(name, payload=None, idempotency_key=None, max_attempts=None):
+    """
+    ジョブを現在のトランザクションに追加する（コミット後にワーカーが実行）
+    
+    同じ idempotency_key のジョブが既にあれば追加しない。ロールバック時はジョブも取り消される。
+    """
+    if name not in JOB_HANDLERS:
+        raise ValueError(f'未登録のジョブです: {name}')
+    
+    values = {
+        'name': name,
+        'payload': json.dumps(payload or {}, ensure_ascii=False),
+        'idempotency_key': idempotency_key,
+        'max_attempts': max_attempts or BACKGROUND_JOB_MAX_ATTEMPTS
+    }
+    dialect_insert = ON_CONFLICT_INSERTS.get(db.engine.dialect.name)
+    if dialect_insert is not None:
+        db.session.execute(
+            dialect_insert(BackgroundJob).values(**values).on_conflict_do_nothing(index_elements=['idempotency_key'])
+        )
+    else:
+        # ON CONFLICT 非対応のDBではセーブポイント内で追加し、重複した場合のみ取り消す
+        try:
+            with db.session.begin_nested():
+                db.session.execute(db.insert(BackgroundJob).values(**values))
+        except IntegrityError:
+            pass
+    db.session.info['background_jobs_enqueued'] = True
+
+@event.listens_for(Session, 'after_commit')
+def _wake_background_job_worker(session):
+    if session.info.pop('background_jobs_enqueued', False):
+        job_worker.wake()
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_background_job_wakeup(session):
+    session.info.pop('background_jobs_enqueued', None)
+
+def claim_next_job():
+    """実行可能なジョブを1件、実行中に変更して取得する（なければ None）"""
+    for _ in range(3):
+        now = datetime.utcnow()
+        claimable = db.or_(
+            db.and_(BackgroundJob.status == 'pending', BackgroundJob.run_after <= now),
+            # 処理中に停止したプロセスのジョブを回収
+            db.and_(BackgroundJob.status == 'running', BackgroundJob.locked_at < now - timedelta(seconds=BACKGROUND_JOB_LOCK_TIMEOUT))
+        )
+        job_id = db.session.execute(
+            db.select(BackgroundJob.id).where(claimable).order_by(BackgroundJob.run_after, BackgroundJob.id).limit(1)
+        ).scalar()
+        if job_id is None:
+            db.session.rollback()
+            return None
+        
+        # 他のワーカー（別プロセスを含む）と取り合った場合は次の候補へ
+        result = db.session.execute(
+            db.update(BackgroundJob).where(BackgroundJob.id == job_id, claimable).values(
+                status='running',
+                locked_at=now,
+                attempts=BackgroundJob.attempts + 1
+            ).execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        if result.rowcount:
+            return db.session.get(BackgroundJob, job_id)
+    return None
+
+def run_next_job():
+    """
+    ジョブを1件実行する。実行するジョブがなければ False を返す
+    
+    処理関数のDB変更はジョブの完了記録と同じトランザクションでコミットする（失敗時はまとめて取り消し）。
+    失敗したジョブは max_attempts まで間隔を倍にしながら再実行する。
+    """
+    job = claim_next_job()
+    if job is None:
+        return False
+    
+    job_id = job.id
+    try:
+        JOB_HANDLERS[job.name](**json.loads(job.payload))
+        job.status = 'succeeded'
+        job.locked_at = None
+        job.last_error = None
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        job = db.session.get(BackgroundJob, job_id)
+        job.locked_at = None
+        job.last_error = f'{type(e).__name__}: {e}'
+        if job.attempts >= job.max_attempts:
+            job.status = 'failed'
+            job.finished_at = datetime.utcnow()
+        else:
+            job.status = 'pending'
+            job.run_after = datetime.utcnow() + timedelta(seconds=BACKGROUND_JOB_RETRY_DELAY * 2 ** (job.attempts - 1))
+        db.session.commit()
+        print(f"ジョブ {job_id} ({job.name}) が失敗しました（{job.attempts}/{job.max_attempts}回目）: {job.last_error}")
+    return True
+
+class BackgroundJobWorker:
+    """
+    BackgroundJob を処理するワーカースレッド群
+    
+    最初のジョブ追加時に起動する。停止時は新しいジョブを取得せず、実行中のジョブの完了を待つ。
+    未処理のジョブはDBに残るため、次回起動時に実行される。
+    """
+    
+    def __init__(self, num_threads):
+        self.num_threads = num_threads
+        self._threads = []
+        self._stopping = False
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition()
+        self._last_pruned = 0.0
+    
+    def start(self):
+        with self._lock:
+            if self._threads or self._stopping or self.num_threads <= 0:
+                return
+            for i in range(self.num_threads):
+                thread = threading.Thread(target=self._run, name=f'background-job-{i + 1}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+    
+    def wake(self):
+        self.start()
+        with self._wakeup:
+            self._wakeup.notify_all()
+    
+    def stop(self, timeout=30):
+        with self._wakeup:
+            self._stopping = True
+            self._wakeup.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+    
+    def _prune_if_due(self):
+        """BACKGROUND_JOB_PRUNE_INTERVAL ごとに1スレッドだけが完了済みジョブとマークダウンの古いファイルキャッシュを削除する"""
+        with self._lock:
+            if time.monotonic() - self._last_pruned < BACKGROUND_JOB_PRUNE_INTERVAL:
+                return
+            self._last_pruned = time.monotonic()
+        prune_background_jobs()
+        prune_markdown_cache()
+    
+    def _run(self):
+        with app.app_context():
+            while not self._stopping:
+                try:
+                    processed = run_next_job()
+                    if not processed:
+                        self._prune_if_due()
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"ジョブの取得に失敗しました: {str(e)}")
+                    processed = False
+                finally:
+                    db.session.remove()
+                
+                if not processed:
+                    # 再実行待ち・他プロセスで追加されたジョブのため定期的にも確認する
+                    with self._wakeup:
+                        if not self._stopping:
+                            self._wakeup.wait(BACKGROUND_JOB_POLL_INTERVAL)
+
+job_worker = BackgroundJobWorker(BACKGROUND_JOB_WORKERS)
+atexit.register(job_worker.stop)
+
+@background_job('notify_mentors')
+def notify_mentors_job(title, message, notification_type, related_id=None):
+    """メンター・管理者全員に通知を作成"""
+    create_notifications(get_mentor_user_ids(), title, message, notification_type, related_id)
+
+@background_job('notify_users')
+def notify_users_job(user_ids, title, message, notification_type, related_id=None):
+    """指定ユーザーに通知を作成（ジョブの追加後に削除されたユーザーには作成しない）"""
+    existing_ids = {user_id for (user_id,) in db.session.query(User.id).filter(User.id.in_(user_ids))}
+    create_notifications([user_id for user_id in user_ids if user_id in existing_ids], title, message, notification_type, related_id)
+
+@background_job('delete_uploaded_files')
+def delete_uploaded_files_job(filenames):
+    """アップロードされたファイルを物理削除"""
+    delete_uploaded_files(filenames)
+
+def record_image_derivatives(images, results):
+    """
+    縮小版の作成結果（generate_image_derivatives() の戻り値）を画像の行に記録（コミットは呼び出し側で行う）
+    
+    縮小版を使った表示に切り替わるよう、対象メンティのキャッシュ済みの進捗カードも無効化する。
+    """
+    for image, (widths, has_webp) in zip(images, results):
+        image.thumbnail_widths = ','.join(str(width) for width in widths)
+        image.has_webp = has_webp
+    
+    product_group_ids = {image.product_group_id for image in images}
+    if product_group_ids:
+        mentee_ids = db.session.query(ProductGroup.mentee_id).filter(ProductGroup.id.in_(product_group_ids)).distinct()
+        for (mentee_id,) in mentee_ids.all():
+            bump_mentee_data_version(mentee_id)
+
+@background_job('generate_image_derivatives')
+def generate_image_derivatives_job(image_ids):
+    """アップロードされた商品群画像の縮小版・WebP版を作成"""
+    images = ProductGroupImage.query.filter(ProductGroupImage.id.in_(image_ids)).all()
+    record_image_derivatives(images, [generate_image_derivatives(image.filename) for image in images])
+
+def build_image_derivatives(rebuild_all=False, workers=None):
+    """
+    縮小版が未作成の商品群画像（rebuild_all=True の場合は全画像）の縮小版・WebP版を作成する
+    
+    変換はスレッドプールで並列に行う（Pillow はデコード・縮小の間 GIL を解放する）。処理した画像数を返す。
+    """
+    query = ProductGroupImage.query
+    if not rebuild_all:
+        query = query.filter(ProductGroupImage.thumbnail_widths.is_(None))
+    images = query.order_by(ProductGroupImage.id).all()
+    if not images:
+        return 0
+    
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        results = list(executor.map(generate_image_derivatives, [image.filename for image in images]))
+    record_image_derivatives(images, results)
+    db.session.commit()
+    return len(images)
+
+def serialize_notification(notification):
+    """通知をJSON用の辞書に変換（通知一覧APIとSSE配信で共通）"""
+    return {
+        'id': notification.id,
+        'title': notification.title,
+        'message': notification.message,
+        'type': notification.type,
+        'is_read': bool(notification.is_read),
+        'created_at': notification.created_at.strftime('%Y年%m月%d日 %H:%M'),
+        'related_id': notification.related_id,
+        'count': notification.event_count,
+        'related_ids': get_notification_related_ids(notification)
+    }
+
+def get_notification_related_ids(notification):
+    """通知（まとめ通知を含む）の関連IDの一覧"""
+    if notification.related_ids:
+        return json.loads(notification.related_ids)
+    return [notification.related_id] if notification.related_id is not None else []
+
+def adjust_unread_notification_counts(user_ids, delta):
+    """ユーザーの未読通知数を delta だけ増減し、通知バージョンを進める（UPDATE文1回、呼び出し側でコミット）"""
+    if user_ids:
+        db.session.execute(
+            db.update(User).where(User.id.in_(user_ids)).values(
+                unread_notification_count=User.unread_notification_count + delta,
+                notification_version=User.notification_version + 1
+            ).execution_options(synchronize_session=False)
+        )
+
+def get_unread_notification_count(user_id):
+    """未読通知数を主キー検索で取得"""
+    return db.session.execute(
+        db.select(User.unread_notification_count).where(User.id == user_id)
+    ).scalar() or 0
+
+def repair_unread_notification_counts():
+    """未読通知数を通知テーブルから再計算し、ずれていたユーザー数を返す"""
+    actual_count = db.select(db.func.count(Notification.id)).where(
+        Notification.user_id == User.id,
+        Notification.is_read == False  # noqa: E712
+    ).scalar_subquery()
+    result = db.session.execute(
+        db.update(User).where(User.unread_notification_count != actual_count).values(
+            unread_notification_count=actual_count,
+            notification_version=User.notification_version + 1
+        ).execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return result.rowcount
+
+def compact_notifications(older_than_days=None, policy=None, batch_size=None):
+    """
+    既読かつ保持期間を過ぎた通知をアーカイブへ移動（policy='delete' の場合は削除）
+    
+    書き込みロックを長く保持しないよう、batch_size 件ずつ別トランザクションで処理する。
+    処理した件数を返す。
+    """
+    older_than_days = NOTIFICATION_RETENTION_DAYS if older_than_days is None else older_than_days
+    policy = policy or NOTIFICATION_RETENTION_POLICY
+    batch_size = batch_size or NOTIFICATION_COMPACT_BATCH_SIZE
+    if policy not in ('archive', 'delete'):
+        raise ValueError(f'不明な保持ポリシーです: {policy}')
+    
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    compacted_count = 0
+    while True:
+        rows = db.session.execute(
+            db.select(Notification.id, Notification.user_id).where(
+                Notification.is_read == True,  # noqa: E712
+                Notification.created_at < cutoff
+            ).order_by(Notification.created_at).limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        
+        notification_ids = [row.id for row in rows]
+        if policy == 'archive':
+            db.session.execute(
+                db.insert(NotificationArchive).from_select(
+                    ['id', 'user_id', 'title', 'message', 'type', 'related_id', 'event_count', 'related_ids', 'created_at', 'archived_at'],
+                    db.select(
+                        Notification.id, Notification.user_id, Notification.title, Notification.message,
+                        Notification.type, Notification.related_id, Notification.event_count, Notification.related_ids,
+                        Notification.created_at,
+                        db.literal(datetime.utcnow(), db.DateTime)
+                    ).where(Notification.id.in_(notification_ids))
+                )
+            )
+        db.session.execute(
+            db.delete(Notification).where(Notification.id.in_(notification_ids)).execution_options(synchronize_session=False)
+        )
+        # 通知一覧が変わるため ETag を無効化（未読数は変わらない）
+        adjust_unread_notification_counts(sorted({row.user_id for row in rows}), 0)
+        db.session.commit()
+        compacted_count += len(rows)
+    
+    return compacted_count
 
 def create_notification(user_id, title, message, notification_type, related_id=None):
     """通知を作成する"""
@@ -812,9 +1836,76 @@ def create_notification(user_id, title, message, notification_type, related_id=N
         related_id=related_id
     )
     db.session.add(notification)
+    db.session.flush()
+    adjust_unread_notification_counts([user_id], 1)
+    queue_notification_event(user_id, serialize_notification(notification))
     db.session.commit()
     return notification
 
+def merge_into_digest_notifications(user_ids, message, notification_type, related_id):
+    """
+    期間内の同じ種類の未読通知（ユーザーごとに最新の1件）にイベントを集約する
+    
+    件数・関連ID・メッセージを更新し、集約した通知を返す。
+    """
+    window_start = datetime.utcnow() - timedelta(minutes=NOTIFICATION_DIGEST_WINDOW_MINUTES)
+    latest_open_digest_ids = db.select(db.func.max(Notification.id)).where(
+        Notification.user_id.in_(user_ids),
+        Notification.type == notification_type,
+        Notification.is_read == False,  # noqa: E712
+        Notification.created_at >= window_start
+    ).group_by(Notification.user_id)
+    
+    # JSON関数・UPDATE ... RETURNING はDBごとに異なるため、行ロックして読み込みPython側で追記する
+    notifications = Notification.query.filter(Notification.id.in_(latest_open_digest_ids)).with_for_update().all()
+    for notification in notifications:
+        notification.related_ids = json.dumps(get_notification_related_ids(notification) + [related_id])
+        notification.event_count += 1
+        notification.related_id = related_id
+        notification.message = message
+    db.session.flush()
+    return notifications
+
+def create_notifications(user_ids, title, message, notification_type, related_id=None):
+    """
+    複数ユーザーへの同一通知を1回の複数行INSERTで作成する
+    
+    NOTIFICATION_DIGEST_TYPES の種類は、期間内の未読通知があればそこへ集約し、残りのユーザーのみ作成する。
+    呼び出し側のトランザクション内で実行し、コミットは呼び出し側で行う。作成件数を返す。
+    """
+    recipient_ids = list(dict.fromkeys(user_ids))
+    if not recipient_ids:
+        return 0
+    
+    merged_user_ids = []
+    if notification_type in NOTIFICATION_DIGEST_TYPES and NOTIFICATION_DIGEST_WINDOW_MINUTES > 0:
+        for notification in merge_into_digest_notifications(recipient_ids, message, notification_type, related_id):
+            merged_user_ids.append(notification.user_id)
+            queue_notification_event(notification.user_id, serialize_notification(notification))
+        # 未読数は変わらないが一覧が変わるため通知バージョンのみ進める
+        adjust_unread_notification_counts(merged_user_ids, 0)
+    
+    rows = [
+        {
+            'user_id': user_id,
+            'title': title,
+            'message': message,
+            'type': notification_type,
+            'related_id': related_id
+        }
+        for user_id in recipient_ids if user_id not in merged_user_ids
+    ]
+    if rows:
+        created = db.session.execute(db.insert(Notification).values(rows).returning(*Notification.__table__.c))
+        for notification in created:
+            queue_notification_event(notification.user_id, serialize_notification(notification))
+        adjust_unread_notification_counts([row['user_id'] for row in rows], 1)
+    return len(rows)
+
+def get_mentor_user_ids():
+    """メンター・管理者のユーザーIDを取得（通知の送信先）"""
+    return [user_id for (user_id,) in db.session.query(User.id).filter(User.role.in_(['mentor', 'admin']))]
+
 def delete_mentee_dependencies(mentee):
     """メンティに紐づくデータを安全に削除（カスケード考慮、画像も物理削除）"""
     # 日報
@@ -832,144 +1923,291 @@ def delete_mentee_dependencies(mentee):
     if todo:
         db.session.delete(todo)
 
+    # 商品群の進捗状態
+    ProductGroupStatus.query.filter_by(mentee_id=mentee.id).delete()
+
     # 商品群（画像の物理削除も行う）
-    product_groups = ProductGroup.query.filter_by(mentee_id=mentee.id).all()
+    product_groups = ProductGroup.query.options(db.selectinload(ProductGroup.images)).filter_by(mentee_id=mentee.id).all()
+    image_filenames = [image.filename for pg in product_groups for image in pg.images]
+    if image_filenames:
+        enqueue_job('delete_uploaded_files', {'filenames': image_filenames})
     for pg in product_groups:
-        if pg.images:
-            try:
-                image_filenames = json.loads(pg.images)
-                delete_uploaded_files(image_filenames)
-            except Exception:
-                pass
         db.session.delete(pg)
 
-def get_product_group_progress(mentee_id, weeks=16):
-    """商品群別の進捗状況を取得（4か月=16週間の開発期間を想定）"""
-    from datetime import datetime, timedelta
-    
-    # 現在存在する商品群のリストを取得
-    existing_product_groups = ProductGroup.query.filter_by(mentee_id=mentee_id).all()
-    existing_product_group_names = {pg.name for pg in existing_product_groups}
-    
-    
-    # 4か月分の過去の報告を取得
-    end_date = datetime.now()
-    start_date = end_date - timedelta(weeks=weeks)
-    
-    reports = WeeklyReport.query.filter(
-        WeeklyReport.mentee_id == mentee_id,
+def _product_group_progress_rows(mentee_ids, weeks):
+    """商品群別進捗の集計行をウィンドウ関数で一括取得する
+
+    1報告1行で返し、各行に商品群単位の集計値（最新ステージ・ステージ開始日・初回報告日など）を付与する。
+    """
+    start_date = datetime.now() - timedelta(weeks=weeks)
+
+    stage = db.case(STAGE_ALIASES, value=WeeklyReport.planning_stage, else_=WeeklyReport.planning_stage)
+    group_window = {'partition_by': WeeklyReport.product_group_id}
+    latest_first = dict(group_window, order_by=(WeeklyReport.report_date.desc(), WeeklyReport.id.desc()))
+
+    # 削除済みの商品群の報告（product_group_id なし）は除外される
+    reports = db.session.query(
+        WeeklyReport.product_group_id,
+        WeeklyReport.mentee_id,
+        WeeklyReport.id.label('report_id'),
+        WeeklyReport.report_date,
+        WeeklyReport.self_evaluation,
+        stage.label('stage'),
+        db.func.first_value(WeeklyReport.planning_stage).over(**latest_first).label('latest_raw_stage'),
+        db.func.first_value(stage).over(**latest_first).label('latest_stage'),
+        db.func.max(WeeklyReport.report_date).over(**group_window).label('last_report_date'),
+        db.func.min(WeeklyReport.report_date).over(**group_window).label('first_report_date')
+    ).filter(
+        WeeklyReport.mentee_id.in_(mentee_ids),
+        WeeklyReport.product_group_id.isnot(None),
         WeeklyReport.report_date >= start_date
-    ).order_by(WeeklyReport.report_date.desc()).all()
-    
-    # 商品群ごとに進捗を整理
+    ).subquery()
+
+    # 現在のステージに入る直前（最新ステージと異なる直近の報告）の日付。なければ最新報告日
+    stage_start = db.func.coalesce(
+        db.func.max(
+            db.case((reports.c.stage != reports.c.latest_stage, reports.c.report_date))
+        ).over(partition_by=reports.c.product_group_id),
+        reports.c.last_report_date
+    )
+
+    return db.session.query(
+        reports,
+        ProductGroup.name,
+        ProductGroup.created_at,
+        Mentee.name.label('mentee_name'),
+        stage_start.label('stage_start')
+    ).join(
+        ProductGroup, ProductGroup.id == reports.c.product_group_id
+    ).join(
+        Mentee, Mentee.id == reports.c.mentee_id
+    ).order_by(
+        reports.c.last_report_date.desc(),
+        reports.c.product_group_id,
+        reports.c.report_date.desc(),
+        reports.c.report_id.desc()
+    ).all()
+
+def _build_product_group_progress(rows, now=None):
+    """集計行を商品群ごとの進捗データ（報告日の新しい順）に組み立てる"""
+    if now is None:
+        now = datetime.now()
+
     product_groups = {}
-    
-    for report in reports:
-        product_group_name = report.product_group
-        
-        # 商品群が削除されている場合は進捗サマリーに表示しない
-        if product_group_name not in existing_product_group_names:
-            continue
-        
-        if product_group_name not in product_groups:
-            # ProductGroupモデルから画像情報を取得
-            product_group = ProductGroup.query.filter_by(
-                name=product_group_name, 
-                mentee_id=mentee_id
-            ).first()
-            
-            product_groups[product_group_name] = {
-                'id': product_group.id if product_group else None,
-                'name': product_group_name,
-                'images': product_group.images if product_group else None,
+    for row in rows:
+        pg_data = product_groups.get(row.product_group_id)
+        if pg_data is None:
+            latest_stage = row.latest_stage
+            is_completed = latest_stage == 's12'
+            is_cancelled = latest_stage == 's13'
+            # 初回報告日を起点とした経過週数で警告レベルを判定（4週間ごとに段階的変化）
+            weeks_since_start = (now - row.first_report_date).days // 7
+            progress_status, time_warning_level = get_time_warning(weeks_since_start, is_completed, is_cancelled)
+
+            pg_data = {
+                'id': row.product_group_id,
+                'name': row.name,
+                'cover_image': None,
+                'image_count': 0,
                 'reports': [],
-                'current_stage': None,
-                'stage_duration': 0,
-                'progress_status': 'unknown',
-                'is_completed': False,
-                'created_at': product_group.created_at if product_group else None,
-                'stage': None
+                'current_stage': latest_stage,
+                'stage_duration': (now - row.stage_start).days,
+                'progress_status': progress_status,
+                'is_completed': is_completed,
+                'created_at': row.created_at,
+                'stage': row.latest_raw_stage,
+                'is_cancelled': is_cancelled,
+                'weeks_since_start': weeks_since_start,
+                'time_warning_level': time_warning_level
             }
-        
-        product_groups[product_group_name]['reports'].append({
-            'id': report.id,
-            'date': report.report_date,
-            'stage': normalize_stage(report.planning_stage),
-            'self_evaluation': report.self_evaluation
+            product_groups[row.product_group_id] = pg_data
+
+        pg_data['reports'].append({
+            'id': row.report_id,
+            'date': row.report_date,
+            'stage': row.stage,
+            'self_evaluation': row.self_evaluation
         })
+
+    return list(product_groups.values())
+
+def attach_cover_images(product_group_progress):
+    """進捗データの各商品群にカバー画像と画像枚数を付与（全商品群分を1クエリで取得）"""
+    previews = get_product_group_previews(pg['id'] for pg in product_group_progress)
+    for pg in product_group_progress:
+        preview = previews.get(pg['id'])
+        if preview:
+            pg['cover_image'] = preview['images'][0]
+            pg['image_count'] = preview['image_count']
+
+def get_time_warning(weeks_since_start, is_completed=False, is_cancelled=False):
+    """経過週数から (進捗状況, 警告レベル) を判定"""
+    # 完了済み・企画中止の場合は警告なし
+    if is_completed:
+        return 'completed', 0
+    if is_cancelled:
+        return 'cancelled', 0
+    # 4週間ごとに段階的に警告レベルを上げる
+    if weeks_since_start < 4:
+        # 0-3週間：緑（正常）
+        return 'good', 0
+    if weeks_since_start < 8:
+        # 4-7週間：黄色（軽度警告）
+        return 'warning', 1
+    if weeks_since_start < 12:
+        return 'warning', 2
+    if weeks_since_start < 16:
+        # 12-15週間：赤（高度警告）
+        return 'danger', 3
+    # 16週間以上：濃い赤（最高度警告）
+    return 'danger', 4
+
+def get_product_group_progress(mentee_id, weeks=16, with_cover_images=True):
+    """商品群別の進捗状況を取得（4か月=16週間の開発期間を想定）"""
+    rows = _product_group_progress_rows([mentee_id], weeks)
+    product_group_progress = _build_product_group_progress(rows)
+    if with_cover_images:
+        attach_cover_images(product_group_progress)
+    return product_group_progress
+
+def get_product_group_progress_batch(mentee_ids, weeks=16):
+    """複数メンティの商品群別進捗を一括取得（メンティ数に関わらずクエリは一定）
+
+    戻り値は {mentee_id: 進捗リスト}。各商品群には mentee_name を付与する。
+    報告のないメンティは空リストとなる。
+    """
+    mentee_ids = list(mentee_ids)
+    progress_by_mentee = {mentee_id: [] for mentee_id in mentee_ids}
+    if not mentee_ids:
+        return progress_by_mentee
+
+    rows_by_mentee = {}
+    for row in _product_group_progress_rows(mentee_ids, weeks):
+        rows_by_mentee.setdefault(row.mentee_id, []).append(row)
+
+    now = datetime.now()
+    for mentee_id, rows in rows_by_mentee.items():
+        mentee_progress = _build_product_group_progress(rows, now)
+        for pg in mentee_progress:
+            pg['mentee_name'] = rows[0].mentee_name
+        progress_by_mentee[mentee_id] = mentee_progress
+
+    attach_cover_images([pg for mentee_progress in progress_by_mentee.values() for pg in mentee_progress])
+    return progress_by_mentee
+
+# 完了・中止のステージ（滞留期間の計測対象外）
+TERMINAL_STAGES = {'s12', 's13'}
+
+def build_stage_timelines(rows, now=None):
+    """
+    (商品群ID, 報告日, ステージ) の行から、1回の走査で商品群ごとのステージ別滞留期間を求める
+    
+    rows は商品群ID・報告日の昇順であること。ステージの入りはそのステージ最初の報告日、
+    出は次のステージ最初の報告日とし、現在のステージは現在日時までを滞留とする。
+    同じステージに複数回滞在した場合は日数を合算する。完了・中止（TERMINAL_STAGES）は
+    到達した時点で終わりとし、滞留0日・現在のステージではないものとして扱う。
+    戻り値は {商品群ID: [{'stage', 'entered_at', 'exited_at', 'dwell_days', 'is_current'}, ...]}（ステージ順）。
+    """
+    if now is None:
+        now = datetime.now()
+    
+    timelines = {}
+    group_id = None
+    stages = {}
+    run_stage = None
+    run_start = None
+    
+    def close_run(exited_at):
+        entry = stages.get(run_stage)
+        if entry is None:
+            entry = {'stage': run_stage, 'entered_at': run_start, 'exited_at': None, 'dwell_days': 0, 'is_current': False}
+            stages[run_stage] = entry
+        if run_stage in TERMINAL_STAGES:
+            entry['exited_at'] = exited_at or run_start
+            return
+        entry['exited_at'] = exited_at
+        entry['dwell_days'] += ((exited_at or now) - run_start).days
+        entry['is_current'] = exited_at is None
+    
+    for row_group_id, report_date, planning_stage in rows:
+        if row_group_id != group_id:
+            if run_stage is not None:
+                close_run(None)
+                timelines[group_id] = sorted(stages.values(), key=lambda entry: stage_sort_key(entry['stage']))
+            group_id = row_group_id
+            stages = {}
+            run_stage = None
         
-        # 最新のステージを設定
-        if not product_groups[product_group_name]['stage']:
-            product_groups[product_group_name]['stage'] = report.planning_stage
+        stage = normalize_stage(planning_stage)
+        if stage != run_stage:
+            if run_stage is not None:
+                close_run(report_date)
+            run_stage = stage
+            run_start = report_date
+    
+    if run_stage is not None:
+        close_run(None)
+        timelines[group_id] = sorted(stages.values(), key=lambda entry: stage_sort_key(entry['stage']))
+    
+    return timelines
+
+def get_stage_timelines(product_group_ids):
+    """複数の商品群のステージ別滞留期間を1クエリで取得（全期間の報告が対象）"""
+    product_group_ids = list(product_group_ids)
+    if not product_group_ids:
+        return {}
     
-    # 各商品群の進捗状況を分析
-    for pg_name, pg_data in product_groups.items():
-        if pg_data['reports']:
-            # 最新の報告のステージを現在のステージとする
-            latest_report = pg_data['reports'][0]
-            pg_data['current_stage'] = latest_report['stage']
-            
-            # 完了ステージかどうかを判定（2ロット目発注で完了）
-            pg_data['is_completed'] = normalize_stage(latest_report['stage']) == 's12'
-            
-            # 企画中止かどうかを判定
-            pg_data['is_cancelled'] = normalize_stage(latest_report['stage']) == 's13'
-            
-            # 現在のステージにいる期間を計算
-            current_stage_start = latest_report['date']
-            for report in pg_data['reports']:
-                if report['stage'] != latest_report['stage']:
-                    current_stage_start = report['date']
-                    break
-            
-            days_in_stage = (datetime.now() - current_stage_start).days
-            pg_data['stage_duration'] = days_in_stage
-            
-            # 最後の報告からの期間を計算
-            days_since_last_report = (datetime.now() - latest_report['date']).days
-            
-            # 初回登録時からの経過週数で警告レベルを判定（4週間ごとに段階的変化）
-            if pg_data['reports']:
-                # 最初の報告日を初回登録日とする
-                first_report_date = min(report['date'] for report in pg_data['reports'])
-                weeks_since_start = (datetime.now() - first_report_date).days // 7
-            else:
-                weeks_since_start = 0
-            
-            # 経過週数をデータに追加
-            pg_data['weeks_since_start'] = weeks_since_start
-            
-            # 完了済みの場合は警告なし
-            if pg_data['is_completed']:
-                pg_data['progress_status'] = 'completed'
-                pg_data['time_warning_level'] = 0
-            elif pg_data['is_cancelled']:
-                # 企画中止の場合は専用の状況
-                pg_data['progress_status'] = 'cancelled'
-                pg_data['time_warning_level'] = 0
-            else:
-                # 4週間ごとに段階的に警告レベルを上げる
-                if weeks_since_start < 4:
-                    # 0-3週間：緑（正常）
-                    pg_data['progress_status'] = 'good'
-                    pg_data['time_warning_level'] = 0
-                elif weeks_since_start < 8:
-                    # 4-7週間：黄色（軽度警告）
-                    pg_data['progress_status'] = 'warning'
-                    pg_data['time_warning_level'] = 1
-                elif weeks_since_start < 12:
-                    pg_data['progress_status'] = 'warning'
-                    pg_data['time_warning_level'] = 2
-                elif weeks_since_start < 16:
-                    # 12-15週間：赤（高度警告）
-                    pg_data['progress_status'] = 'danger'
-                    pg_data['time_warning_level'] = 3
-                else:
-                    # 16週間以上：濃い赤（最高度警告）
-                    pg_data['progress_status'] = 'danger'
-                    pg_data['time_warning_level'] = 4
+    rows = db.session.execute(
+        db.select(WeeklyReport.product_group_id, WeeklyReport.report_date, WeeklyReport.planning_stage).where(
+            WeeklyReport.product_group_id.in_(product_group_ids)
+        ).order_by(WeeklyReport.product_group_id, WeeklyReport.report_date, WeeklyReport.id)
+    ).all()
+    return build_stage_timelines(rows)
+
+def bump_mentee_data_version(mentee_id):
+    """メンティの表示用データのバージョンを進める（コミットは呼び出し側で行う）"""
+    Mentee.query.filter_by(id=mentee_id).update({Mentee.data_version: Mentee.data_version + 1})
+
+def get_cached_product_group_progress(mentees, with_mentee_name=False, weeks=16):
+    """
+    メンティごとの商品群進捗をキャッシュ経由で取得（{mentee_id: 進捗リスト}）
     
-    return list(product_groups.values())
+    キーにはメンティの data_version と当日の日付を含む（経過日数が日ごとに変わるため）。
+    未キャッシュのメンティ分だけをまとめて集計する。
+    """
+    today = datetime.now().date()
+    keys = {mentee.id: ('progress', mentee.id, mentee.data_version, weeks, today, with_mentee_name) for mentee in mentees}
+    
+    progress_by_mentee = {}
+    missing_ids = []
+    for mentee in mentees:
+        progress = fragment_cache.get(keys[mentee.id])
+        if progress is None:
+            missing_ids.append(mentee.id)
+        else:
+            progress_by_mentee[mentee.id] = progress
+    
+    if missing_ids:
+        if with_mentee_name:
+            fetched = get_product_group_progress_batch(missing_ids, weeks)
+        else:
+            fetched = {mentee_id: get_product_group_progress(mentee_id, weeks) for mentee_id in missing_ids}
+        for mentee_id, progress in fetched.items():
+            fragment_cache.set(keys[mentee_id], progress)
+            progress_by_mentee[mentee_id] = progress
+    
+    return progress_by_mentee
+
+def render_cached_progress_cards(template_name, mentees, product_group_progress, with_mentee_name=False):
+    """
+    進捗カード部分のHTMLを対象メンティの data_version 単位でキャッシュして返す
+    
+    with_mentee_name は product_group_progress の取得時と同じ値を渡す（メンティ名の有無で内容が変わるためキーに含める）。
+    """
+    key = (template_name, tuple((mentee.id, mentee.data_version) for mentee in mentees), datetime.now().date(), with_mentee_name)
+    return fragment_cache.get_or_create(
+        key, lambda: render_template(template_name, product_group_progress=product_group_progress)
+    )
 
 def get_stage_display_name(stage):
     """企画ステージの表示名を取得（統一された表示形式）"""
@@ -991,29 +2229,182 @@ def get_stage_display_name(stage):
         's12': '2ロット目発注',
         's13': '企画中止'
     }
-    return stage_names.get(stage, stage)
+    return stage_names.get(stage, stage)
+
+def _markdown_cache_path(key):
+    return os.path.join(MARKDOWN_CACHE_DIR, key[:2], f'{key}.html')
+
+def _read_persistent_markdown(key):
+    """ファイルキャッシュから変換結果を読み込む（未設定・未作成なら None）"""
+    if not MARKDOWN_CACHE_DIR:
+        return None
+    try:
+        with open(_markdown_cache_path(key), encoding='utf-8') as f:
+            html = f.read()
+    except OSError:
+        return None
+    with _markdown_render_stats_lock:
+        markdown_render_stats['persistent_hits'] += 1
+    return html
+
+def _write_persistent_markdown(key, html):
+    """ファイルキャッシュに変換結果を保存（一時ファイルから置き換え、失敗しても無視）"""
+    if not MARKDOWN_CACHE_DIR:
+        return
+    path = _markdown_cache_path(key)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(html)
+        os.replace(temp_path, path)
+    except OSError as e:
+        print(f"Markdown cache write error: {e}")
+
+def prune_markdown_cache(max_age_days=None, max_bytes=None):
+    """
+    ファイルキャッシュから作成後 max_age_days 日を過ぎたものを削除し、合計が max_bytes を超える場合は古い順に削除する
+    
+    既定は MARKDOWN_CACHE_MAX_AGE_DAYS と MARKDOWN_CACHE_MAX_MB。削除したファイル数を返す。
+    削除したものは次に表示したときに変換し直して保存される。
+    """
+    if not MARKDOWN_CACHE_DIR or not os.path.isdir(MARKDOWN_CACHE_DIR):
+        return 0
+    max_age_days = MARKDOWN_CACHE_MAX_AGE_DAYS if max_age_days is None else max_age_days
+    max_bytes = MARKDOWN_CACHE_MAX_MB * 1024 * 1024 if max_bytes is None else max_bytes
+    
+    cutoff = time.time() - max_age_days * 86400
+    entries = []
+    for root, _, filenames in os.walk(MARKDOWN_CACHE_DIR):
+        for filename in filenames:
+            path = os.path.join(root, filename)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+    
+    entries.sort()
+    total_bytes = sum(size for _, size, _ in entries)
+    removed_count = 0
+    for mtime, size, path in entries:
+        if mtime >= cutoff and total_bytes <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total_bytes -= size
+        removed_count += 1
+    return removed_count
+
+class SafeUrlTreeprocessor(Treeprocessor):
+    """許可した属性以外（on* や style など）と、http/https/mailto 以外のスキームのURLを除去"""
+    SAFE_SCHEMES = {'', 'http', 'https', 'mailto'}
+    COMMON_ATTRIBUTES = {'id', 'class', 'title'}  # 脚注・略語が付与する属性
+    ALLOWED_ATTRIBUTES = {
+        'a': {'href'},
+        'img': {'src', 'alt'},
+        'th': {'align'},
+        'td': {'align'},
+    }
+    
+    def run(self, root):
+        for element in root.iter():
+            allowed = self.COMMON_ATTRIBUTES | self.ALLOWED_ATTRIBUTES.get(element.tag, set())
+            for attribute in list(element.attrib):
+                if attribute not in allowed:
+                    del element.attrib[attribute]
+            for attribute in ('href', 'src'):
+                value = element.get(attribute)
+                if value is not None and urlsplit(value.strip()).scheme.lower() not in self.SAFE_SCHEMES:
+                    del element.attrib[attribute]
+
+class SafeHtmlExtension(Extension):
+    """マークダウン中の生のHTMLをエスケープし、危険な属性・URLを除去する拡張"""
+    
+    def extendMarkdown(self, md):
+        md.preprocessors.deregister('html_block', strict=False)
+        md.inlinePatterns.deregister('html', strict=False)
+        md.treeprocessors.register(SafeUrlTreeprocessor(md), 'safe_url', 5)
+
+# 保存用HTMLの変換に使う拡張機能。'extra' は任意の属性を書ける attr_list と
+# 生のHTMLを扱う md_in_html を含むため、それ以外の構成要素を個別に指定する
+SAFE_MARKDOWN_EXTENSIONS = ['abbr', 'def_list', 'fenced_code', 'footnotes', 'codehilite']
 
-def render_markdown(text):
-    """マークダウンテキストをHTMLに変換する"""
+# 保存用HTMLの変換ルールの版。変更したら上げると、起動時に古い版の日報を再生成する
+SAFE_HTML_VERSION = 2
+
+def _convert_markdown(text):
+    """スレッドごとに再利用する変換器で無害化したHTMLに変換"""
+    converter = getattr(_markdown_converters, 'safe_converter', None)
+    if converter is None:
+        converter = _markdown_converters.safe_converter = markdown.Markdown(
+            extensions=SAFE_MARKDOWN_EXTENSIONS + [
+                TableExtension(use_align_attribute=True),  # 列の揃えを style ではなく align 属性で出力
+                SafeHtmlExtension(),
+            ]
+        )
+    
+    started = time.perf_counter()
+    html = converter.reset().convert(text)
+    with _markdown_render_stats_lock:
+        markdown_render_stats['renders'] += 1
+        markdown_render_stats['render_time_ms'] += (time.perf_counter() - started) * 1000
+    return html
+
+def render_safe_markdown(text):
+    """マークダウンを保存用の無害化したHTMLに変換する（同じ入力の変換結果はキャッシュから返す）"""
     if not text:
         return ""
-    try:
-        # デバッグ用ログ（環境で制御）
-        if app.debug or os.environ.get('APP_DEBUG_LOGS') == '1':
-            print(f"Rendering markdown text: {text[:100]}...")
-        
-        # マークダウンをHTMLに変換
-        html = markdown.markdown(text, extensions=['extra', 'codehilite', 'tables'])
-        
-        # デバッグ用ログ（環境で制御）
-        if app.debug or os.environ.get('APP_DEBUG_LOGS') == '1':
-            print(f"Rendered HTML: {html[:100]}...")
-        
+    
+    key = hashlib.sha256('\0'.join([str(SAFE_HTML_VERSION)] + SAFE_MARKDOWN_EXTENSIONS + [text]).encode('utf-8')).hexdigest()
+    html = markdown_cache.get(key)
+    if html is not None:
         return html
-    except Exception as e:
-        # エラーが発生した場合は元のテキストを返す
-        print(f"Markdown rendering error: {e}")
-        return text.replace('\n', '<br>')
+    
+    html = _read_persistent_markdown(key)
+    if html is None:
+        try:
+            html = _convert_markdown(text)
+        except Exception as e:
+            # エラーが発生した場合はエスケープした元のテキストを返す（キャッシュしない）
+            _markdown_converters.safe_converter = None
+            print(f"Markdown rendering error: {e}")
+            return str(escape(text)).replace('\n', '<br>')
+        _write_persistent_markdown(key, html)
+    
+    markdown_cache.set(key, html)
+    return html
+
+def apply_daily_report_html(daily_report):
+    """日報の表示用HTMLを本文から生成して設定（本文の保存時に呼ぶ）"""
+    daily_report.summary_html = render_safe_markdown(daily_report.summary)
+    daily_report.generated_content_html = render_safe_markdown(daily_report.generated_content)
+    daily_report.html_version = SAFE_HTML_VERSION
+
+def render_daily_report_html(missing_only=True, batch_size=200):
+    """
+    日報の表示用HTMLを一括生成する（missing_only=False の場合は全件を再生成）
+    
+    missing_only の場合は未生成・古い変換ルール（SAFE_HTML_VERSION 未満）のものが対象。
+    batch_size 件ずつコミットし、処理件数を返す。
+    """
+    rendered_count = 0
+    last_id = 0
+    while True:
+        query = DailyReport.query.filter(DailyReport.id > last_id)
+        if missing_only:
+            query = query.filter(db.or_(DailyReport.html_version.is_(None), DailyReport.html_version < SAFE_HTML_VERSION))
+        daily_reports = query.order_by(DailyReport.id).limit(batch_size).all()
+        if not daily_reports:
+            break
+        for daily_report in daily_reports:
+            apply_daily_report_html(daily_report)
+        db.session.commit()
+        rendered_count += len(daily_reports)
+        last_id = daily_reports[-1].id
+    return rendered_count
 
 def get_stage_progress_percentage(stage):
     """企画ステージの進捗パーセンテージを取得"""
@@ -1049,6 +2440,478 @@ def get_progress_status_info(status):
     }
     return status_info.get(status, status_info['unknown'])
 
+def encode_report_cursor(report):
+    """報告一覧のページングカーソル（報告日とIDの組）を文字列化"""
+    return f"{report.report_date.isoformat()}_{report.id}"
+
+def decode_report_cursor(cursor):
+    """ページングカーソルを (報告日, ID) に戻す。不正な値は None"""
+    try:
+        report_date, report_id = cursor.rsplit('_', 1)
+        return datetime.fromisoformat(report_date), int(report_id)
+    except (AttributeError, ValueError):
+        return None
+
+def paginate_reports(query, cursor=None, limit=REPORT_PAGE_SIZE):
+    """
+    週次報告を (報告日, ID) の降順でキーセットページング
+    
+    戻り値は (報告リスト, 次ページのカーソル)。最終ページの場合カーソルは None。
+    """
+    position = decode_report_cursor(cursor) if cursor else None
+    if position:
+        report_date, report_id = position
+        query = query.filter(db.or_(
+            WeeklyReport.report_date < report_date,
+            db.and_(WeeklyReport.report_date == report_date, WeeklyReport.id < report_id)
+        ))
+    
+    reports = query.order_by(
+        WeeklyReport.report_date.desc(), WeeklyReport.id.desc()
+    ).limit(limit + 1).all()
+    
+    if len(reports) > limit:
+        reports = reports[:limit]
+        return reports, encode_report_cursor(reports[-1])
+    return reports, None
+
+# 静的アセット（static/src の CSS/JS を圧縮し、内容のハッシュ付きのファイル名で static/dist に出力）
+ASSET_SOURCE_DIR = os.path.join(app.static_folder, 'src')
+ASSET_BUILD_DIR = os.path.join(app.static_folder, 'dist')
+ASSET_MANIFEST_PATH = os.path.join(ASSET_BUILD_DIR, 'manifest.json')
+_asset_manifest = None
+
+# 直後の / が正規表現リテラルの開始になるキーワード
+_JS_REGEX_KEYWORDS = re.compile(r'(?:^|[^\w$])(?:return|typeof|instanceof|in|of|new|delete|void|throw|case|do|else)$')
+
+def minify_css(source):
+    """CSSのコメントと余分な空白を除去する（文字列リテラルは変更しない）"""
+    tokens = re.split(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|/\*.*?\*/)', source, flags=re.S)
+    result = []
+    for i, token in enumerate(tokens):
+        if i % 2:
+            if not token.startswith('/*'):
+                result.append(token)
+            continue
+        token = re.sub(r'\s+', ' ', token)
+        token = re.sub(r'\s*([{};,>])\s*', r'\1', token)
+        result.append(token.replace(';}', '}'))
+    return ''.join(result).strip()
+
+def minify_js(source):
+    """
+    JavaScriptのコメント・インデント・空行を除去する
+    
+    改行は残すため自動セミコロン挿入の結果は変わらない。
+    文字列・テンプレートリテラル・正規表現リテラルの中身は変更しない。
+    """
+    source = source.replace('\r\n', '\n')
+    out = []
+    template_braces = []  # テンプレートリテラルの ${ } 内で開いている波括弧の数
+    in_template = False
+    line_start = True
+    prev = ''  # 直前の空白以外の文字
+    i, n = 0, len(source)
+    while i < n:
+        c = source[i]
+        if in_template:
+            if c == '\\':
+                out.append(source[i:i + 2])
+                i += 2
+            elif c == '`':
+                out.append(c)
+                i += 1
+                in_template = False
+                prev = c
+            elif source.startswith('${', i):
+                out.append('${')
+                i += 2
+                in_template = False
+                template_braces.append(0)
+                prev = '{'
+            else:
+                out.append(c)
+                i += 1
+            continue
+        
+        if c == '\n':
+            while out and out[-1] in (' ', '\t'):
+                out.pop()
+            if out and out[-1] != '\n':
+                out.append('\n')
+            line_start = True
+            i += 1
+            continue
+        if c in ' \t':
+            j = i
+            while j < n and source[j] in ' \t':
+                j += 1
+            if not line_start:
+                out.append(' ')
+            i = j
+            continue
+        
+        line_start = False
+        if source.startswith('//', i):
+            j = source.find('\n', i)
+            i = n if j < 0 else j
+        elif source.startswith('/*', i):
+            j = source.find('*/', i + 2)
+            i = n if j < 0 else j + 2
+            if out and out[-1] not in (' ', '\n'):
+                out.append(' ')
+        elif c in '\'"':
+            j = i + 1
+            while j < n and source[j] != c and source[j] != '\n':
+                j += 2 if source[j] == '\\' else 1
+            out.append(source[i:j + 1])
+            i = j + 1
+            prev = c
+        elif c == '`':
+            out.append(c)
+            i += 1
+            in_template = True
+        elif c == '/' and (not prev or prev in '(,=:[!&|?{};+-*%<>~^' or _JS_REGEX_KEYWORDS.search(''.join(out[-12:]).rstrip())):
+            # 正規表現リテラル（文字クラス内の / は終端ではない）
+            j = i + 1
+            in_class = False
+            while j < n and source[j] != '\n':
+                if source[j] == '\\':
+                    j += 1
+                elif source[j] == '[':
+                    in_class = True
+                elif source[j] == ']':
+                    in_class = False
+                elif source[j] == '/' and not in_class:
+                    break
+                j += 1
+            j += 1
+            while j < n and (source[j].isalnum() or source[j] == '_'):
+                j += 1
+            out.append(source[i:j])
+            i = j
+            prev = 'a'
+        else:
+            if template_braces and c == '{':
+                template_braces[-1] += 1
+            elif template_braces and c == '}':
+                if template_braces[-1] == 0:
+                    template_braces.pop()
+                    in_template = True
+                else:
+                    template_braces[-1] -= 1
+            out.append(c)
+            i += 1
+            prev = c
+    return ''.join(out).strip() + '\n'
+
+ASSET_MINIFIERS = {'.css': minify_css, '.js': minify_js}
+
+def build_assets():
+    """
+    static/src の CSS/JS を圧縮して static/dist に出力し、マニフェストを返す
+    
+    出力ファイル名には内容のハッシュを含める（変更のたびに別URLになるため長期キャッシュできる）。
+    マニフェストに含まれなくなった古いファイルは削除する。
+    """
+    global _asset_manifest
+    manifest = {}
+    for root, _, filenames in os.walk(ASSET_SOURCE_DIR):
+        for filename in sorted(filenames):
+            stem, ext = os.path.splitext(filename)
+            if ext not in ASSET_MINIFIERS:
+                continue
+            source_path = os.path.join(root, filename)
+            name = os.path.relpath(source_path, ASSET_SOURCE_DIR).replace(os.sep, '/')
+            with open(source_path, encoding='utf-8') as f:
+                content = ASSET_MINIFIERS[ext](f.read())
+            
+            digest = hashlib.sha256(content.encode('utf-8')).hexdigest()[:12]
+            output_name = f'{os.path.splitext(name)[0]}.{digest}{ext}'
+            output_path = os.path.join(ASSET_BUILD_DIR, output_name)
+            if not os.path.exists(output_path):
+                os.makedirs(os.path.dirname(output_path), exist_ok=True)
+                temp_path = f'{output_path}.{uuid.uuid4().hex}.tmp'
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    f.write(content)
+                os.replace(temp_path, output_path)
+            manifest[name] = f'dist/{output_name}'
+    
+    os.makedirs(ASSET_BUILD_DIR, exist_ok=True)
+    temp_path = f'{ASSET_MANIFEST_PATH}.{uuid.uuid4().hex}.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(temp_path, ASSET_MANIFEST_PATH)
+    _asset_manifest = manifest
+    remove_stale_assets(manifest)
+    return manifest
+
+def remove_stale_assets(manifest):
+    """static/dist からマニフェストに含まれないファイル（旧ビルドの出力と .gz / .br）を削除し、削除した件数を返す"""
+    keep_paths = {os.path.abspath(ASSET_MANIFEST_PATH)}
+    keep_paths.update(os.path.abspath(os.path.join(app.static_folder, output)) for output in manifest.values())
+    removed_count = 0
+    for root, _, filenames in os.walk(ASSET_BUILD_DIR):
+        for filename in filenames:
+            path = os.path.abspath(os.path.join(root, filename))
+            base_path = path
+            for suffix in PRECOMPRESS_SUFFIXES.values():
+                if path.endswith(suffix):
+                    base_path = path[:-len(suffix)]
+                    break
+            if base_path in keep_paths:
+                continue
+            try:
+                os.remove(path)
+                removed_count += 1
+            except OSError:
+                pass
+    return removed_count
+
+def asset_url(name):
+    """
+    静的アセットのURL（ビルド済みならハッシュ付きのファイル、未ビルド・デバッグ時は static/src の元ファイル）
+    """
+    global _asset_manifest
+    if app.debug:
+        return url_for('static', filename=f'src/{name}')
+    if _asset_manifest is None:
+        try:
+            with open(ASSET_MANIFEST_PATH, encoding='utf-8') as f:
+                _asset_manifest = json.load(f)
+        except (OSError, ValueError):
+            _asset_manifest = {}
+    return url_for('static', filename=_asset_manifest.get(name, f'src/{name}'))
+
+@app.after_request
+def add_static_cache_headers(response):
+    """ハッシュ付きのアセットは内容が変わらないため長期キャッシュさせる"""
+    if request.endpoint == 'static' and request.path.startswith(f'{app.static_url_path}/dist/'):
+        response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
+# レスポンス圧縮（HTML・JSONなど、COMPRESS_MIN_SIZE バイト以上の場合）
+COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', '1024'))
+COMPRESSIBLE_MIMETYPES = {'text/html', 'application/json', 'text/css', 'text/javascript', 'text/plain', 'image/svg+xml'}
+# 事前圧縮する静的ファイル（アップロード画像は対象外）
+PRECOMPRESS_EXTENSIONS = {'.css', '.js', '.json', '.svg', '.html', '.txt'}
+PRECOMPRESS_SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+
+def choose_content_encoding():
+    """Accept-Encoding から使用する圧縮形式を選ぶ（br, gzip, None）"""
+    encodings = ['br', 'gzip'] if BROTLI_AVAILABLE else ['gzip']
+    return request.accept_encodings.best_match(encodings)
+
+def compress_bytes(data, encoding, level=None):
+    """指定形式で圧縮（level 省略時はリクエスト時向けの速度重視の設定）"""
+    if encoding == 'br':
+        return brotli.compress(data, quality=5 if level is None else level)
+    return gzip.compress(data, compresslevel=6 if level is None else level, mtime=0)
+
+def compress_stream(chunks, encoding):
+    """ストリーミングのレスポンスをチャンクごとに圧縮する（チャンク単位でフラッシュし、送出を遅らせない）"""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=5)
+        compress_chunk = lambda chunk: compressor.process(chunk) + compressor.flush()
+        finish = compressor.finish
+    else:
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # gzip形式
+        compress_chunk = lambda chunk: compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        finish = compressor.flush
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            data = compress_chunk(chunk)
+            if data:
+                yield data
+        yield finish()
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
+
+@app.after_request
+def compress_response(response):
+    """HTML・JSONのレスポンスを Accept-Encoding に応じてgzip/Brotliで圧縮する"""
+    if (response.direct_passthrough
+            or response.status_code < 200 or response.status_code in (204, 304)
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+    
+    response.vary.add('Accept-Encoding')
+    if response.is_streamed:
+        # ストリーミング送出のページは長さが不明なため、しきい値によらずチャンク単位で圧縮
+        encoding = choose_content_encoding()
+        if encoding:
+            response.response = compress_stream(response.response, encoding)
+            response.headers['Content-Encoding'] = encoding
+            response.headers.pop('Content-Length', None)
+        return response
+    
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_SIZE:
+        return response
+    encoding = choose_content_encoding()
+    if not encoding:
+        return response
+    
+    response.set_data(compress_bytes(data, encoding))
+    response.headers['Content-Encoding'] = encoding
+    # 圧縮後は元のバイト列と一致しないため弱いETagにする
+    etag, is_weak = response.get_etag()
+    if etag and not is_weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+# 大きなページをテンプレートの生成途中から送出する（STREAM_TEMPLATES=0 で一括レンダリングに戻す）
+app.config['STREAM_TEMPLATES'] = os.environ.get('STREAM_TEMPLATES', '1') == '1'
+STREAM_CHUNK_SIZE = int(os.environ.get('STREAM_CHUNK_SIZE', '8192'))  # 送出単位（バイト）
+
+def _buffer_chunks(chunks, chunk_size):
+    """テンプレートの細かい出力をまとめ、chunk_size バイト以上ずつUTF-8で送出する"""
+    buffer = []
+    buffered_size = 0
+    try:
+        for chunk in chunks:
+            data = chunk.encode('utf-8')
+            buffer.append(data)
+            buffered_size += len(data)
+            if buffered_size >= chunk_size:
+                yield b''.join(buffer)
+                buffer = []
+                buffered_size = 0
+        if buffer:
+            yield b''.join(buffer)
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
+
+def render_page(template_name, **context):
+    """
+    ページをレンダリングして返す（STREAM_TEMPLATES 有効時はストリーミング送出）
+    
+    ヘッダー・ナビゲーションなど先頭部分は一覧の生成を待たずに送出され、ページ全体の文字列を
+    メモリ上に作らない。データの取得はビュー関数内で済ませておくこと（送出開始後のエラーは
+    エラーページに切り替えられない）。
+    """
+    if not app.config['STREAM_TEMPLATES']:
+        return render_template(template_name, **context)
+    # セッションは本文の送出前に保存されるため、テンプレートで取り出すフラッシュメッセージは先に取り出しておく
+    get_flashed_messages()
+    return Response(_buffer_chunks(stream_template(template_name, **context), STREAM_CHUNK_SIZE),
+                    mimetype='text/html')
+
+def precompress_static_files():
+    """
+    static/ 内のCSS・JSなどの .gz / .br を作成する（元ファイルより古いものは作り直す）
+    
+    リクエスト時は圧縮済みのファイルをそのまま返すため、圧縮の負荷がかからない。作成した件数を返す。
+    """
+    upload_dir = os.path.abspath(app.config['UPLOAD_FOLDER'])
+    encodings = ['gzip', 'br'] if BROTLI_AVAILABLE else ['gzip']
+    written_count = 0
+    for root, dirnames, filenames in os.walk(app.static_folder):
+        dirnames[:] = [d for d in dirnames if os.path.abspath(os.path.join(root, d)) != upload_dir]
+        for filename in filenames:
+            if os.path.splitext(filename)[1] not in PRECOMPRESS_EXTENSIONS:
+                continue
+            source_path = os.path.join(root, filename)
+            if os.path.getsize(source_path) < COMPRESS_MIN_SIZE:
+                continue
+            
+            data = None
+            for encoding in encodings:
+                output_path = source_path + PRECOMPRESS_SUFFIXES[encoding]
+                if os.path.exists(output_path) and os.path.getmtime(output_path) >= os.path.getmtime(source_path):
+                    continue
+                if data is None:
+                    with open(source_path, 'rb') as f:
+                        data = f.read()
+                temp_path = f'{output_path}.{uuid.uuid4().hex}.tmp'
+                with open(temp_path, 'wb') as f:
+                    f.write(compress_bytes(data, encoding, level=11 if encoding == 'br' else 9))
+                os.replace(temp_path, output_path)
+                written_count += 1
+    return written_count
+
+def send_static_precompressed(filename):
+    """静的ファイルを返す（圧縮済みの .br / .gz があればそちらを返す）"""
+    encoding = choose_content_encoding()
+    source_path = safe_join(app.static_folder, filename)
+    if encoding and source_path and os.path.splitext(filename)[1] in PRECOMPRESS_EXTENSIONS:
+        compressed_path = source_path + PRECOMPRESS_SUFFIXES[encoding]
+        if os.path.isfile(compressed_path) and os.path.getmtime(compressed_path) >= os.path.getmtime(source_path):
+            response = send_from_directory(
+                app.static_folder,
+                filename + PRECOMPRESS_SUFFIXES[encoding],
+                mimetype=mimetypes.guess_type(filename)[0],
+                max_age=app.get_send_file_max_age(filename)
+            )
+            response.headers['Content-Encoding'] = encoding
+            response.vary.add('Accept-Encoding')
+            return response
+    
+    response = app.send_static_file(filename)
+    if os.path.splitext(filename)[1] in PRECOMPRESS_EXTENSIONS:
+        response.vary.add('Accept-Encoding')
+    return response
+
+app.view_functions['static'] = send_static_precompressed
+
+def _image_value(image, key):
+    """画像の値を取得（ProductGroupImage と get_product_group_previews() の辞書の両方に対応）"""
+    return image[key] if isinstance(image, dict) else getattr(image, key)
+
+def _thumbnail_widths(image):
+    thumbnail_widths = _image_value(image, 'thumbnail_widths')
+    return [int(width) for width in thumbnail_widths.split(',') if width] if thumbnail_widths else []
+
+def image_url(image, width=None):
+    """商品群画像のURL（width 以上の最小の縮小版。該当する縮小版がなければ原寸）"""
+    filename = _image_value(image, 'filename')
+    if width:
+        for thumbnail_width in _thumbnail_widths(image):
+            if thumbnail_width >= width:
+                return url_for('uploaded_thumbnail', filename=thumbnail_filename(filename, thumbnail_width))
+    return url_for('uploaded_file', filename=filename)
+
+def image_srcset(image, webp=False):
+    """縮小版の srcset 属性値（webp=True で WebP 版のみ）。縮小版がなければ空文字"""
+    widths = _thumbnail_widths(image)
+    if not widths or (webp and not _image_value(image, 'has_webp')):
+        return ''
+    filename = _image_value(image, 'filename')
+    candidates = [
+        f"{url_for('uploaded_thumbnail', filename=thumbnail_filename(filename, width, webp))} {width}w"
+        for width in widths
+    ]
+    original_width = _image_value(image, 'width')
+    if not webp and original_width:
+        candidates.append(f"{url_for('uploaded_file', filename=filename)} {original_width}w")
+    return ', '.join(candidates)
+
+def product_image_tag(image, sizes, width=480, **attributes):
+    """
+    商品群画像の <picture> 要素（WebP版・縮小版を srcset で示し、表示幅に合うものをブラウザが選ぶ）
+    
+    sizes は表示幅（例: '(min-width: 768px) 33vw, 100vw'）、width は srcset 非対応ブラウザ向けの src の幅。
+    その他のキーワード引数は <img> の属性になる（loading は既定で lazy）。
+    """
+    attributes.setdefault('loading', 'lazy')
+    img_attributes = ''.join(f' {name}="{escape(value)}"' for name, value in attributes.items() if value is not None)
+    src = escape(image_url(image, width))
+    srcset = image_srcset(image)
+    if not srcset:
+        return Markup(f'<img src="{src}"{img_attributes}>')
+    
+    webp_srcset = image_srcset(image, webp=True)
+    source = f'<source type="image/webp" srcset="{escape(webp_srcset)}" sizes="{escape(sizes)}">' if webp_srcset else ''
+    return Markup(
+        f'<picture class="product-picture">{source}'
+        f'<img src="{src}" srcset="{escape(srcset)}" sizes="{escape(sizes)}"{img_attributes}></picture>'
+    )
+
 # カスタムフィルター
 @app.template_filter('from_json')
 def from_json_filter(json_string):
@@ -1061,13 +2924,42 @@ def from_json_filter(json_string):
         return []
 
 # テンプレートコンテキストプロセッサー
+def url_template(endpoint, **placeholders):
+    """
+    JavaScript 側でIDを埋め込むURLのテンプレート（例: url_template('view_report', report_id='id') → '/report/{id}'）
+    """
+    sentinels = {name: 987654321 + index for index, name in enumerate(placeholders)}
+    url = url_for(endpoint, **sentinels)
+    for name, placeholder in placeholders.items():
+        url = url.replace(str(sentinels[name]), f'{{{placeholder}}}')
+    return url
+
+def client_urls():
+    """JavaScript が使うURLの一覧（base.html の app-urls に埋め込み、appUrl() で参照する）"""
+    return {
+        'myDashboard': url_for('my_dashboard'),
+        'mentorDashboard': url_for('mentor_dashboard'),
+        'mentorDashboardReports': url_for('mentor_dashboard_reports'),
+        'report': url_template('view_report', report_id='id'),
+        'productGroupDetails': url_template('product_group_details', product_group_id='id'),
+        'productGroupAnalysis': url_template('product_group_analysis', mentee_id='id'),
+        'notifications': url_for('get_notifications'),
+        'notificationRead': url_template('mark_notification_read', notification_id='id'),
+        'notificationsReadAll': url_for('mark_all_notifications_read'),
+        'notificationStream': url_for('notification_stream'),
+    }
+
 @app.context_processor
 def utility_processor():
     return dict(
         get_stage_display_name=get_stage_display_name,
         get_stage_progress_percentage=get_stage_progress_percentage,
         get_progress_status_info=get_progress_status_info,
-        render_markdown=render_markdown
+        render_safe_markdown=render_safe_markdown,
+        asset_url=asset_url,
+        client_urls=client_urls,
+        image_url=image_url,
+        product_image_tag=product_image_tag
     )
 
 # ルート
@@ -1135,6 +3027,53 @@ def debug_mentees():
         }
     })
 
+@app.route('/admin/cache-stats')
+@login_required
+def admin_cache_stats():
+    """キャッシュのヒット・ミス数などを表示（管理者用）"""
+    if current_user.role != 'admin':
+        return jsonify({'success': False, 'message': '管理者権限が必要です。'}), 403
+    
+    with _markdown_render_stats_lock:
+        markdown_stats = dict(markdown_cache.stats(), **markdown_render_stats)
+    return jsonify({
+        'fragment_cache': fragment_cache.stats(),
+        'markdown_cache': markdown_stats
+    })
+
+@app.route('/admin/jobs')
+@login_required
+def admin_jobs():
+    """バックグラウンドジョブの状況を表示（管理者用）"""
+    if current_user.role != 'admin':
+        flash('管理者権限が必要です。', 'danger')
+        return redirect(url_for('my_dashboard'))
+    
+    status_counts = dict(
+        db.session.query(BackgroundJob.status, db.func.count(BackgroundJob.id)).group_by(BackgroundJob.status).all()
+    )
+    jobs = BackgroundJob.query.order_by(BackgroundJob.id.desc()).limit(100).all()
+    return render_template('admin_jobs.html', jobs=jobs, status_counts=status_counts)
+
+@app.route('/admin/jobs/<int:job_id>/retry', methods=['POST'])
+@login_required
+def admin_retry_job(job_id):
+    """失敗したジョブを再実行キューに戻す（管理者用）"""
+    if current_user.role != 'admin':
+        return jsonify({'success': False, 'message': '管理者権限が必要です。'}), 403
+    
+    job = BackgroundJob.query.get_or_404(job_id)
+    if job.status != 'failed':
+        return jsonify({'success': False, 'message': '失敗したジョブのみ再実行できます。'}), 400
+    
+    job.status = 'pending'
+    job.attempts = 0
+    job.run_after = datetime.utcnow()
+    job.finished_at = None
+    db.session.commit()
+    job_worker.wake()
+    return jsonify({'success': True, 'message': 'ジョブを再実行キューに戻しました。'})
+
 @app.route('/register', methods=['GET', 'POST'])
 def register():
     if current_user.is_authenticated:
@@ -1213,15 +3152,31 @@ def mentee_dashboard(mentee_id):
             flash('アクセス権限がありません。', 'danger')
             return redirect(url_for('my_dashboard'))
     
-    reports = WeeklyReport.query.filter_by(mentee_id=mentee_id).order_by(WeeklyReport.report_date.desc()).all()
+    reports = WeeklyReport.query.options(*report_list_options()).filter_by(mentee_id=mentee_id).order_by(WeeklyReport.report_date.desc()).all()
     
-    # 商品群別進捗データを取得
-    product_group_progress = get_product_group_progress(mentee_id)
+    # 商品群別進捗データを取得（キャッシュ経由）
+    product_group_progress = get_cached_product_group_progress([mentee])[mentee.id]
+    progress_cards_html = render_cached_progress_cards('mentee_progress_cards.html', [mentee], product_group_progress)
     
     return render_template('mentee_dashboard.html', 
                          mentee=mentee, 
                          reports=reports, 
-                         product_group_progress=product_group_progress)
+                         product_group_progress=product_group_progress,
+                         progress_cards_html=progress_cards_html)
+
+def report_list_options():
+    """報告一覧用のロードオプション（メンティを同時取得し、コメント有無をEXISTSで取得）"""
+    return (db.joinedload(WeeklyReport.mentee), db.undefer(WeeklyReport.has_comment))
+
+def mentor_report_query(mentee_filter=''):
+    """メンターダッシュボードの報告一覧クエリ（メンティ名で絞り込み）"""
+    query = WeeklyReport.query.join(Mentee).options(
+        db.contains_eager(WeeklyReport.mentee),
+        db.undefer(WeeklyReport.has_comment)
+    )
+    if mentee_filter:
+        query = query.filter(Mentee.name.contains(mentee_filter))
+    return query
 
 @app.route('/mentor/dashboard')
 @login_required
@@ -1234,40 +3189,68 @@ def mentor_dashboard():
     # フィルターパラメータを取得
     mentee_filter = request.args.get('mentee', '')
     
-    # 全メンティの報告を取得（フィルター適用）
-    query = WeeklyReport.query.join(Mentee)
-    
-    if mentee_filter:
-        query = query.filter(Mentee.name.contains(mentee_filter))
-    
-    reports = query.order_by(WeeklyReport.report_date.desc()).all()
-    
     # メンティ一覧を取得（フィルター用）
     mentees = Mentee.query.order_by(Mentee.name).all()
     
-    # 商品群別進捗データを取得
+    # 全メンティの報告を取得（フィルター適用、最初の1ページのみ）
+    query = mentor_report_query(mentee_filter)
+    reports, next_cursor = paginate_reports(query)
+    # 報告件数は全件を数えるため、メンティの data_version 単位でキャッシュする（報告の追加・削除で無効化）
+    report_total = fragment_cache.get_or_create(
+        ('report_total', mentee_filter, tuple((mentee.id, mentee.data_version) for mentee in mentees)),
+        query.count
+    )
+    
+    # 商品群別進捗データを取得（キャッシュ経由）
     product_group_progress = []
+    progress_mentees = []
     if mentee_filter:
         # 特定のメンティの進捗データ
         selected_mentee = Mentee.query.filter(Mentee.name.contains(mentee_filter)).first()
         if selected_mentee:
-            product_group_progress = get_product_group_progress(selected_mentee.id)
+            progress_mentees = [selected_mentee]
+            product_group_progress = get_cached_product_group_progress(progress_mentees)[selected_mentee.id]
     else:
-        # 全メンティの進捗データ
+        # 全メンティの進捗データ（未キャッシュ分を一括取得）
+        progress_mentees = mentees
+        progress_by_mentee = get_cached_product_group_progress(mentees, with_mentee_name=True)
         for mentee in mentees:
-            mentee_progress = get_product_group_progress(mentee.id)
-            for pg in mentee_progress:
-                pg['mentee_name'] = mentee.name
-            product_group_progress.extend(mentee_progress)
+            product_group_progress.extend(progress_by_mentee[mentee.id])
+    progress_cards_html = render_cached_progress_cards('mentor_progress_cards.html', progress_mentees, product_group_progress,
+                                                       with_mentee_name=not mentee_filter)
     
     # メンティデータを辞書形式に変換（JavaScript用）
     mentees_data = [{'id': mentee.id, 'name': mentee.name} for mentee in mentees]
     
-    return render_template('mentor_dashboard.html', 
+    return render_page('mentor_dashboard.html', 
                          reports=reports, 
+                         report_total=report_total,
+                         next_cursor=next_cursor,
                          mentees=mentees_data, 
                          selected_mentee=mentee_filter,
-                         product_group_progress=product_group_progress)
+                         product_group_progress=product_group_progress,
+                         progress_cards_html=progress_cards_html)
+
+@app.route('/mentor/dashboard/reports')
+@login_required
+def mentor_dashboard_reports():
+    """メンターダッシュボードの報告一覧の続きを取得（無限スクロール用）"""
+    if current_user.role not in ['mentor', 'admin']:
+        return jsonify({'success': False, 'message': 'メンター権限が必要です。'}), 403
+    
+    cursor = request.args.get('cursor', '')
+    if cursor and decode_report_cursor(cursor) is None:
+        return jsonify({'success': False, 'message': 'カーソルが不正です。'}), 400
+    
+    query = mentor_report_query(request.args.get('mentee', ''))
+    reports, next_cursor = paginate_reports(query, cursor)
+    
+    return jsonify({
+        'success': True,
+        'html': render_template('mentor_report_cards.html', reports=reports),
+        'count': len(reports),
+        'next_cursor': next_cursor
+    })
 
 @app.route('/admin/dashboard')
 @login_required
@@ -1334,6 +3317,7 @@ def admin_delete_user(user_id):
         
         # 通知も削除
         Notification.query.filter_by(user_id=user_id).delete()
+        NotificationArchive.query.filter_by(user_id=user_id).delete()
         
         # ユーザーを削除
         db.session.delete(user)
@@ -1452,7 +3436,8 @@ def new_report(mentee_id):
             if not selected_product_group:
                 flash('選択された商品群が見つかりません。商品群を再選択してください。', 'danger')
                 product_group_stages = get_product_group_latest_stages(mentee_id)
-                return render_template('new_report.html', form=form, mentee=mentee, todo_list=todo_list, product_groups=product_groups, product_group_stages=product_group_stages)
+                image_previews = get_product_group_previews([pg.id for pg in product_groups])
+                return render_template('new_report.html', form=form, mentee=mentee, todo_list=todo_list, product_groups=product_groups, image_previews=image_previews, product_group_stages=product_group_stages)
             
             product_group_name = selected_product_group.name
             
@@ -1460,6 +3445,7 @@ def new_report(mentee_id):
                 mentee_id=mentee_id,
                 planning_stage=form.planning_stage.data,
                 product_group=product_group_name,
+                product_group_id=selected_product_group.id,
                 progress_items=form.progress_items.data,
                 actions_taken="",  # 統合により空文字列に設定
                 insights_concerns=form.insights_concerns.data,
@@ -1469,18 +3455,18 @@ def new_report(mentee_id):
             )
             
             db.session.add(report)
-            db.session.commit()
+            refresh_product_group_status(mentee_id, [selected_product_group.id])
+            bump_mentee_data_version(mentee_id)
             
-            # メンターに通知を送信
-            mentors = User.query.filter(User.role.in_(['mentor', 'admin'])).all()
-            for mentor in mentors:
-                create_notification(
-                    user_id=mentor.id,
-                    title='新しい報告が登録されました',
-                    message=f'{mentee.name}さんが新しい週次報告を登録しました。',
-                    notification_type='report_created',
-                    related_id=report.id
-                )
+            # メンターへの通知はコミット後にバックグラウンドで作成（報告と同じトランザクションのため重複しない。
+            # 報告IDは削除後に再利用されるため idempotency_key には使わない）
+            enqueue_job('notify_mentors', {
+                'title': '新しい報告が登録されました',
+                'message': f'{mentee.name}さんが新しい週次報告を登録しました。',
+                'notification_type': 'report_created',
+                'related_id': report.id
+            })
+            db.session.commit()
             
             # Ajaxリクエストかどうかをチェック
             if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
@@ -1520,11 +3506,12 @@ def new_report(mentee_id):
     
     # 商品群データを取得（画像表示用）
     product_groups = ProductGroup.query.filter_by(mentee_id=mentee_id).all()
+    image_previews = get_product_group_previews([pg.id for pg in product_groups])
     
     # 商品群ごとの最新の進捗ステージを取得
     product_group_stages = get_product_group_latest_stages(mentee_id)
     
-    return render_template('new_report.html', form=form, mentee=mentee, todo_list=todo_list, product_groups=product_groups, product_group_stages=product_group_stages, show_all=show_all)
+    return render_template('new_report.html', form=form, mentee=mentee, todo_list=todo_list, product_groups=product_groups, image_previews=image_previews, product_group_stages=product_group_stages, show_all=show_all)
 
 @app.route('/report/<int:report_id>')
 @login_required
@@ -1544,17 +3531,14 @@ def view_report(report_id):
         week_start=previous_week_start
     ).first()
     
-    # 商品群情報を取得（画像表示用）
-    product_group = ProductGroup.query.filter_by(
-        name=report.product_group,
-        mentee_id=report.mentee_id
-    ).first()
+    # 商品群の画像（カバー画像と枚数のみ）
+    image_preview = get_product_group_previews([report.product_group_id]).get(report.product_group_id)
     
     # 追加の問いかけ回答をパース
     import ast
     additional_responses = parse_json_with_fallback(report.additional_responses)
     
-    return render_template('view_report.html', report=report, previous_report=previous_report, additional_responses=additional_responses, product_group=product_group)
+    return render_template('view_report.html', report=report, previous_report=previous_report, additional_responses=additional_responses, image_preview=image_preview)
 
 @app.route('/report/<int:report_id>/comment', methods=['GET', 'POST'])
 @login_required
@@ -1587,18 +3571,17 @@ def add_mentor_comment(report_id):
             )
             db.session.add(comment)
         
-        db.session.commit()
+        # メンティへの通知はコミット後にバックグラウンドで作成
+        if report.mentee.user_id:
+            enqueue_job('notify_users', {
+                'user_ids': [report.mentee.user_id],
+                'title': 'メンターからコメントが追加されました',
+                'message': f'{current_user.username}さんからコメントが追加されました。',
+                'notification_type': 'comment_added',
+                'related_id': report_id
+            })
         
-        # メンティに通知を送信
-        mentee_user = User.query.get(report.mentee.user_id)
-        if mentee_user:
-            create_notification(
-                user_id=mentee_user.id,
-                title='メンターからコメントが追加されました',
-                message=f'{current_user.username}さんからコメントが追加されました。',
-                notification_type='comment_added',
-                related_id=report_id
-            )
+        db.session.commit()
         
         flash('コメントが保存されました！', 'success')
         return redirect(url_for('view_report', report_id=report_id))
@@ -1629,6 +3612,7 @@ def mentee_profile():
     
     if form.validate_on_submit():
         mentee.name = form.name.data
+        bump_mentee_data_version(mentee.id)
         db.session.commit()
         flash('プロファイルが更新されました！', 'success')
         return redirect(url_for('mentee_dashboard', mentee_id=mentee.id))
@@ -1650,9 +3634,13 @@ def delete_report(report_id):
                 }), 403
         
         mentee_id = report.mentee_id
+        product_group_id = report.product_group_id
         
         # 報告を削除
         db.session.delete(report)
+        if product_group_id:
+            refresh_product_group_status(mentee_id, [product_group_id])
+        bump_mentee_data_version(mentee_id)
         db.session.commit()
         
         return jsonify({
@@ -1729,45 +3717,142 @@ def create_sample_mentee():
 @app.route('/notifications')
 @login_required
 def get_notifications():
-    """通知一覧を取得"""
-    notifications = Notification.query.filter_by(user_id=current_user.id).order_by(Notification.created_at.desc()).limit(10).all()
+    """
+    通知一覧を取得
     
-    notification_data = []
-    for notification in notifications:
-        notification_data.append({
-            'id': notification.id,
-            'title': notification.title,
-            'message': notification.message,
-            'type': notification.type,
-            'is_read': notification.is_read,
-            'created_at': notification.created_at.strftime('%Y年%m月%d日 %H:%M'),
-            'related_id': notification.related_id
+    通知バージョンから ETag を作り、If-None-Match が一致すれば一覧を検索せず304を返す。
+    since=<通知ID> を指定した場合はそれより新しい通知と、集約中のまとめ通知のみ返す。
+    """
+    etag = f'{current_user.id}-{current_user.notification_version}'
+    # 圧縮時は弱いETagになるため弱い比較で判定
+    if request.if_none_match.contains_weak(etag):
+        response = app.response_class(status=304)
+    else:
+        query = Notification.query.filter_by(user_id=current_user.id)
+        since = request.args.get('since', type=int)
+        if since is not None:
+            # 集約中のまとめ通知は既存IDのまま更新されるため、期間内のものは併せて返す
+            query = query.filter(db.or_(
+                Notification.id > since,
+                db.and_(
+                    Notification.event_count > 1,
+                    Notification.created_at >= datetime.utcnow() - timedelta(minutes=NOTIFICATION_DIGEST_WINDOW_MINUTES)
+                )
+            ))
+        notifications = query.order_by(Notification.created_at.desc()).limit(10).all()
+        
+        response = jsonify({
+            'notifications': [serialize_notification(notification) for notification in notifications],
+            'unread_count': current_user.unread_notification_count
         })
     
-    return jsonify({
-        'notifications': notification_data,
-        'unread_count': Notification.query.filter_by(user_id=current_user.id, is_read=False).count()
-    })
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+@app.route('/notifications/archive')
+@login_required
+def notification_archive():
+    """アーカイブ済みの過去の通知を表示（before=<通知ID> で古い方へページ送り）"""
+    query = NotificationArchive.query.filter_by(user_id=current_user.id)
+    before = request.args.get('before', type=int)
+    if before is not None:
+        query = query.filter(NotificationArchive.id < before)
+    notifications = query.order_by(NotificationArchive.id.desc()).limit(NOTIFICATION_ARCHIVE_PAGE_SIZE + 1).all()
+    
+    has_more = len(notifications) > NOTIFICATION_ARCHIVE_PAGE_SIZE
+    notifications = notifications[:NOTIFICATION_ARCHIVE_PAGE_SIZE]
+    return render_template('notification_archive.html',
+                         notifications=notifications,
+                         next_before=notifications[-1].id if has_more else None,
+                         retention_days=NOTIFICATION_RETENTION_DAYS)
 
 @app.route('/notifications/<int:notification_id>/read', methods=['POST'])
 @login_required
 def mark_notification_read(notification_id):
     """通知を既読にする"""
-    notification = Notification.query.filter_by(id=notification_id, user_id=current_user.id).first()
-    if notification:
-        notification.is_read = True
+    # 未読→既読に変わった場合のみ未読数を減らす（同時に既読化されても二重に減らさない）
+    result = db.session.execute(
+        db.update(Notification).where(
+            Notification.id == notification_id,
+            Notification.user_id == current_user.id,
+            Notification.is_read == False  # noqa: E712
+        ).values(is_read=True).execution_options(synchronize_session=False)
+    )
+    if result.rowcount:
+        adjust_unread_notification_counts([current_user.id], -1)
+        queue_notification_event(current_user.id)
         db.session.commit()
         return jsonify({'success': True})
+    if Notification.query.filter_by(id=notification_id, user_id=current_user.id).first():
+        return jsonify({'success': True})
     return jsonify({'success': False}), 404
 
 @app.route('/notifications/read-all', methods=['POST'])
 @login_required
 def mark_all_notifications_read():
     """全ての通知を既読にする"""
-    Notification.query.filter_by(user_id=current_user.id, is_read=False).update({'is_read': True})
+    marked_count = Notification.query.filter_by(user_id=current_user.id, is_read=False).update({'is_read': True})
+    if marked_count:
+        adjust_unread_notification_counts([current_user.id], -marked_count)
+        queue_notification_event(current_user.id)
     db.session.commit()
     return jsonify({'success': True})
 
+@app.route('/notifications/stream')
+@login_required
+def notification_stream():
+    """
+    新着通知と未読件数をServer-Sent Eventsで配信
+
+    イベントが無い間はSQLを発行せず、ハートビートのコメント行のみ送る。
+    NOTIFICATION_STREAM_MAX_AGE 秒で接続を閉じ、ブラウザの自動再接続に任せる。
+    接続中はワーカースレッドを1つ占有するため、同時接続は NOTIFICATION_STREAM_MAX_CONNECTIONS までとし、
+    超えた場合は503を返す（クライアントはポーリングに切り替える）。
+    """
+    user_id = current_user.id
+    subscriber = notification_broker.subscribe(user_id, max_streams=NOTIFICATION_STREAM_MAX_CONNECTIONS)
+    if subscriber is None:
+        response = jsonify({'success': False, 'message': '通知の同時接続数が上限に達しています。'})
+        response.status_code = 503
+        response.headers['Retry-After'] = str(NOTIFICATION_STREAM_MAX_AGE)
+        return response
+    # 待機中に接続やSQLiteの読み取りロックを保持しない
+    db.session.remove()
+    
+    def generate():
+        deadline = time.monotonic() + NOTIFICATION_STREAM_MAX_AGE
+        try:
+            yield "retry: 3000\n\n"
+            while time.monotonic() < deadline:
+                try:
+                    events = [subscriber.get(timeout=NOTIFICATION_STREAM_HEARTBEAT)]
+                except queue.Empty:
+                    yield ": heartbeat\n\n"
+                    continue
+                while True:
+                    try:
+                        events.append(subscriber.get_nowait())
+                    except queue.Empty:
+                        break
+                
+                unread_count = get_unread_notification_count(user_id)
+                db.session.remove()
+                
+                # 同じまとめ通知の更新が続いた場合は最新の内容のみ送る
+                notifications = list({
+                    event['notification']['id']: event['notification'] for event in events if event['notification']
+                }.values())
+                payload = json.dumps({'notifications': notifications, 'unread_count': unread_count}, ensure_ascii=False)
+                yield f"event: notifications\ndata: {payload}\n\n"
+        finally:
+            notification_broker.unsubscribe(user_id, subscriber)
+    
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
 @app.route('/mentee/<int:mentee_id>/todo', methods=['GET', 'POST'])
 @login_required
 def manage_todo_list(mentee_id):
@@ -1841,18 +3926,24 @@ def manage_product_groups(mentee_id):
         product_group = ProductGroup(
             name=form.name.data,
             description=form.description.data,
-            images=json.dumps(saved_images) if saved_images else None,
             mentee_id=mentee_id
         )
         db.session.add(product_group)
+        db.session.flush()
+        add_product_group_images(product_group.id, saved_images)
+        refresh_product_group_status(mentee_id, [product_group.id])
+        bump_mentee_data_version(mentee_id)
         db.session.commit()
         flash('代表商品群が登録されました！', 'success')
         return redirect(url_for('manage_product_groups', mentee_id=mentee_id))
     
     # 既存の代表商品群を取得
     product_groups = ProductGroup.query.filter_by(mentee_id=mentee_id).order_by(ProductGroup.created_at.desc()).all()
+    # 一覧には先頭3枚のみ表示
+    image_previews = get_product_group_previews([pg.id for pg in product_groups], limit=3)
     
-    return render_template('manage_product_groups.html', mentee=mentee, form=form, product_groups=product_groups)
+    return render_template('manage_product_groups.html', mentee=mentee, form=form, product_groups=product_groups,
+                           image_previews=image_previews)
 
 @app.route('/product-group/<int:product_group_id>/edit', methods=['GET', 'POST'])
 @login_required
@@ -1871,55 +3962,24 @@ def edit_product_group(product_group_id):
     form = ProductGroupEditForm(obj=product_group)
     
     if form.validate_on_submit():
-        # 既存の画像を取得
-        existing_images = []
-        if product_group.images:
-            try:
-                existing_images = json.loads(product_group.images)
-            except (json.JSONDecodeError, TypeError):
-                existing_images = []
-        
-        # 新しい画像ファイルを保存
-        new_images = []
+        # 新しい画像ファイルを保存し、既存の画像の後ろに追加
         if form.images.data:
             files = request.files.getlist('images')
-            new_images = save_uploaded_files(files)
-        
-        # 既存の画像と新しい画像を結合
-        all_images = existing_images + new_images
+            add_product_group_images(product_group.id, save_uploaded_files(files))
         
-        # 代表商品群名の変更前後を保持
-        old_name = product_group.name
-        new_name = form.name.data
-
-        # 代表商品群を更新
-        product_group.name = new_name
+        # 代表商品群を更新（報告は product_group_name で現在の名称を表示するため、報告側の更新は不要）
+        product_group.name = form.name.data
         product_group.description = form.description.data
-        product_group.images = json.dumps(all_images) if all_images else None
-
-        # 紐づく週次報告の product_group 名称を一括更新（表示から消えないよう同期）
-        if old_name != new_name:
-            WeeklyReport.query.filter_by(
-                mentee_id=product_group.mentee_id,
-                product_group=old_name
-            ).update({WeeklyReport.product_group: new_name})
 
+        bump_mentee_data_version(product_group.mentee_id)
         db.session.commit()
         flash('代表商品群が更新されました！', 'success')
         return redirect(url_for('manage_product_groups', mentee_id=product_group.mentee_id))
     
-    # 既存の画像を取得
-    existing_images = []
-    if product_group.images:
-        try:
-            existing_images = json.loads(product_group.images)
-        except (json.JSONDecodeError, TypeError):
-            existing_images = []
-    
     return render_template('edit_product_group.html', 
                          form=form, 
                          product_group=product_group, 
-                         existing_images=existing_images)
+                         existing_images=product_group.images)
 
 @app.route('/product-group/<int:product_group_id>/delete', methods=['POST'])
 @login_required
@@ -1935,25 +3995,19 @@ def delete_product_group(product_group_id):
     
     try:
         # 関連する週次報告を確認
-        related_reports = WeeklyReport.query.filter_by(
-            mentee_id=product_group.mentee_id,
-            product_group=product_group.name
-        ).all()
+        related_report_count = WeeklyReport.query.filter_by(product_group_id=product_group.id).count()
         
-        if related_reports:
+        if related_report_count:
             # 関連する報告がある場合は警告メッセージを返す
             return jsonify({
                 'success': False, 
-                'message': f'この商品群に関連する週次報告が{len(related_reports)}件あります。先に報告を削除するか、商品群名を変更してください。'
+                'message': f'この商品群に関連する週次報告が{related_report_count}件あります。先に報告を削除してください。'
             }), 400
         
-        # 関連する画像ファイルを削除
-        if product_group.images:
-            try:
-                image_filenames = json.loads(product_group.images)
-                delete_uploaded_files(image_filenames)
-            except (json.JSONDecodeError, TypeError):
-                pass
+        # 関連する画像ファイルを削除（画像の行は商品群と一緒に削除される）
+        image_filenames = [image.filename for image in product_group.images]
+        if image_filenames:
+            enqueue_job('delete_uploaded_files', {'filenames': image_filenames})
         
         mentee_id = product_group.mentee_id
         product_group_name = product_group.name
@@ -1963,6 +4017,7 @@ def delete_product_group(product_group_id):
         
         # 代表商品群を削除
         db.session.delete(product_group)
+        bump_mentee_data_version(mentee_id)
         db.session.flush()  # 変更をフラッシュして即座に反映
         
         # 削除の確認
@@ -1992,6 +4047,11 @@ def uploaded_file(filename):
     """アップロードされた画像ファイルを提供"""
     return send_from_directory(app.config['UPLOAD_FOLDER'], filename)
 
+@app.route('/uploads/product_groups/thumbs/<filename>')
+def uploaded_thumbnail(filename):
+    """アップロード画像の縮小版を提供"""
+    return send_from_directory(app.config['THUMBNAIL_FOLDER'], filename, max_age=THUMBNAIL_MAX_AGE)
+
 @app.route('/product-group/<int:product_group_id>/remove-image', methods=['POST'])
 @login_required
 def remove_product_group_image(product_group_id):
@@ -2011,23 +4071,16 @@ def remove_product_group_image(product_group_id):
         if not filename_to_remove:
             return jsonify({'success': False, 'message': 'ファイル名が指定されていません'}), 400
         
-        # 既存の画像リストを取得
-        existing_images = []
-        if product_group.images:
-            try:
-                existing_images = json.loads(product_group.images)
-            except (json.JSONDecodeError, TypeError):
-                existing_images = []
+        # 指定された画像の行のみ削除
+        removed_count = ProductGroupImage.query.filter_by(
+            product_group_id=product_group.id, filename=filename_to_remove
+        ).delete(synchronize_session=False)
         
-        # 指定されたファイルをリストから削除
-        if filename_to_remove in existing_images:
-            existing_images.remove(filename_to_remove)
+        if removed_count:
+            # ファイルを物理的に削除（コミット後にバックグラウンドで実行）
+            enqueue_job('delete_uploaded_files', {'filenames': [filename_to_remove]})
             
-            # ファイルを物理的に削除
-            delete_uploaded_files([filename_to_remove])
-            
-            # データベースを更新
-            product_group.images = json.dumps(existing_images) if existing_images else None
+            bump_mentee_data_version(product_group.mentee_id)
             db.session.commit()
             
             return jsonify({'success': True, 'message': '画像が削除されました'})
@@ -2060,17 +4113,21 @@ def product_group_analysis(mentee_id):
     product_group_progress = get_product_group_progress(mentee_id, weeks)
     
     # 全期間の進捗データも取得（比較用）
-    all_time_progress = get_product_group_progress(mentee_id, 52)
+    all_time_progress = get_product_group_progress(mentee_id, 52, with_cover_images=False)
+    
+    # ステージ別の滞留期間（表示中の商品群をまとめて算出）
+    stage_timelines = get_stage_timelines(pg['id'] for pg in product_group_progress)
     
     # メンター・管理者の場合は全メンティリストを取得
     all_mentees = []
     if current_user.role in ['mentor', 'admin']:
         all_mentees = Mentee.query.order_by(Mentee.name).all()
     
-    return render_template('product_group_analysis.html', 
+    return render_page('product_group_analysis.html', 
                          mentee=mentee, 
                          product_group_progress=product_group_progress,
                          all_time_progress=all_time_progress,
+                         stage_timelines=stage_timelines,
                          selected_weeks=weeks,
                          all_mentees=all_mentees)
 
@@ -2090,20 +4147,23 @@ def product_group_details(product_group_id):
         return redirect(url_for('my_dashboard'))
     
     # この商品群の報告を取得
-    reports = WeeklyReport.query.filter_by(
-        mentee_id=mentee.id,
-        product_group=product_group.name
+    reports = WeeklyReport.query.options(*report_list_options()).filter_by(
+        product_group_id=product_group.id
     ).order_by(WeeklyReport.report_date.desc()).all()
     
     # 商品群の進捗データを取得
-    product_group_progress = get_product_group_progress(mentee.id, 52)
-    current_progress = next((pg for pg in product_group_progress if pg['name'] == product_group.name), None)
+    product_group_progress = get_product_group_progress(mentee.id, 52, with_cover_images=False)
+    current_progress = next((pg for pg in product_group_progress if pg['id'] == product_group.id), None)
+    
+    # ステージ別の滞留期間
+    stage_timeline = get_stage_timelines([product_group.id]).get(product_group.id, [])
     
     return render_template('product_group_details.html',
                          product_group=product_group,
                          mentee=mentee,
                          reports=reports,
-                         current_progress=current_progress)
+                         current_progress=current_progress,
+                         stage_timeline=stage_timeline)
 
 # 日報関連のルート
 @app.route('/daily-report/generate/<int:weekly_report_id>')
@@ -2170,6 +4230,7 @@ def save_daily_report():
                 generated_content=form.content.data,
                 status='draft'
             )
+            apply_daily_report_html(daily_report)
             
             db.session.add(daily_report)
             db.session.commit()
@@ -2228,9 +4289,380 @@ def list_daily_reports(mentee_id):
         flash(f'日報一覧の表示中にエラーが発生しました: {str(e)}', 'danger')
         return redirect(url_for('my_dashboard'))
 
+# 既存テーブルに後から追加した列: (テーブル名, 列名, 列定義)
+ADDED_COLUMNS = [
+    ('weekly_report', 'product_group_id', 'INTEGER REFERENCES product_group (id)'),
+    ('mentee', 'data_version', 'INTEGER NOT NULL DEFAULT 0'),
+    ('user', 'unread_notification_count', 'INTEGER NOT NULL DEFAULT 0'),
+    ('user', 'notification_version', 'INTEGER NOT NULL DEFAULT 0'),
+    ('notification', 'event_count', 'INTEGER NOT NULL DEFAULT 1'),
+    ('notification', 'related_ids', 'TEXT'),
+    ('notification_archive', 'event_count', 'INTEGER NOT NULL DEFAULT 1'),
+    ('notification_archive', 'related_ids', 'TEXT'),
+    ('daily_report', 'summary_html', 'TEXT'),
+    ('daily_report', 'generated_content_html', 'TEXT'),
+    ('daily_report', 'html_version', 'INTEGER'),
+    ('product_group_image', 'thumbnail_widths', 'TEXT'),
+    ('product_group_image', 'has_webp', 'BOOLEAN NOT NULL DEFAULT FALSE'),
+]
+
+# モデルから外したインデックス: (テーブル名, インデックス名)
+DROPPED_INDEXES = [
+    # 先頭列が同じ ix_weekly_report_group_report_date で足りる
+    ('weekly_report', 'ix_weekly_report_product_group_id'),
+]
+
+def migrate_product_group_images():
+    """
+    旧形式の product_group.images 列（ファイル名のJSON配列）を ProductGroupImage の行に移行
+    
+    移行済みの商品群は images 列を NULL にするため、何度実行しても二重に登録されない。
+    ファイルが残っていればバイト数・寸法・ハッシュも記録する。移行した画像数を返す。
+    """
+    columns = {column['name'] for column in db.inspect(db.engine).get_columns('product_group')}
+    if 'images' not in columns:
+        return 0
+    
+    rows = db.session.execute(db.text('SELECT id, images FROM product_group WHERE images IS NOT NULL')).all()
+    migrated_count = 0
+    for product_group_id, images_json in rows:
+        try:
+            filenames = json.loads(images_json)
+        except (json.JSONDecodeError, TypeError):
+            filenames = []
+        if not isinstance(filenames, list):
+            filenames = []
+        
+        for position, filename in enumerate(filenames):
+            if not filename or not isinstance(filename, str):
+                continue
+            file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+            metadata = describe_image_file(file_path) if os.path.isfile(file_path) else {}
+            db.session.add(ProductGroupImage(
+                product_group_id=product_group_id, position=position, filename=filename, **metadata
+            ))
+            migrated_count += 1
+        db.session.execute(db.text('UPDATE product_group SET images = NULL WHERE id = :id'), {'id': product_group_id})
+    
+    db.session.commit()
+    return migrated_count
+
+def migrate_database():
+    """
+    既存データベースのスキーマを現在のモデルに合わせる（何度実行しても安全）
+    
+    db.create_all() では既存テーブルに列が追加されないため、ここで補う。
+    実行した変更内容のリストを返す。
+    """
+    applied = []
+    inspector = db.inspect(db.engine)
+    quote = db.engine.dialect.identifier_preparer.quote  # user などの予約語のテーブル名をクォートする
+    
+    # モデルに後から追加した列
+    for table_name, column_name, column_ddl in ADDED_COLUMNS:
+        existing_columns = {column['name'] for column in inspector.get_columns(table_name)}
+        if column_name not in existing_columns:
+            with db.engine.begin() as connection:
+                connection.execute(db.text(f'ALTER TABLE {quote(table_name)} ADD COLUMN {quote(column_name)} {column_ddl}'))
+            applied.append(f'{table_name}.{column_name}')
+    
+    # モデルで宣言したインデックスのうち未作成のものを作成（テーブルの再作成は不要）
+    with db.engine.begin() as connection:
+        for table in db.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing_indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+            for index in sorted(table.indexes, key=lambda index: index.name):
+                if index.name not in existing_indexes:
+                    index.create(bind=connection)
+                    applied.append(f'index {index.name}')
+    
+    # モデルから外したインデックスを削除
+    for table_name, index_name in DROPPED_INDEXES:
+        if not inspector.has_table(table_name):
+            continue
+        if index_name in {index['name'] for index in inspector.get_indexes(table_name)}:
+            with db.engine.begin() as connection:
+                connection.execute(db.text(f'DROP INDEX {quote(index_name)}'))
+            applied.append(f'drop index {index_name}')
+    
+    # JSON形式で保存していた商品群の画像を ProductGroupImage に移行
+    migrated_image_count = migrate_product_group_images()
+    if migrated_image_count:
+        applied.append(f'product_group.images の移行 ({migrated_image_count}件)')
+    
+    # 名称で紐づいている報告に product_group_id を設定（同名の商品群は最小IDを採用）
+    matching_group_id = db.select(db.func.min(ProductGroup.id)).where(
+        ProductGroup.mentee_id == WeeklyReport.mentee_id,
+        ProductGroup.name == WeeklyReport.product_group
+    ).scalar_subquery()
+    result = db.session.execute(
+        db.update(WeeklyReport).where(
+            WeeklyReport.product_group_id.is_(None),
+            matching_group_id.isnot(None)
+        ).values(product_group_id=matching_group_id).execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    if result.rowcount:
+        rebuild_product_group_status()
+        applied.append(f'weekly_report.product_group_id の補完 ({result.rowcount}件)')
+    
+    # 未読通知数の列を追加した直後は既存の通知から計算する
+    if 'user.unread_notification_count' in applied:
+        repaired_count = repair_unread_notification_counts()
+        applied.append(f'user.unread_notification_count の補完 ({repaired_count}件)')
+    
+    return applied
+
+def hot_queries(mentee_id=1, user_id=1):
+    """インデックスが効いているべき主要クエリ（実行計画の確認用）"""
+    now = datetime.now()
+    return [
+        ('商品群別進捗（期間内の報告）', db.select(WeeklyReport).where(
+            WeeklyReport.mentee_id == mentee_id,
+            WeeklyReport.report_date >= now - timedelta(weeks=16)
+        ).order_by(WeeklyReport.report_date.desc())),
+        ('商品群詳細の報告一覧', db.select(WeeklyReport).where(
+            WeeklyReport.product_group_id == 1
+        ).order_by(WeeklyReport.report_date.desc())),
+        ('前週の報告', db.select(WeeklyReport).where(
+            WeeklyReport.mentee_id == mentee_id,
+            WeeklyReport.week_start == now.replace(hour=0, minute=0, second=0, microsecond=0)
+        ).limit(1)),
+        ('メンターダッシュボードの報告一覧', db.select(WeeklyReport).order_by(
+            WeeklyReport.report_date.desc(), WeeklyReport.id.desc()
+        ).limit(REPORT_PAGE_SIZE + 1)),
+        ('通知一覧', db.select(Notification).where(
+            Notification.user_id == user_id
+        ).order_by(Notification.created_at.desc()).limit(10)),
+        ('未読通知数', db.select(User.unread_notification_count).where(User.id == user_id)),
+        ('メンティの商品群', db.select(ProductGroup).where(ProductGroup.mentee_id == mentee_id)),
+        ('商品群の画像', db.select(ProductGroupImage).where(
+            ProductGroupImage.product_group_id.in_([1, 2])
+        ).order_by(ProductGroupImage.product_group_id, ProductGroupImage.position)),
+        ('日報一覧', db.select(DailyReport).where(
+            DailyReport.mentee_id == mentee_id
+        ).order_by(DailyReport.report_date.desc())),
+    ]
+
+def explain_query(statement):
+    """クエリの実行計画を行のリストで取得（SQLite / PostgreSQL）"""
+    dialect = db.engine.dialect
+    sql = str(statement.compile(dialect=dialect, compile_kwargs={'literal_binds': True}))
+    prefix = 'EXPLAIN QUERY PLAN ' if dialect.name == 'sqlite' else 'EXPLAIN '
+    rows = db.session.execute(db.text(prefix + sql)).all()
+    # SQLite は (id, parent, notused, detail)、PostgreSQL は (QUERY PLAN,)
+    return [row[-1] for row in rows]
+
+def is_full_table_scan(plan_lines):
+    """実行計画にインデックスを使わないテーブル全体の走査が含まれるか"""
+    for line in plan_lines:
+        if line.startswith('SCAN ') and ' USING ' not in line:
+            return True
+        if 'Seq Scan' in line:
+            return True
+    return False
+
+@app.cli.command('explain-hot-queries')
+def explain_hot_queries_command():
+    """主要クエリの実行計画を表示し、インデックスが使われているか確認"""
+    full_scans = 0
+    for label, statement in hot_queries():
+        try:
+            plan = explain_query(statement)
+        except Exception as e:
+            db.session.rollback()
+            print(f"❌ 実行計画を取得できません: {label} ({e.__class__.__name__})")
+            continue
+        full_scan = is_full_table_scan(plan)
+        full_scans += full_scan
+        print(f"{'⚠️  全件走査' if full_scan else '✅ インデックス使用'}: {label}")
+        for line in plan:
+            print(f"    {line}")
+    if full_scans:
+        print(f"全件走査のクエリが {full_scans} 件あります。'flask --app app migrate-db' でインデックスを作成してください。")
+        print("（PostgreSQL ではテーブルが小さい場合に Seq Scan が選ばれることがあります）")
+
+@app.cli.command('migrate-db')
+def migrate_db_command():
+    """データベースのスキーマ移行を実行"""
+    db.create_all()
+    applied = migrate_database()
+    if applied:
+        for item in applied:
+            print(f"適用: {item}")
+    else:
+        print("適用する変更はありません")
+
+@app.cli.command('rebuild-product-group-status')
+def rebuild_product_group_status_command():
+    """商品群の進捗状態テーブルを週次報告から再構築"""
+    db.create_all()
+    mentee_count = rebuild_product_group_status()
+    print(f"商品群の進捗状態を再構築しました（メンティ {mentee_count} 名分）")
+
+@app.cli.command('prune-markdown-cache')
+@click.option('--days', type=int, default=None, help='残す日数（既定: MARKDOWN_CACHE_MAX_AGE_DAYS）')
+@click.option('--max-mb', type=int, default=None, help='合計サイズの上限MB（既定: MARKDOWN_CACHE_MAX_MB）')
+def prune_markdown_cache_command(days, max_mb):
+    """マークダウンのファイルキャッシュから古いもの・上限を超えた分を削除（cron等で定期実行）"""
+    if not MARKDOWN_CACHE_DIR:
+        print("MARKDOWN_CACHE_DIR が設定されていません")
+        return
+    removed_count = prune_markdown_cache(days, None if max_mb is None else max_mb * 1024 * 1024)
+    print(f"マークダウンのファイルキャッシュを {removed_count} 件削除しました")
+
+@app.cli.command('compact-notifications')
+@click.option('--days', type=int, default=None, help='保持日数（既定: NOTIFICATION_RETENTION_DAYS）')
+@click.option('--policy', type=click.Choice(['archive', 'delete']), default=None, help='archive: アーカイブへ移動 / delete: 削除')
+@click.option('--batch-size', type=int, default=None, help='1トランザクションで処理する件数')
+def compact_notifications_command(days, policy, batch_size):
+    """保持期間を過ぎた既読通知をアーカイブ・削除（cron等で定期実行）"""
+    db.create_all()
+    compacted_count = compact_notifications(days, policy, batch_size)
+    print(f"通知を整理しました（{compacted_count} 件、ポリシー: {policy or NOTIFICATION_RETENTION_POLICY}）")
+
+@app.cli.command('run-jobs')
+def run_jobs_command():
+    """実行可能なバックグラウンドジョブを全て処理し、保持期間を過ぎた完了済みジョブを削除して終了（ワーカースレッドを使わない運用向け）"""
+    db.create_all()
+    processed_count = 0
+    while run_next_job():
+        processed_count += 1
+    pruned_count = prune_background_jobs()
+    print(f"ジョブを {processed_count} 件処理しました（完了済みジョブを {pruned_count} 件削除）")
+
+@app.cli.command('render-report-html')
+@click.option('--all', 'render_all', is_flag=True, help='生成済みの日報も含めて全件を再生成')
+def render_report_html_command(render_all):
+    """日報の表示用HTMLを本文から生成（既存データの移行・変換ルール変更時に実行）"""
+    db.create_all()
+    rendered_count = render_daily_report_html(missing_only=not render_all)
+    print(f"日報の表示用HTMLを生成しました（{rendered_count} 件）")
+
+def warm_up_templates():
+    """
+    templates/ 内の全テンプレートを事前にコンパイルする（バイトコードキャッシュにも保存される）
+    
+    (テンプレート名, 所要ミリ秒) のリストを返す。
+    """
+    timings = []
+    for template_name in app.jinja_env.list_templates(extensions=['html']):
+        started = time.perf_counter()
+        app.jinja_env.get_template(template_name)
+        timings.append((template_name, (time.perf_counter() - started) * 1000))
+    return timings
+
+def print_template_timings(timings):
+    for template_name, elapsed_ms in sorted(timings, key=lambda timing: timing[1], reverse=True):
+        print(f"  {elapsed_ms:8.1f}ms  {template_name}")
+    print(f"テンプレート {len(timings)} 件をコンパイルしました（合計 {sum(ms for _, ms in timings):.1f}ms）")
+
+@app.cli.command('build-assets')
+def build_assets_command():
+    """static/src の CSS/JS を圧縮してハッシュ付きのファイル名で static/dist に出力し、.gz / .br も作成"""
+    for name, output in build_assets().items():
+        source_size = os.path.getsize(os.path.join(ASSET_SOURCE_DIR, name))
+        output_size = os.path.getsize(os.path.join(app.static_folder, output))
+        print(f"  {name} -> {output} ({source_size:,} → {output_size:,} bytes)")
+    print(f"圧縮済みファイルを {precompress_static_files()} 件作成しました")
+
+@app.cli.command('build-thumbnails')
+@click.option('--all', 'rebuild_all', is_flag=True, help='作成済みの画像も含めて全件を作り直す（THUMBNAIL_WIDTHS 変更時など）')
+@click.option('--workers', type=int, default=None, help='並列数（省略時はCPU数）')
+def build_thumbnails_command(rebuild_all, workers):
+    """商品群画像の縮小版・WebP版を作成（既存画像の移行・縮小版の幅の変更時に実行）"""
+    if not PIL_AVAILABLE:
+        print("縮小版を作成するには Pillow をインストールしてください")
+        return
+    db.create_all()
+    migrate_database()
+    started = time.perf_counter()
+    processed_count = build_image_derivatives(rebuild_all=rebuild_all, workers=workers)
+    print(f"商品群画像 {processed_count} 件の縮小版を作成しました（{time.perf_counter() - started:.1f}秒）")
+
+@app.cli.command('warm-templates')
+def warm_templates_command():
+    """全テンプレートをコンパイルしてバイトコードキャッシュを作成（デプロイ直後に実行）"""
+    print_template_timings(warm_up_templates())
+
+def measure_page(client, path):
+    """
+    テストクライアントでページを取得し、最初のバイトまでの時間・全体の時間・サイズを計測
+    
+    最初のチャンクを受け取った時点を最初のバイトとする。(TTFBミリ秒, 全体ミリ秒, バイト数) を返す。
+    """
+    started = time.perf_counter()
+    response = client.get(path, buffered=False)
+    first_byte_ms = None
+    total_bytes = 0
+    try:
+        for chunk in response.iter_encoded():
+            if first_byte_ms is None:
+                first_byte_ms = (time.perf_counter() - started) * 1000
+            total_bytes += len(chunk)
+    finally:
+        response.close()
+    total_ms = (time.perf_counter() - started) * 1000
+    return (total_ms if first_byte_ms is None else first_byte_ms), total_ms, total_bytes
+
+@app.cli.command('profile-page')
+@click.argument('path')
+@click.option('--email', required=True, help='ログインするユーザーのメールアドレス')
+@click.option('--repeat', default=5, show_default=True, help='計測回数（中央値を表示）')
+def profile_page_command(path, email, repeat):
+    """ページの最初のバイトまでの時間・全体の時間・ピークメモリを一括レンダリングとストリーミングで比較"""
+    user = User.query.filter_by(email=email).first()
+    if user is None:
+        print(f"ユーザーが見つかりません: {email}")
+        return
+    
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user.id)
+        session['_fresh'] = True
+    
+    stream_templates = app.config['STREAM_TEMPLATES']
+    try:
+        for label, streaming in (('一括レンダリング', False), ('ストリーミング', True)):
+            app.config['STREAM_TEMPLATES'] = streaming
+            measure_page(client, path)  # キャッシュを温める
+            timings = [measure_page(client, path) for _ in range(repeat)]
+            
+            # メモリ計測は計測自体のオーバーヘッドがあるため時間計測とは別に行う
+            tracemalloc.start()
+            try:
+                measure_page(client, path)
+                peak_bytes = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+            
+            print(f"{label}: TTFB {statistics.median(t[0] for t in timings):.1f}ms"
+                  f" / 全体 {statistics.median(t[1] for t in timings):.1f}ms"
+                  f" / {timings[0][2]:,} bytes / ピークメモリ {peak_bytes / 1024:,.0f} KiB")
+    finally:
+        app.config['STREAM_TEMPLATES'] = stream_templates
+
+@app.cli.command('repair-notification-counts')
+def repair_notification_counts_command():
+    """ユーザーごとの未読通知数を通知テーブルから再計算"""
+    db.create_all()
+    repaired_count = repair_unread_notification_counts()
+    print(f"未読通知数を再計算しました（修正 {repaired_count} 名分）")
+
 if __name__ == '__main__':
     with app.app_context():
         db.create_all()
+        migrate_database()
+        # 進捗状態が未作成の商品群があれば補完（既存DBへの導入時）
+        rebuild_product_group_status(missing_only=True)
+        # 表示用HTMLが未生成・古い変換ルールの日報があれば生成
+        render_daily_report_html(missing_only=True)
+        # 圧縮・ハッシュ付きの静的アセットと、その .gz / .br を出力
+        build_assets()
+        precompress_static_files()
+        # 最初のリクエストでコンパイルしないよう、受付開始前に全テンプレートをコンパイル
+        print_template_timings(warm_up_templates())
     
     # 本番環境かどうかを環境変数で判定
     import os
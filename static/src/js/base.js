@@ -0,0 +1,323 @@
+// テンプレートから渡されたURL（base.html の app-urls）。{id} などは params の値で置き換える
+const appUrls = JSON.parse(document.getElementById('app-urls').textContent);
+
+function appUrl(name, params = {}) {
+    return appUrls[name].replace(/\{(\w+)\}/g, (match, key) => encodeURIComponent(params[key]));
+}
+
+let notificationInterval;
+let notificationStream = null;
+let currentNotifications = [];
+let notificationsEtag = null;
+
+// 通知を読み込む（full=false の場合は変更が無ければ304、あれば新着分のみ取得して統合）
+function loadNotifications(full = false) {
+    const conditional = !full && notificationsEtag !== null;
+    const delta = conditional && currentNotifications.length > 0;
+    const url = delta ? `${appUrl('notifications')}?since=${Math.max(...currentNotifications.map(n => n.id))}` : appUrl('notifications');
+    const headers = conditional ? {'If-None-Match': notificationsEtag} : {};
+
+    fetch(url, {headers: headers, cache: 'no-store'})
+        .then(response => {
+            if (response.status === 304) {
+                return null;
+            }
+            notificationsEtag = response.headers.get('ETag');
+            return response.json();
+        })
+        .then(data => {
+            if (data === null) {
+                return;
+            }
+            updateNotificationBadge(data.unread_count);
+            if (!delta || data.notifications.length >= 10) {
+                currentNotifications = data.notifications;
+            } else if (hasNotificationChanges(data.notifications)) {
+                mergeNotifications(data.notifications);
+            } else {
+                // 新着・まとめ通知の更新が無いのに変更があった場合は既読状態の変化なので一覧を取り直す
+                loadNotifications(true);
+                return;
+            }
+            updateNotificationList(currentNotifications);
+        })
+        .catch(error => {
+            console.error('通知の読み込みに失敗しました:', error);
+        });
+}
+
+// 手元の一覧に無い通知、または件数・既読状態が変わった通知があるか
+function hasNotificationChanges(notifications) {
+    return notifications.some(notification => {
+        const current = currentNotifications.find(n => n.id === notification.id);
+        return !current || current.count !== notification.count || current.is_read !== notification.is_read;
+    });
+}
+
+// 受信した通知を一覧に統合（まとめ通知は同じIDで置き換え、新しい順に10件）
+function mergeNotifications(notifications) {
+    const ids = new Set(notifications.map(n => n.id));
+    currentNotifications = notifications
+        .concat(currentNotifications.filter(n => !ids.has(n.id)))
+        .sort((a, b) => b.id - a.id)
+        .slice(0, 10);
+}
+
+// 通知バッジを更新
+function updateNotificationBadge(count) {
+    const badge = document.getElementById('notification-badge');
+    if (count > 0) {
+        badge.textContent = count;
+        badge.style.display = 'inline';
+    } else {
+        badge.style.display = 'none';
+    }
+}
+
+// 通知リストを更新
+function updateNotificationList(notifications) {
+    const list = document.getElementById('notification-list');
+
+    if (notifications.length === 0) {
+        list.innerHTML = '<div class="text-center p-3 text-muted">通知はありません</div>';
+        return;
+    }
+
+    // 最新の未読通知を最上面バナーに表示
+    const latestUnreadNotification = notifications.find(n => !n.is_read);
+    if (latestUnreadNotification) {
+        showTopNotification(latestUnreadNotification);
+    }
+
+    let html = '';
+    notifications.forEach(notification => {
+        const iconClass = notification.type === 'report_created' ? 'fa-file-alt' : 
+                         notification.type === 'comment_added' ? 'fa-comment' : 'fa-info-circle';
+        const bgClass = notification.is_read ? '' : 'bg-light';
+
+        html += `
+            <div class="dropdown-item-text p-2 ${bgClass} notification-item" onclick="handleNotificationClick(${notification.id}, '${notification.type}', ${notification.related_id || 'null'})" style="cursor: pointer; transition: background-color 0.2s;" onmouseover="this.style.backgroundColor='#f8f9fa'" onmouseout="this.style.backgroundColor='${notification.is_read ? '' : '#f8f9fa'}'">
+                <div class="d-flex align-items-start">
+                    <i class="fas ${iconClass} me-2 mt-1 text-primary"></i>
+                    <div class="flex-grow-1">
+                        <div class="fw-bold">${notification.title}${notification.count > 1 ? ` <span class="badge bg-secondary">${notification.count}件</span>` : ''}</div>
+                        <div class="small text-muted">${notification.message}</div>
+                        <div class="small text-muted">${notification.created_at}</div>
+                    </div>
+                    ${!notification.is_read ? '<i class="fas fa-circle text-primary" style="font-size: 8px;"></i>' : ''}
+                </div>
+            </div>
+        `;
+    });
+
+    list.innerHTML = html;
+}
+
+// 通知クリック時の処理
+function handleNotificationClick(notificationId, notificationType, relatedId) {
+    // 通知を既読にする
+    markAsRead(notificationId);
+
+    // 通知タイプに応じて適切なページに遷移
+    if (notificationType === 'comment_added' && relatedId) {
+        // メンターコメントの場合は報告画面に遷移
+        window.location.href = appUrl('report', {id: relatedId});
+    } else if (notificationType === 'report_created' && relatedId) {
+        // 報告作成の場合は報告画面に遷移
+        window.location.href = appUrl('report', {id: relatedId});
+    } else {
+        // その他の場合はダッシュボードに遷移
+        window.location.href = appUrl('myDashboard');
+    }
+}
+
+// 通知を既読にする
+function markAsRead(notificationId) {
+    fetch(appUrl('notificationRead', {id: notificationId}), {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        }
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            loadNotifications(true); // 通知リストを再読み込み
+        }
+    })
+    .catch(error => {
+        console.error('通知の既読処理に失敗しました:', error);
+    });
+}
+
+// 全ての通知を既読にする
+function markAllAsRead() {
+    fetch(appUrl('notificationsReadAll'), {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        }
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            loadNotifications(true); // 通知リストを再読み込み
+        }
+    })
+    .catch(error => {
+        console.error('全ての通知の既読処理に失敗しました:', error);
+    });
+}
+
+// 最上面通知バナーの表示
+let currentTopNotification = null;
+let topNotificationTimeout = null;
+
+function showTopNotification(notification) {
+    // 同じ通知が既に表示されている場合はスキップ
+    if (currentTopNotification && currentTopNotification.id === notification.id) {
+        return;
+    }
+
+    currentTopNotification = notification;
+
+    const banner = document.getElementById('top-notification-banner');
+    const icon = document.getElementById('notification-icon');
+    const title = document.getElementById('notification-title');
+    const message = document.getElementById('notification-message');
+
+    // アイコンの設定
+    const iconClass = notification.type === 'report_created' ? 'fa-file-alt' : 
+                     notification.type === 'comment_added' ? 'fa-comment' : 'fa-bell';
+    icon.className = `fas ${iconClass} me-2 notification-icon-pulse`;
+
+    // コンテンツの設定
+    title.textContent = notification.title;
+    message.textContent = notification.message;
+
+    // バナーを表示
+    banner.style.display = 'block';
+    document.body.classList.add('notification-showing');
+
+    // アニメーション効果
+    setTimeout(() => {
+        banner.classList.add('show');
+    }, 100);
+
+    // 自動非表示タイマーをクリア
+    if (topNotificationTimeout) {
+        clearTimeout(topNotificationTimeout);
+    }
+
+    // 8秒後に自動非表示
+    topNotificationTimeout = setTimeout(() => {
+        hideTopNotification();
+    }, 8000);
+}
+
+function hideTopNotification() {
+    const banner = document.getElementById('top-notification-banner');
+
+    banner.classList.remove('show');
+    banner.classList.add('slide-out');
+
+    setTimeout(() => {
+        banner.style.display = 'none';
+        banner.classList.remove('slide-out');
+        document.body.classList.remove('notification-showing');
+        currentTopNotification = null;
+    }, 400);
+
+    if (topNotificationTimeout) {
+        clearTimeout(topNotificationTimeout);
+        topNotificationTimeout = null;
+    }
+}
+
+function dismissTopNotification() {
+    if (currentTopNotification) {
+        // 通知を既読にする
+        markAsRead(currentTopNotification.id);
+    }
+    hideTopNotification();
+}
+
+function viewNotificationDetails() {
+    if (currentTopNotification) {
+        handleNotificationClick(
+            currentTopNotification.id, 
+            currentTopNotification.type, 
+            currentTopNotification.related_id
+        );
+        hideTopNotification();
+    }
+}
+
+// 通知バナーのキーボードショートカット
+document.addEventListener('keydown', function(e) {
+    // Escキーで通知を閉じる
+    if (e.key === 'Escape' && currentTopNotification) {
+        dismissTopNotification();
+    }
+});
+
+// ポーリングによる定期更新（SSEが使えない・切断中のみ）
+function startNotificationPolling() {
+    if (!notificationInterval) {
+        notificationInterval = setInterval(loadNotifications, 30000); // 30秒ごとに更新
+    }
+}
+
+function stopNotificationPolling() {
+    if (notificationInterval) {
+        clearInterval(notificationInterval);
+        notificationInterval = null;
+    }
+}
+
+// SSEで新着通知と未読件数を受信
+function connectNotificationStream() {
+    if (!window.EventSource) {
+        startNotificationPolling();
+        return;
+    }
+
+    let reconnecting = false;
+    notificationStream = new EventSource(appUrl('notificationStream'));
+
+    notificationStream.addEventListener('open', function() {
+        stopNotificationPolling();
+        // 切断中に届いた通知を取り直す
+        if (reconnecting) {
+            loadNotifications();
+        }
+    });
+
+    notificationStream.addEventListener('notifications', function(e) {
+        const data = JSON.parse(e.data);
+        updateNotificationBadge(data.unread_count);
+        if (data.notifications.length > 0) {
+            mergeNotifications(data.notifications);
+            updateNotificationList(currentNotifications);
+        }
+    });
+
+    notificationStream.addEventListener('error', function() {
+        reconnecting = true;
+        startNotificationPolling();
+    });
+}
+
+// ページ読み込み時に通知を読み込み、以降はSSEで更新
+document.addEventListener('DOMContentLoaded', function() {
+    loadNotifications();
+    connectNotificationStream();
+});
+
+// ページ離脱時に接続とインターバルをクリア
+window.addEventListener('beforeunload', function() {
+    if (notificationStream) {
+        notificationStream.close();
+    }
+    stopNotificationPolling();
+});
@@ -0,0 +1,189 @@
+let reportIdToDelete = null;
+
+function confirmDelete(reportId, reportTitle) {
+    reportIdToDelete = reportId;
+    document.getElementById('reportToDelete').textContent = reportTitle;
+    const modal = new bootstrap.Modal(document.getElementById('deleteModal'));
+    modal.show();
+}
+
+document.getElementById('confirmDeleteBtn').addEventListener('click', function() {
+    if (reportIdToDelete) {
+        deleteReport(reportIdToDelete);
+    }
+});
+
+function deleteReport(reportId) {
+    fetch(appUrl('report', {id: reportId}), {
+        method: 'DELETE',
+        headers: {
+            'Content-Type': 'application/json',
+        }
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            // 成功メッセージを表示
+            showAlert('success', data.message);
+            // ページをリロードして更新されたリストを表示
+            setTimeout(() => {
+                location.reload();
+            }, 1000);
+        } else {
+            showAlert('danger', data.message);
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        showAlert('danger', 'エラーが発生しました。');
+    });
+}
+
+function showAlert(type, message) {
+    const alertDiv = document.createElement('div');
+    alertDiv.className = `alert alert-${type} alert-dismissible fade show`;
+    alertDiv.innerHTML = `
+        ${message}
+        <button type="button" class="btn-close" data-bs-dismiss="alert" aria-label="Close"></button>
+    `;
+
+    // ページの上部にアラートを挿入
+    const container = document.querySelector('.container');
+    container.insertBefore(alertDiv, container.firstChild);
+
+    // 5秒後に自動でアラートを非表示
+    setTimeout(() => {
+        if (alertDiv.parentNode) {
+            alertDiv.remove();
+        }
+    }, 5000);
+}
+
+// 詳細分析ボタンの追加エフェクト
+document.addEventListener('DOMContentLoaded', function() {
+    // ツールチップを初期化
+    var tooltipTriggerList = [].slice.call(document.querySelectorAll('[data-bs-toggle="tooltip"]'));
+    var tooltipList = tooltipTriggerList.map(function (tooltipTriggerEl) {
+        return new bootstrap.Tooltip(tooltipTriggerEl);
+    });
+
+    // 詳細分析ボタンの特別なエフェクト
+    const detailedAnalysisBtn = document.querySelector('.detailed-analysis-btn-modern');
+    if (detailedAnalysisBtn) {
+        // マウスオーバー時の追加エフェクト
+        detailedAnalysisBtn.addEventListener('mouseenter', function() {
+            // 周囲に光る効果を追加
+            this.style.boxShadow = '0 0 20px rgba(0, 123, 255, 0.8), 0 0 40px rgba(0, 123, 255, 0.4)';
+        });
+
+        detailedAnalysisBtn.addEventListener('mouseleave', function() {
+            // 元の影に戻す
+            this.style.boxShadow = '';
+        });
+
+        // クリック時のエフェクト
+        detailedAnalysisBtn.addEventListener('click', function(e) {
+            // クリックエフェクト
+            this.style.transform = 'scale(0.95)';
+            setTimeout(() => {
+                this.style.transform = '';
+            }, 150);
+
+            // 成功メッセージを表示（オプション）
+            const successMsg = document.createElement('div');
+            successMsg.className = 'btn-success-message';
+            successMsg.innerHTML = '<i class="fas fa-check-circle me-1"></i>詳細分析ページに移動中...';
+            successMsg.style.cssText = `
+                position: fixed;
+                top: 50%;
+                left: 50%;
+                transform: translate(-50%, -50%);
+                background: rgba(40, 167, 69, 0.9);
+                color: white;
+                padding: 10px 20px;
+                border-radius: 25px;
+                font-size: 14px;
+                z-index: 9999;
+                animation: fadeInOut 2s ease-in-out;
+                pointer-events: none;
+            `;
+            document.body.appendChild(successMsg);
+
+            setTimeout(() => {
+                if (successMsg.parentNode) {
+                    successMsg.parentNode.removeChild(successMsg);
+                }
+            }, 2000);
+        });
+    }
+});
+
+// フェードイン・フェードアウトアニメーション
+const style = document.createElement('style');
+style.textContent = `
+    @keyframes fadeInOut {
+        0% { opacity: 0; transform: translate(-50%, -50%) scale(0.8); }
+        20% { opacity: 1; transform: translate(-50%, -50%) scale(1); }
+        80% { opacity: 1; transform: translate(-50%, -50%) scale(1); }
+        100% { opacity: 0; transform: translate(-50%, -50%) scale(0.8); }
+    }
+`;
+document.head.appendChild(style);
+
+// フィルター機能
+document.addEventListener('DOMContentLoaded', function() {
+    const filterButtons = document.querySelectorAll('input[name="filter"]');
+    const activeSection = document.getElementById('active-products');
+    const completedSection = document.getElementById('completed-products');
+    const cancelledSection = document.getElementById('cancelled-products');
+
+    filterButtons.forEach(button => {
+        button.addEventListener('change', function() {
+            const filterValue = this.value;
+
+            switch(filterValue) {
+                case 'active':
+                    activeSection.style.display = 'block';
+                    if (completedSection) {
+                        completedSection.style.display = 'none';
+                    }
+                    if (cancelledSection) {
+                        cancelledSection.style.display = 'none';
+                    }
+                    break;
+                case 'completed':
+                    activeSection.style.display = 'none';
+                    if (completedSection) {
+                        completedSection.style.display = 'block';
+                        // 完了済みセクションを展開
+                        const collapse = document.getElementById('completedCollapse');
+                        if (collapse && !collapse.classList.contains('show')) {
+                            const bsCollapse = new bootstrap.Collapse(collapse, {show: true});
+                        }
+                    }
+                    if (cancelledSection) {
+                        cancelledSection.style.display = 'none';
+                    }
+                    break;
+                case 'cancelled':
+                    activeSection.style.display = 'none';
+                    if (completedSection) {
+                        completedSection.style.display = 'none';
+                    }
+                    if (cancelledSection) {
+                        cancelledSection.style.display = 'block';
+                    }
+                    break;
+                case 'all':
+                    activeSection.style.display = 'block';
+                    if (completedSection) {
+                        completedSection.style.display = 'block';
+                    }
+                    if (cancelledSection) {
+                        cancelledSection.style.display = 'block';
+                    }
+                    break;
+            }
+        });
+    });
+});
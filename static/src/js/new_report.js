@@ -0,0 +1,353 @@
+// 商品群画像表示機能と進捗ステージ表示機能
+document.addEventListener('DOMContentLoaded', function() {
+    const productGroupSelect = document.getElementById('product-group-select');
+    const productGroupImage = document.getElementById('product-group-image');
+    const stageInfoCard = document.getElementById('product-group-stage-info');
+    const latestStageName = document.getElementById('latest-stage-name');
+    const lastReportDate = document.getElementById('last-report-date');
+    const stageInfoNote = document.getElementById('stage-info-note');
+    const stageChips = document.querySelectorAll('#stage-chips .stage-chip');
+
+    // 商品群データを取得
+    let productGroupsData = {};
+    try {
+        const dataElement = document.getElementById('product-groups-data');
+        if (dataElement && dataElement.textContent) {
+            productGroupsData = JSON.parse(dataElement.textContent);
+        }
+    } catch (e) {
+        console.error('商品群データの解析エラー:', e);
+        productGroupsData = {};
+    }
+
+    // 商品群ステージデータを取得
+    let productGroupStagesData = {};
+    try {
+        const stagesElement = document.getElementById('product-group-stages-data');
+        if (stagesElement && stagesElement.textContent) {
+            productGroupStagesData = JSON.parse(stagesElement.textContent);
+        }
+    } catch (e) {
+        console.error('商品群ステージデータの解析エラー:', e);
+        productGroupStagesData = {};
+    }
+
+    console.log('商品群データ:', productGroupsData);
+    console.log('商品群ステージデータ:', productGroupStagesData);
+
+    // 進捗バー更新関数
+    function updateProgressBar(stage) {
+        const progressFill = document.getElementById('progress-fill');
+        const progressPercentage = document.getElementById('progress-percentage');
+
+        // ステージ別の進捗率
+        const stageProgress = {
+            'proposal_pre': 11,
+            'estimate_completed': 22,
+            's_creation_approved': 33,
+            'proposal_decision_obtained': 44,
+            'pre_production_s_confirmed': 56,
+            'first_order': 67,
+            'temporary_listing': 78,
+            'page_up': 89,
+            'second_lot_ordered': 100
+        };
+
+        const percentage = stageProgress[stage] || 0;
+
+        // アニメーション付きで進捗バーを更新
+        setTimeout(() => {
+            progressFill.style.width = percentage + '%';
+            progressPercentage.textContent = percentage + '%';
+        }, 100);
+    }
+
+    // ステージバッジ更新関数
+    function updateStageBadge(stage, stageName) {
+        const currentStageBadge = document.getElementById('current-stage-badge');
+        const currentStageText = document.getElementById('current-stage-text');
+
+        // 既存のクラスを削除
+        currentStageBadge.className = 'current-stage-badge';
+
+        // ステージ別のクラスを追加
+        if (stage) {
+            const stageClass = 'stage-badge-' + stage.replace(/_/g, '-');
+            currentStageBadge.classList.add(stageClass);
+            currentStageText.textContent = stageName;
+        } else {
+            currentStageBadge.classList.add('stage-badge-proposal-pre');
+            currentStageText.textContent = '未報告';
+        }
+    }
+
+    // 商品群選択時のイベントリスナー
+    productGroupSelect.addEventListener('change', function() {
+        const selectedId = this.value;
+        console.log('選択されたID:', selectedId);
+
+        if (selectedId && selectedId !== '0' && productGroupsData[selectedId]) {
+            const productGroup = productGroupsData[selectedId];
+            const images = productGroup.images;
+
+            // 画像表示
+            if (images && images.length > 0) {
+                // 1枚目の画像を表示（縮小版があれば縮小版。URLはテンプレートで作成済み）
+                const imageUrl = productGroup.imageUrl;
+
+                productGroupImage.innerHTML = `
+                    <div class="product-image-container">
+                        <img src="${imageUrl}" 
+                             alt="${productGroup.name}" 
+                             class="product-image"
+                             onerror="console.log('画像読み込みエラー:', this.src); this.style.display='none';">
+                        <div class="image-overlay">
+                            <small class="text-white">${productGroup.name}</small>
+                        </div>
+                    </div>
+                `;
+            } else {
+                // 画像がない場合
+                productGroupImage.innerHTML = `
+                    <div class="image-placeholder-modern">
+                        <i class="fas fa-image fa-3x"></i>
+                        <p>${productGroup.name}</p>
+                        <small>画像が登録されていません</small>
+                    </div>
+                `;
+            }
+
+            // 進捗ステージ表示
+            if (productGroupStagesData[selectedId]) {
+                const stageInfo = productGroupStagesData[selectedId];
+
+                latestStageName.textContent = stageInfo.latest_stage_name;
+                lastReportDate.textContent = stageInfo.last_report_date || '未報告';
+
+                // 進捗バーの更新
+                updateProgressBar(stageInfo.latest_stage);
+
+                // ステージバッジの更新
+                updateStageBadge(stageInfo.latest_stage, stageInfo.latest_stage_name);
+
+                // ステージ情報の表示を調整
+                if (stageInfo.has_reports) {
+                    stageInfoNote.innerHTML = `
+                        <i class="fas fa-info-circle me-1"></i>
+                        <span>この商品群の最新の進捗状況です。新しい報告でステージを更新できます。</span>
+                    `;
+                } else {
+                    stageInfoNote.innerHTML = `
+                        <i class="fas fa-exclamation-triangle me-1"></i>
+                        <span>この商品群の報告はまだありません。初回の報告を作成します。</span>
+                    `;
+                }
+
+                // ステージ情報カードを表示
+                stageInfoCard.style.display = 'block';
+            }
+        } else {
+            // デフォルト表示
+            productGroupImage.innerHTML = `
+                <div class="image-placeholder-modern">
+                    <i class="fas fa-image fa-3x"></i>
+                    <p>商品群を選択してください</p>
+                </div>
+            `;
+
+            // ステージ情報カードを非表示
+            stageInfoCard.style.display = 'none';
+        }
+    });
+
+    // 表示のみ（クリックしても何もしない）
+
+    // 完了/中止の表示切替（URLクエリで制御）
+    const showAllToggle = document.getElementById('show-all-toggle');
+    if (showAllToggle) {
+        function isCompletedOrCancelled(id) {
+            const stages = productGroupStagesData || {};
+            const info = stages[String(id)];
+            const latest = info && info.latest_stage ? info.latest_stage : null;
+            return latest === 's12' || latest === 's13';
+        }
+        function rebuildProductGroupOptions(showAll) {
+            if (!productGroupSelect) return;
+            const prev = productGroupSelect.value;
+            // 保持しているスクロール位置を維持
+            const scrollY = window.scrollY;
+            // 先頭のプレースホルダ
+            productGroupSelect.innerHTML = '';
+            const placeholder = document.createElement('option');
+            placeholder.value = '0';
+            placeholder.textContent = '商品群を選択してください';
+            productGroupSelect.appendChild(placeholder);
+            // 既存データ順に反映
+            const groups = productGroupsData || {};
+            Object.keys(groups).forEach((id) => {
+                if (!showAll && isCompletedOrCancelled(id)) return;
+                const opt = document.createElement('option');
+                opt.value = id;
+                opt.textContent = groups[id].name;
+                productGroupSelect.appendChild(opt);
+            });
+            // 選択状態を可能であれば維持
+            if (prev && Array.from(productGroupSelect.options).some(o => o.value === prev)) {
+                productGroupSelect.value = prev;
+            } else {
+                productGroupSelect.value = '0';
+            }
+            // URLクエリを更新（リロードしない）
+            const url = new URL(window.location.href);
+            if (showAll) url.searchParams.set('show_all', '1');
+            else url.searchParams.delete('show_all');
+            history.replaceState(null, '', url.toString());
+            // スクロール位置復元
+            window.scrollTo({ top: scrollY });
+        }
+        // 初期同期（URLクエリに合わせる）
+        rebuildProductGroupOptions(showAllToggle.checked);
+        // 切替時に即時反映（リロードなし）
+        showAllToggle.addEventListener('change', function() {
+            rebuildProductGroupOptions(this.checked);
+        });
+    }
+
+    // フォーム送信時のバリデーション
+    const form = document.querySelector('form');
+    if (form) {
+        form.addEventListener('submit', function(e) {
+            const selectedProductGroup = productGroupSelect.value;
+            if (!selectedProductGroup || selectedProductGroup === '0') {
+                e.preventDefault();
+                alert('商品群を選択してください。');
+                productGroupSelect.focus();
+                return false;
+            }
+        });
+    }
+
+    // Todoリストのスクロールインジケーター制御
+    const todoScrollContainer = document.querySelector('.todo-scroll-container');
+    const todoScrollIndicator = document.querySelector('.todo-scroll-indicator');
+
+    if (todoScrollContainer && todoScrollIndicator) {
+        function updateScrollIndicator() {
+            const isScrollable = todoScrollContainer.scrollHeight > todoScrollContainer.clientHeight;
+            const isAtBottom = todoScrollContainer.scrollTop + todoScrollContainer.clientHeight >= todoScrollContainer.scrollHeight - 10;
+
+            if (isScrollable && !isAtBottom) {
+                todoScrollIndicator.style.opacity = '1';
+            } else {
+                todoScrollIndicator.style.opacity = '0';
+            }
+        }
+
+        // 初期表示時とスクロール時にインジケーターを更新
+        updateScrollIndicator();
+        todoScrollContainer.addEventListener('scroll', updateScrollIndicator);
+
+        // リサイズ時にも更新
+        window.addEventListener('resize', updateScrollIndicator);
+    }
+
+    // Ajax フォーム送信
+    const reportForm = document.querySelector('#report-form');
+    const submitButton = document.querySelector('#submit-button');
+
+    if (reportForm && submitButton) {
+        reportForm.addEventListener('submit', async function(e) {
+            e.preventDefault();
+
+            // ボタンを無効化
+            submitButton.disabled = true;
+            submitButton.innerHTML = '<i class="fas fa-spinner fa-spin me-2"></i>保存中...';
+
+            try {
+                const formData = new FormData(reportForm);
+
+                const response = await fetch(reportForm.action, {
+                    method: 'POST',
+                    body: formData,
+                    headers: {
+                        'X-Requested-With': 'XMLHttpRequest'
+                    }
+                });
+
+                if (response.ok) {
+                    const result = await response.json();
+
+                    // 成功メッセージを表示
+                    showSuccessMessage('週次報告が保存されました！');
+
+                    // フォームをリセット
+                    reportForm.reset();
+
+                    // 商品群選択をリセット
+                    const productGroupSelect = document.querySelector('#product_group_id');
+                    if (productGroupSelect) {
+                        productGroupSelect.selectedIndex = 0;
+                        updateProductGroupInfo();
+                    }
+
+                    // ページを少し下にスクロールしてフォームが見えるように
+                    window.scrollTo({
+                        top: reportForm.offsetTop - 100,
+                        behavior: 'smooth'
+                    });
+
+                } else {
+                    throw new Error('保存に失敗しました');
+                }
+
+            } catch (error) {
+                console.error('Error:', error);
+                showErrorMessage('保存中にエラーが発生しました。もう一度お試しください。');
+            } finally {
+                // ボタンを有効化
+                submitButton.disabled = false;
+                submitButton.innerHTML = '<i class="fas fa-save me-2"></i>週次報告を保存';
+            }
+        });
+    }
+
+    // 成功メッセージ表示関数
+    function showSuccessMessage(message) {
+        const alertDiv = document.createElement('div');
+        alertDiv.className = 'alert alert-success alert-dismissible fade show position-fixed';
+        alertDiv.style.cssText = 'top: 20px; right: 20px; z-index: 9999; min-width: 300px;';
+        alertDiv.innerHTML = `
+            <i class="fas fa-check-circle me-2"></i>${message}
+            <button type="button" class="btn-close" data-bs-dismiss="alert"></button>
+        `;
+
+        document.body.appendChild(alertDiv);
+
+        // 3秒後に自動で非表示
+        setTimeout(() => {
+            if (alertDiv.parentNode) {
+                alertDiv.remove();
+            }
+        }, 3000);
+    }
+
+    // エラーメッセージ表示関数
+    function showErrorMessage(message) {
+        const alertDiv = document.createElement('div');
+        alertDiv.className = 'alert alert-danger alert-dismissible fade show position-fixed';
+        alertDiv.style.cssText = 'top: 20px; right: 20px; z-index: 9999; min-width: 300px;';
+        alertDiv.innerHTML = `
+            <i class="fas fa-exclamation-triangle me-2"></i>${message}
+            <button type="button" class="btn-close" data-bs-dismiss="alert"></button>
+        `;
+
+        document.body.appendChild(alertDiv);
+
+        // 5秒後に自動で非表示
+        setTimeout(() => {
+            if (alertDiv.parentNode) {
+                alertDiv.remove();
+            }
+        }, 5000);
+    }
+});
@@ -0,0 +1,85 @@
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+# app.py は読み込み時に設定を確定するため、import より前に環境変数を設定する
+_test_dir = tempfile.mkdtemp(prefix='mentortrack-test-')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(_test_dir, 'test.db')
+os.environ['UPLOAD_PRODUCT_GROUPS_DIR'] = os.path.join(_test_dir, 'uploads')
+os.environ['JINJA_CACHE_DIR'] = os.path.join(_test_dir, 'jinja_cache')
+os.environ['BACKGROUND_JOB_WORKERS'] = '0'
+os.environ.pop('MARKDOWN_CACHE_DIR', None)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as mentortrack  # noqa: E402
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_test_dir, ignore_errors=True)
+
+
+@pytest.fixture
+def app():
+    flask_app = mentortrack.app
+    flask_app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+    with flask_app.app_context():
+        mentortrack.db.create_all()
+        yield flask_app
+        mentortrack.db.session.remove()
+        mentortrack.db.drop_all()
+    # 行IDが再利用されるため、テスト間でキャッシュを持ち越さない
+    mentortrack.fragment_cache.clear()
+    mentortrack.markdown_cache.clear()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def login(client, user):
+    """セッションにログイン状態を書き込む（ログインフォームを経由しない）"""
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user.id)
+        session['_fresh'] = True
+
+
+def post_weekly_report(client, mentee_id, product_group_id, planning_stage='s1'):
+    """新規報告フォームを送信する"""
+    return client.post(f'/report/new/{mentee_id}', data={
+        'planning_stage': planning_stage,
+        'product_group': product_group_id,
+        'self_evaluation': 2,
+        'progress_items': '見積もりを依頼',
+        'insights_concerns': '',
+    })
+
+
+@pytest.fixture
+def mentor(app):
+    user = mentortrack.User(username='mentor', email='mentor@example.com', role='mentor')
+    user.set_password('password')
+    mentortrack.db.session.add(user)
+    mentortrack.db.session.commit()
+    return user
+
+
+@pytest.fixture
+def mentor_client(client, mentor):
+    login(client, mentor)
+    return client
+
+
+@pytest.fixture
+def mentee_with_group(app):
+    mentee = mentortrack.Mentee(name='テストメンティ', email='mentee@example.com')
+    mentortrack.db.session.add(mentee)
+    mentortrack.db.session.flush()
+    product_group = mentortrack.ProductGroup(name='ゲーミングモニター', mentee_id=mentee.id)
+    mentortrack.db.session.add(product_group)
+    mentortrack.db.session.commit()
+    return mentee, product_group
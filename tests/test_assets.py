@@ -0,0 +1,36 @@
+import os
+
+import app as mentortrack
+
+
+def test_page_stylesheets_are_loaded_in_head(mentor_client):
+    html = mentor_client.get('/mentor/dashboard').get_data(as_text=True)
+
+    head, body = html.split('</head>', 1)
+    assert 'css/mentor_dashboard' in head
+    assert 'css/mentor_dashboard' not in body
+
+
+def test_build_assets_removes_stale_outputs(tmp_path, monkeypatch):
+    source_dir = tmp_path / 'src'
+    build_dir = tmp_path / 'dist'
+    (source_dir / 'css').mkdir(parents=True)
+    monkeypatch.setattr(mentortrack.app, 'static_folder', str(tmp_path))
+    monkeypatch.setattr(mentortrack, 'ASSET_SOURCE_DIR', str(source_dir))
+    monkeypatch.setattr(mentortrack, 'ASSET_BUILD_DIR', str(build_dir))
+    monkeypatch.setattr(mentortrack, 'ASSET_MANIFEST_PATH', str(build_dir / 'manifest.json'))
+    monkeypatch.setattr(mentortrack, '_asset_manifest', None)
+
+    (source_dir / 'css' / 'page.css').write_text('body { color: red; }', encoding='utf-8')
+    old_output = mentortrack.build_assets()['css/page.css']
+    old_path = tmp_path / old_output
+    (tmp_path / f'{old_output}.gz').write_bytes(b'')
+
+    (source_dir / 'css' / 'page.css').write_text('body { color: blue; }', encoding='utf-8')
+    new_output = mentortrack.build_assets()['css/page.css']
+
+    assert new_output != old_output
+    assert (tmp_path / new_output).exists()
+    assert not old_path.exists()
+    assert not os.path.exists(f'{old_path}.gz')
+    assert (build_dir / 'manifest.json').exists()
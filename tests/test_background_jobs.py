@@ -0,0 +1,48 @@
+from datetime import datetime, timedelta
+
+from app import (
+    BACKGROUND_JOB_RETENTION_DAYS, BackgroundJob, WeeklyReport, db, enqueue_job, prune_background_jobs, run_next_job,
+)
+from conftest import post_weekly_report
+
+
+def test_duplicate_idempotency_key_is_ignored(app):
+    enqueue_job('delete_uploaded_files', {'filenames': ['a.png']}, idempotency_key='delete:a.png')
+    enqueue_job('delete_uploaded_files', {'filenames': ['a.png']}, idempotency_key='delete:a.png')
+    enqueue_job('delete_uploaded_files', {'filenames': ['b.png']})
+    enqueue_job('delete_uploaded_files', {'filenames': ['b.png']})
+    db.session.commit()
+    
+    assert BackgroundJob.query.filter_by(idempotency_key='delete:a.png').count() == 1
+    # キーのないジョブは重複として扱わない
+    assert BackgroundJob.query.filter(BackgroundJob.idempotency_key.is_(None)).count() == 2
+
+
+
+def test_report_notification_is_enqueued_when_report_id_is_reused(mentor_client, mentee_with_group):
+    mentee, product_group = mentee_with_group
+    
+    post_weekly_report(mentor_client, mentee.id, product_group.id)
+    first_report_id = WeeklyReport.query.one().id
+    while run_next_job():
+        pass
+    assert mentor_client.delete(f'/report/{first_report_id}').get_json()['success']
+    post_weekly_report(mentor_client, mentee.id, product_group.id)
+    
+    # SQLite は削除された最大のIDを再利用するため、報告IDをキーにすると2件目の通知が捨てられていた
+    assert WeeklyReport.query.one().id == first_report_id
+    assert BackgroundJob.query.filter_by(name='notify_mentors').count() == 2
+
+
+def test_prune_removes_only_old_succeeded_jobs(app):
+    old = datetime.utcnow() - timedelta(days=BACKGROUND_JOB_RETENTION_DAYS + 1)
+    db.session.add_all([
+        BackgroundJob(name='delete_uploaded_files', status='succeeded', finished_at=old),
+        BackgroundJob(name='delete_uploaded_files', status='succeeded', finished_at=datetime.utcnow()),
+        BackgroundJob(name='delete_uploaded_files', status='failed', finished_at=old),
+        BackgroundJob(name='delete_uploaded_files', status='pending'),
+    ])
+    db.session.commit()
+    
+    assert prune_background_jobs() == 1
+    assert sorted(job.status for job in BackgroundJob.query) == ['failed', 'pending', 'succeeded']
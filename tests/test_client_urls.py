@@ -0,0 +1,20 @@
+import json
+import re
+
+from app import url_template
+
+
+def test_url_template_replaces_parameters_with_placeholders(app):
+    with app.test_request_context():
+        assert url_template('view_report', report_id='id') == '/report/{id}'
+        assert url_template('mark_notification_read', notification_id='id') == '/notifications/{id}/read'
+
+
+def test_pages_embed_client_urls(client):
+    html = client.get('/login').get_data(as_text=True)
+    
+    match = re.search(r'<script type="application/json" id="app-urls">(.*?)</script>', html)
+    assert match
+    urls = json.loads(match.group(1))
+    assert urls['notifications'] == '/notifications'
+    assert urls['productGroupDetails'] == '/product-group/{id}/details'
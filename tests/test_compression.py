@@ -0,0 +1,120 @@
+import gzip
+import os
+
+import pytest
+from flask import Response
+
+import app as mentortrack
+from app import compress_response, precompress_static_files
+
+LARGE_BODY = '<p>圧縮対象のページ</p>' * 200
+
+
+def compress(app, body, accept_encoding='gzip, br', status=200, mimetype='text/html', etag='page-1'):
+    with app.test_request_context(headers={'Accept-Encoding': accept_encoding}):
+        response = Response(body, status=status, mimetype=mimetype)
+        if etag:
+            response.set_etag(etag)
+        return compress_response(response)
+
+
+def test_gzip_is_used_when_brotli_is_not_accepted(app):
+    response = compress(app, LARGE_BODY, accept_encoding='gzip')
+    
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(response.get_data()).decode('utf-8') == LARGE_BODY
+    assert 'Accept-Encoding' in response.vary
+    assert response.get_etag() == ('page-1', True)
+
+
+@pytest.mark.skipif(not mentortrack.BROTLI_AVAILABLE, reason='brotli がインストールされていない')
+def test_brotli_is_preferred_when_accepted(app):
+    import brotli
+    response = compress(app, LARGE_BODY)
+    
+    assert response.headers['Content-Encoding'] == 'br'
+    assert brotli.decompress(response.get_data()).decode('utf-8') == LARGE_BODY
+
+
+def test_uncompressed_when_no_encoding_is_accepted(app):
+    response = compress(app, LARGE_BODY, accept_encoding='identity')
+    
+    assert 'Content-Encoding' not in response.headers
+    assert 'Accept-Encoding' in response.vary
+    assert response.get_etag() == ('page-1', False)
+
+
+def test_small_responses_are_not_compressed(app):
+    response = compress(app, 'x' * (mentortrack.COMPRESS_MIN_SIZE - 1))
+    
+    assert 'Content-Encoding' not in response.headers
+    assert response.get_etag() == ('page-1', False)
+
+
+@pytest.mark.parametrize('status', [204, 304])
+def test_empty_statuses_are_left_alone(app, status):
+    response = compress(app, '', status=status)
+    
+    assert 'Content-Encoding' not in response.headers
+    assert 'Accept-Encoding' not in response.vary
+
+
+def test_other_mimetypes_are_not_compressed(app):
+    response = compress(app, LARGE_BODY, mimetype='image/png')
+    
+    assert 'Content-Encoding' not in response.headers
+
+
+@pytest.fixture
+def static_dir(app, tmp_path, monkeypatch):
+    monkeypatch.setattr(app, 'static_folder', str(tmp_path))
+    (tmp_path / 'css').mkdir()
+    return tmp_path
+
+
+def write_static(static_dir, name, content):
+    path = static_dir / name
+    path.write_text(content, encoding='utf-8')
+    return path
+
+
+def test_fresh_precompressed_sibling_is_served(client, static_dir):
+    css = 'body { color: red; }\n' * 100
+    path = write_static(static_dir, 'css/page.css', css)
+    
+    assert precompress_static_files() == 1
+    assert os.path.exists(f'{path}.gz')
+    
+    response = client.get('/static/css/page.css', headers={'Accept-Encoding': 'gzip'})
+    data = response.get_data()
+    response.close()
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.mimetype == 'text/css'
+    assert 'Accept-Encoding' in response.vary
+    assert gzip.decompress(data).decode('utf-8') == css
+
+
+def test_stale_precompressed_sibling_is_ignored(client, static_dir):
+    path = write_static(static_dir, 'css/page.css', 'body { color: red; }\n' * 100)
+    precompress_static_files()
+    css = 'body { color: blue; }\n' * 100
+    path.write_text(css, encoding='utf-8')
+    modified_at = os.path.getmtime(path) - 10
+    os.utime(f'{path}.gz', (modified_at, modified_at))
+    
+    response = client.get('/static/css/page.css', headers={'Accept-Encoding': 'gzip'})
+    data = response.get_data()
+    response.close()
+    assert 'Content-Encoding' not in response.headers
+    assert data.decode('utf-8') == css
+    
+    # 古い圧縮済みファイルは作り直し、最新になった後は作り直さない
+    assert precompress_static_files() == 1
+    assert precompress_static_files() == 0
+
+
+def test_small_static_files_are_not_precompressed(static_dir):
+    path = write_static(static_dir, 'css/small.css', 'a{}')
+    
+    assert precompress_static_files() == 0
+    assert not os.path.exists(f'{path}.gz')
@@ -0,0 +1,106 @@
+import os
+
+import pytest
+
+import app as mentortrack
+from app import ProductGroupImage, db
+
+needs_pillow = pytest.mark.skipif(not mentortrack.PIL_AVAILABLE, reason='Pillow がインストールされていない')
+
+
+def save_image(filename, width, height, image_format):
+    from PIL import Image
+    Image.new('RGB', (width, height), (200, 100, 50)).save(
+        os.path.join(mentortrack.app.config['UPLOAD_FOLDER'], filename), image_format
+    )
+
+
+def thumbnail_path(filename, width, webp=False):
+    return os.path.join(mentortrack.app.config['THUMBNAIL_FOLDER'], mentortrack.thumbnail_filename(filename, width, webp))
+
+
+@pytest.fixture
+def thumbnail_widths(monkeypatch):
+    monkeypatch.setattr(mentortrack, 'THUMBNAIL_WIDTHS', (100, 200, 400))
+
+
+@needs_pillow
+def test_only_widths_smaller_than_the_original_are_generated(app, thumbnail_widths):
+    save_image('photo_a1.jpg', 300, 150, 'JPEG')
+
+    widths, has_webp = mentortrack.generate_image_derivatives('photo_a1.jpg')
+
+    assert widths == [100, 200]
+    assert has_webp == mentortrack.WEBP_AVAILABLE
+    assert os.path.exists(thumbnail_path('photo_a1.jpg', 100))
+    assert os.path.exists(thumbnail_path('photo_a1.jpg', 200))
+    assert not os.path.exists(thumbnail_path('photo_a1.jpg', 400))
+    assert os.path.exists(thumbnail_path('photo_a1.jpg', 200, webp=True)) == mentortrack.WEBP_AVAILABLE
+
+
+@needs_pillow
+def test_gif_is_kept_at_full_size(app, thumbnail_widths):
+    save_image('anim_b2.gif', 300, 150, 'GIF')
+
+    assert mentortrack.generate_image_derivatives('anim_b2.gif') == ([], False)
+    assert not os.path.exists(thumbnail_path('anim_b2.gif', 100))
+
+
+@needs_pillow
+def test_build_image_derivatives_records_widths_and_webp(app, thumbnail_widths, mentee_with_group):
+    _, product_group = mentee_with_group
+    save_image('photo_c3.png', 150, 150, 'PNG')
+    save_image('anim_c3.gif', 300, 150, 'GIF')
+    db.session.add_all([
+        ProductGroupImage(product_group_id=product_group.id, position=0, filename='photo_c3.png', width=150),
+        ProductGroupImage(product_group_id=product_group.id, position=1, filename='anim_c3.gif', width=300),
+    ])
+    db.session.commit()
+
+    assert mentortrack.build_image_derivatives(workers=1) == 2
+
+    photo, gif = ProductGroupImage.query.order_by(ProductGroupImage.position).all()
+    assert photo.thumbnail_widths == '100'
+    assert photo.has_webp == mentortrack.WEBP_AVAILABLE
+    assert gif.thumbnail_widths == ''
+    assert gif.has_webp is False
+    # 作成済みの画像は対象外
+    assert mentortrack.build_image_derivatives(workers=1) == 0
+
+
+def test_image_urls_fall_back_to_the_original_without_derivatives(app):
+    image = {'filename': 'photo_d4.jpg', 'width': 800, 'thumbnail_widths': '', 'has_webp': False}
+
+    with app.test_request_context():
+        assert mentortrack.image_url(image, width=480) == '/uploads/product_groups/photo_d4.jpg'
+        assert mentortrack.image_srcset(image) == ''
+        assert mentortrack.image_srcset(image, webp=True) == ''
+
+
+def test_image_urls_use_the_smallest_sufficient_derivative(app):
+    image = {'filename': 'photo_e5.jpg', 'width': 800, 'thumbnail_widths': '160,480', 'has_webp': True}
+
+    with app.test_request_context():
+        assert mentortrack.image_url(image, width=300) == '/uploads/product_groups/thumbs/photo_e5_480w.jpg'
+        assert mentortrack.image_url(image, width=600) == '/uploads/product_groups/photo_e5.jpg'
+        assert mentortrack.image_srcset(image).endswith('/uploads/product_groups/photo_e5.jpg 800w')
+        assert mentortrack.image_srcset(image, webp=True) == (
+            '/uploads/product_groups/thumbs/photo_e5_160w.webp 160w, /uploads/product_groups/thumbs/photo_e5_480w.webp 480w'
+        )
+
+
+@needs_pillow
+def test_delete_uploaded_files_removes_derivatives(app, thumbnail_widths):
+    save_image('photo_f6.jpg', 300, 150, 'JPEG')
+    save_image('photo_f6x.jpg', 300, 150, 'JPEG')
+    mentortrack.generate_image_derivatives('photo_f6.jpg')
+    mentortrack.generate_image_derivatives('photo_f6x.jpg')
+    # 設定変更前の幅で作成された縮小版
+    open(thumbnail_path('photo_f6.jpg', 1024), 'wb').close()
+
+    mentortrack.delete_uploaded_files(['photo_f6.jpg'])
+
+    assert not os.path.exists(os.path.join(mentortrack.app.config['UPLOAD_FOLDER'], 'photo_f6.jpg'))
+    assert not [name for name in os.listdir(mentortrack.app.config['THUMBNAIL_FOLDER']) if name.startswith('photo_f6_')]
+    # 名前が前方一致するだけの別画像の縮小版は残す
+    assert os.path.exists(thumbnail_path('photo_f6x.jpg', 100))
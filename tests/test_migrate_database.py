@@ -0,0 +1,27 @@
+from app import db, migrate_database
+
+
+def test_added_columns_are_restored(app):
+    with db.engine.begin() as connection:
+        connection.execute(db.text('ALTER TABLE "user" DROP COLUMN notification_version'))
+        connection.execute(db.text('ALTER TABLE daily_report DROP COLUMN html_version'))
+        connection.execute(db.text('ALTER TABLE product_group_image DROP COLUMN has_webp'))
+    
+    applied = migrate_database()
+    
+    assert 'user.notification_version' in applied
+    assert 'daily_report.html_version' in applied
+    assert 'product_group_image.has_webp' in applied
+    columns = {column['name'] for column in db.inspect(db.engine).get_columns('user')}
+    assert 'notification_version' in columns
+    assert migrate_database() == []
+
+
+def test_redundant_indexes_are_dropped(app):
+    with db.engine.begin() as connection:
+        connection.execute(db.text('CREATE INDEX ix_weekly_report_product_group_id ON weekly_report (product_group_id)'))
+    
+    assert 'drop index ix_weekly_report_product_group_id' in migrate_database()
+    index_names = {index['name'] for index in db.inspect(db.engine).get_indexes('weekly_report')}
+    assert 'ix_weekly_report_product_group_id' not in index_names
+    assert 'ix_weekly_report_group_report_date' in index_names
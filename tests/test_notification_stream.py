@@ -0,0 +1,75 @@
+import json
+import queue
+
+import pytest
+
+import app as mentortrack
+from app import NotificationBroker, create_notifications, db, notification_broker
+
+
+@pytest.fixture
+def subscriber(mentor):
+    subscriber = notification_broker.subscribe(mentor.id)
+    yield subscriber
+    notification_broker.unsubscribe(mentor.id, subscriber)
+
+
+@pytest.fixture
+def short_stream(monkeypatch):
+    monkeypatch.setattr(mentortrack, 'NOTIFICATION_STREAM_MAX_AGE', 0.5)
+    monkeypatch.setattr(mentortrack, 'NOTIFICATION_STREAM_HEARTBEAT', 0.1)
+
+
+def test_events_are_published_only_after_commit(app, mentor, subscriber):
+    create_notifications([mentor.id], '新しい報告', '報告 10 が投稿されました', 'report_created', 10)
+    assert subscriber.empty()
+    
+    db.session.commit()
+    
+    event = subscriber.get_nowait()
+    assert event['notification']['related_id'] == 10
+
+
+def test_events_are_dropped_on_rollback(app, mentor, subscriber):
+    create_notifications([mentor.id], '新しい報告', '報告 10 が投稿されました', 'report_created', 10)
+    db.session.rollback()
+    db.session.commit()
+    
+    with pytest.raises(queue.Empty):
+        subscriber.get_nowait()
+
+
+def test_broker_limits_concurrent_streams():
+    broker = NotificationBroker()
+    first = broker.subscribe(1, max_streams=1)
+    
+    assert broker.subscribe(2, max_streams=1) is None
+    broker.unsubscribe(1, first)
+    broker.unsubscribe(1, first)
+    assert broker.subscribe(2, max_streams=1) is not None
+    assert broker.stats() == {'users': 1, 'streams': 1}
+
+
+def test_stream_sends_events_and_ends_at_max_age(mentor_client, mentor, short_stream):
+    user_id = mentor.id
+    response = mentor_client.get('/notifications/stream', buffered=False)
+    notification_broker.publish(user_id, {'notification': None})
+    
+    body = response.get_data(as_text=True)
+    response.close()
+    
+    assert response.mimetype == 'text/event-stream'
+    assert body.startswith('retry: 3000\n\n')
+    data_line = next(line for line in body.splitlines() if line.startswith('data: '))
+    assert json.loads(data_line[len('data: '):]) == {'notifications': [], 'unread_count': 0}
+    assert ': heartbeat' in body
+    assert notification_broker.stats()['streams'] == 0
+
+
+def test_stream_is_refused_when_connection_limit_is_reached(mentor_client, monkeypatch):
+    monkeypatch.setattr(mentortrack, 'NOTIFICATION_STREAM_MAX_CONNECTIONS', 0)
+    
+    response = mentor_client.get('/notifications/stream')
+    
+    assert response.status_code == 503
+    assert response.headers['Retry-After']
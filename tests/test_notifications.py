@@ -0,0 +1,200 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import app as mentortrack
+from app import (
+    BackgroundJob, Notification, NotificationArchive, User, WeeklyReport, compact_notifications, create_notifications, db,
+    get_notification_related_ids, query_budget, run_next_job,
+)
+
+
+def test_digest_notifications_merge_unread_events(app, mentor):
+    for report_id in (10, 11, 12):
+        create_notifications([mentor.id], '新しい報告', f'報告 {report_id} が投稿されました', 'report_created', report_id)
+        db.session.commit()
+    
+    notifications = Notification.query.filter_by(user_id=mentor.id).all()
+    assert len(notifications) == 1
+    assert notifications[0].event_count == 3
+    assert notifications[0].related_id == 12
+    assert notifications[0].message == '報告 12 が投稿されました'
+    assert get_notification_related_ids(notifications[0]) == [10, 11, 12]
+    db.session.refresh(mentor)
+    assert mentor.unread_notification_count == 1
+
+
+def test_read_notifications_are_not_merged(app, mentor):
+    create_notifications([mentor.id], '新しい報告', '報告 10 が投稿されました', 'report_created', 10)
+    Notification.query.update({Notification.is_read: True})
+    db.session.commit()
+    create_notifications([mentor.id], '新しい報告', '報告 11 が投稿されました', 'report_created', 11)
+    db.session.commit()
+    
+    assert Notification.query.filter_by(user_id=mentor.id).count() == 2
+
+
+def add_notifications(user, count, days_ago, is_read=True):
+    """作成から days_ago 日経った通知を count 件追加"""
+    created_at = datetime.utcnow() - timedelta(days=days_ago)
+    notifications = [
+        Notification(user_id=user.id, title=f'通知 {i}', message='メッセージ', type='info', is_read=is_read, created_at=created_at)
+        for i in range(count)
+    ]
+    db.session.add_all(notifications)
+    db.session.commit()
+    return notifications
+
+
+def test_compact_notifications_archives_old_read_notifications_in_batches(app, mentor):
+    old_read = add_notifications(mentor, 5, days_ago=40)
+    old_unread = add_notifications(mentor, 1, days_ago=40, is_read=False)
+    recent_read = add_notifications(mentor, 1, days_ago=1)
+    old_ids = sorted(notification.id for notification in old_read)
+    version = mentor.notification_version
+    
+    with query_budget(100) as counter:
+        assert compact_notifications(older_than_days=30, policy='archive', batch_size=2) == 5
+    
+    # 2件・2件・1件の3バッチ（それぞれ別トランザクション）
+    deletes = [statement for statement in counter['statements'] if statement.startswith('DELETE FROM notification')]
+    assert len(deletes) == 3
+    assert sorted(archive.id for archive in NotificationArchive.query.all()) == old_ids
+    remaining_ids = {notification.id for notification in Notification.query.all()}
+    assert remaining_ids == {old_unread[0].id, recent_read[0].id}
+    db.session.refresh(mentor)
+    assert mentor.notification_version > version
+    assert compact_notifications(older_than_days=30, policy='archive') == 0
+
+
+def test_compact_notifications_delete_policy_does_not_archive(app, mentor):
+    add_notifications(mentor, 3, days_ago=40)
+    
+    assert compact_notifications(older_than_days=30, policy='delete') == 3
+    assert Notification.query.count() == 0
+    assert NotificationArchive.query.count() == 0
+
+
+def test_compact_notifications_rejects_unknown_policy(app):
+    with pytest.raises(ValueError):
+        compact_notifications(policy='keep')
+
+
+def test_notification_archive_pages_through_own_notifications(mentor_client, mentor, monkeypatch):
+    other = User(username='other', email='other@example.com', role='mentor')
+    other.set_password('password')
+    db.session.add(other)
+    db.session.commit()
+    add_notifications(mentor, 3, days_ago=40)
+    add_notifications(other, 1, days_ago=40)
+    compact_notifications(older_than_days=30, policy='archive')
+    own_ids = sorted((archive.id for archive in NotificationArchive.query.filter_by(user_id=mentor.id)), reverse=True)
+    monkeypatch.setattr(mentortrack, 'NOTIFICATION_ARCHIVE_PAGE_SIZE', 2)
+    
+    html = mentor_client.get('/notifications/archive').get_data(as_text=True)
+    assert html.count('list-group-item') == 2
+    assert f'/notifications/archive?before={own_ids[1]}' in html
+    
+    html = mentor_client.get(f'/notifications/archive?before={own_ids[1]}').get_data(as_text=True)
+    assert html.count('list-group-item') == 1
+    assert 'さらに古い通知を表示' not in html
+
+
+def get_notifications(client, **headers):
+    return client.get('/notifications', headers=headers)
+
+
+def test_notifications_return_304_until_the_notification_version_changes(mentor_client, mentor):
+    create_notifications([mentor.id], '新しい報告', '報告 10 が投稿されました', 'report_created', 10)
+    db.session.commit()
+    
+    response = get_notifications(mentor_client)
+    etag = response.headers['ETag']
+    assert response.status_code == 200
+    
+    with query_budget(100) as counter:
+        response = get_notifications(mentor_client, **{'If-None-Match': etag})
+    assert response.status_code == 304
+    assert not any('FROM notification' in statement for statement in counter['statements'])
+    
+    create_notifications([mentor.id], '新しいコメント', 'コメントが追加されました', 'comment_added', 10)
+    db.session.commit()
+    response = get_notifications(mentor_client, **{'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_compressed_notifications_use_a_weak_etag_that_still_matches(mentor_client, mentor):
+    for i in range(10):
+        db.session.add(Notification(user_id=mentor.id, title=f'通知 {i}', message='長いメッセージ' * 40, type='info'))
+    db.session.commit()
+    
+    response = get_notifications(mentor_client, **{'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    etag = response.headers['ETag']
+    assert etag.startswith('W/')
+    
+    response = get_notifications(mentor_client, **{'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+    assert response.status_code == 304
+
+
+def test_notifications_since_returns_new_and_open_digest_notifications(mentor_client, mentor, monkeypatch):
+    monkeypatch.setattr(mentortrack, 'NOTIFICATION_DIGEST_WINDOW_MINUTES', 60)
+    # 期間内で集約中のまとめ通知（既存IDのまま更新される）
+    for report_id in (10, 11):
+        create_notifications([mentor.id], '新しい報告', f'報告 {report_id} が投稿されました', 'report_created', report_id)
+        db.session.commit()
+    open_digest = Notification.query.filter_by(type='report_created').one()
+    # 期間を過ぎたまとめ通知と単独の通知
+    closed_digest = Notification(user_id=mentor.id, title='古いまとめ', message='古い', type='comment_added', event_count=2,
+                                 created_at=datetime.utcnow() - timedelta(hours=3))
+    old_single = Notification(user_id=mentor.id, title='古い通知', message='古い', type='info')
+    db.session.add_all([closed_digest, old_single])
+    db.session.commit()
+    since = old_single.id
+    new_single = Notification(user_id=mentor.id, title='新しい通知', message='新しい', type='info')
+    db.session.add(new_single)
+    db.session.commit()
+    
+    data = mentor_client.get(f'/notifications?since={since}').get_json()
+    
+    assert {notification['id'] for notification in data['notifications']} == {open_digest.id, new_single.id}
+    digest = next(notification for notification in data['notifications'] if notification['id'] == open_digest.id)
+    assert digest['count'] == 2
+    assert digest['related_ids'] == [10, 11]
+
+
+def add_report(mentee, product_group):
+    report = WeeklyReport(
+        mentee_id=mentee.id, planning_stage='s1', product_group=product_group.name, product_group_id=product_group.id,
+        self_evaluation=2, report_date=datetime.utcnow(), week_start=datetime.utcnow(),
+    )
+    db.session.add(report)
+    db.session.commit()
+    return report
+
+
+@pytest.mark.parametrize('user_exists', [True, False])
+def test_mentor_comment_notifies_only_an_existing_mentee_user(mentor_client, mentee_with_group, user_exists):
+    mentee, product_group = mentee_with_group
+    mentee_user = User(username='mentee', email='mentee@example.com', role='mentee')
+    mentee_user.set_password('password')
+    db.session.add(mentee_user)
+    db.session.flush()
+    mentee.user_id = mentee_user.id
+    report = add_report(mentee, product_group)
+    mentee_user_id = mentee_user.id
+    if not user_exists:
+        # メンティのユーザーが削除され、user_id だけが残っている
+        db.session.delete(mentee_user)
+        db.session.commit()
+    
+    response = mentor_client.post(f'/report/{report.id}/comment', data={'comment': '確認しました'})
+    assert response.status_code == 302
+    while run_next_job():
+        pass
+    
+    job = BackgroundJob.query.filter_by(name='notify_users').one()
+    assert job.status == 'succeeded'
+    notifications = Notification.query.filter_by(type='comment_added').all()
+    assert [notification.user_id for notification in notifications] == ([mentee_user_id] if user_exists else [])
@@ -0,0 +1,115 @@
+import json
+import os
+from datetime import datetime
+
+from app import (
+    BackgroundJob, ProductGroup, ProductGroupImage, WeeklyReport, app as flask_app, db, get_product_group_previews,
+    migrate_product_group_images, query_budget,
+)
+
+
+def test_renaming_product_group_updates_only_the_group_row(mentor_client, mentee_with_group):
+    mentee, product_group = mentee_with_group
+    report = WeeklyReport(
+        mentee_id=mentee.id, planning_stage='s1', product_group=product_group.name, product_group_id=product_group.id,
+        self_evaluation=2, report_date=datetime.utcnow(), week_start=datetime.utcnow(),
+    )
+    db.session.add(report)
+    db.session.commit()
+    
+    with query_budget(100) as counter:
+        response = mentor_client.post(f'/product-group/{product_group.id}/edit', data={'name': 'ゲーミングPC', 'description': ''})
+    assert response.status_code == 302
+    assert not any(statement.startswith('UPDATE weekly_report') for statement in counter['statements'])
+    
+    db.session.expire_all()
+    report = db.session.get(WeeklyReport, report.id)
+    assert report.product_group_name == 'ゲーミングPC'
+    assert 'ゲーミングPC' in mentor_client.get(f'/report/{report.id}').get_data(as_text=True)
+
+
+def add_legacy_images_column():
+    with db.engine.begin() as connection:
+        connection.execute(db.text('ALTER TABLE product_group ADD COLUMN images TEXT'))
+
+
+def set_legacy_images(product_group_id, value):
+    db.session.execute(db.text('UPDATE product_group SET images = :images WHERE id = :id'), {'images': value, 'id': product_group_id})
+    db.session.commit()
+
+
+def test_migrate_product_group_images_moves_legacy_json(app, mentee_with_group):
+    mentee, product_group = mentee_with_group
+    others = [ProductGroup(name=name, mentee_id=mentee.id) for name in ('壊れたJSON', '辞書', '空')]
+    db.session.add_all(others)
+    db.session.commit()
+    add_legacy_images_column()
+    with open(os.path.join(flask_app.config['UPLOAD_FOLDER'], 'legacy_a1.png'), 'wb') as f:
+        f.write(b'legacy image')
+    set_legacy_images(product_group.id, json.dumps(['legacy_a1.png', 'missing_b2.png', None, 3]))
+    set_legacy_images(others[0].id, '["broken"')
+    set_legacy_images(others[1].id, json.dumps({'filename': 'legacy_a1.png'}))
+    set_legacy_images(others[2].id, json.dumps([]))
+    
+    assert migrate_product_group_images() == 2
+    
+    images = ProductGroupImage.query.order_by(ProductGroupImage.position).all()
+    assert [(image.product_group_id, image.position, image.filename) for image in images] == [
+        (product_group.id, 0, 'legacy_a1.png'), (product_group.id, 1, 'missing_b2.png'),
+    ]
+    # ファイルが残っている画像のみバイト数・ハッシュを記録する
+    assert images[0].byte_size == len(b'legacy image')
+    assert images[0].content_hash
+    assert images[1].byte_size is None
+    remaining = db.session.execute(db.text('SELECT COUNT(*) FROM product_group WHERE images IS NOT NULL')).scalar()
+    assert remaining == 0
+    
+    # 2回目は何も移行しない
+    assert migrate_product_group_images() == 0
+    assert ProductGroupImage.query.count() == 2
+
+
+def test_migrate_product_group_images_without_legacy_column(app):
+    assert migrate_product_group_images() == 0
+
+
+def test_product_group_previews_are_limited_and_counted(app, mentee_with_group):
+    mentee, product_group = mentee_with_group
+    empty_group = ProductGroup(name='画像なし', mentee_id=mentee.id)
+    db.session.add(empty_group)
+    db.session.flush()
+    db.session.add_all([
+        ProductGroupImage(product_group_id=product_group.id, position=position, filename=f'preview_{position}.png')
+        for position in (2, 0, 1)
+    ])
+    db.session.commit()
+    
+    previews = get_product_group_previews([product_group.id, empty_group.id, None], limit=2)
+    
+    assert set(previews) == {product_group.id}
+    assert previews[product_group.id]['image_count'] == 3
+    assert [image['filename'] for image in previews[product_group.id]['images']] == ['preview_0.png', 'preview_1.png']
+    assert [image['filename'] for image in get_product_group_previews([product_group.id])[product_group.id]['images']] == [
+        'preview_0.png'
+    ]
+    assert get_product_group_previews([]) == {}
+
+
+def test_remove_product_group_image_deletes_only_the_given_image(mentor_client, mentee_with_group):
+    _, product_group = mentee_with_group
+    db.session.add_all([
+        ProductGroupImage(product_group_id=product_group.id, position=0, filename='keep_c3.png'),
+        ProductGroupImage(product_group_id=product_group.id, position=1, filename='remove_c3.png'),
+    ])
+    db.session.commit()
+    url = f'/product-group/{product_group.id}/remove-image'
+    
+    response = mentor_client.post(url, json={'filename': 'remove_c3.png'})
+    
+    assert response.get_json()['success'] is True
+    assert [image.filename for image in ProductGroupImage.query.all()] == ['keep_c3.png']
+    job = BackgroundJob.query.filter_by(name='delete_uploaded_files').one()
+    assert json.loads(job.payload) == {'filenames': ['remove_c3.png']}
+    
+    assert mentor_client.post(url, json={'filename': 'remove_c3.png'}).status_code == 404
+    assert mentor_client.post(url, json={}).status_code == 400
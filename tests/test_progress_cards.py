@@ -0,0 +1,21 @@
+from datetime import datetime
+
+from app import WeeklyReport, db
+
+
+def test_mentor_progress_cards_are_cached_per_mentee_name_setting(mentor_client, mentee_with_group):
+    mentee, product_group = mentee_with_group
+    db.session.add(WeeklyReport(
+        mentee_id=mentee.id, planning_stage='s1', product_group=product_group.name, product_group_id=product_group.id,
+        self_evaluation=2, report_date=datetime.utcnow(), week_start=datetime.utcnow(),
+    ))
+    db.session.commit()
+    
+    # 全メンティ表示ではカードにメンティ名を付ける
+    html = mentor_client.get('/mentor/dashboard').get_data(as_text=True)
+    assert f'data-mentee="{mentee.name}"' in html
+    
+    # 同じメンティ1名に絞り込んだ場合はメンティ名なしのカードを使う（全員表示時のキャッシュを流用しない）
+    html = mentor_client.get('/mentor/dashboard', query_string={'mentee': mentee.name}).get_data(as_text=True)
+    assert 'data-mentee=""' in html
+    assert f'data-mentee="{mentee.name}"' not in html
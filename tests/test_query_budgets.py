@@ -0,0 +1,88 @@
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import (
+    MenteeTodoList, MentorComment, Notification, QUERY_BUDGETS, WeeklyReport, assert_endpoint_query_budget, db,
+    query_budget,
+)
+
+
+@pytest.fixture
+def reports(mentor, mentee_with_group):
+    """直近の週次報告（コメント付きを含む）と通知を用意"""
+    mentee, product_group = mentee_with_group
+    created = []
+    for i, stage in enumerate(['s1', 's2', 's3', 's4', 's5']):
+        report_date = datetime.utcnow() - timedelta(days=7 * (5 - i))
+        report = WeeklyReport(
+            mentee_id=mentee.id, planning_stage=stage, product_group=product_group.name,
+            product_group_id=product_group.id, self_evaluation=2, report_date=report_date, week_start=report_date,
+        )
+        db.session.add(report)
+        db.session.flush()
+        if i % 2 == 0:
+            db.session.add(MentorComment(report_id=report.id, mentor_id=mentor.id, comment='確認しました'))
+        db.session.add(Notification(user_id=mentor.id, title='新しい報告', message='報告が投稿されました',
+                                    type='report_created', related_id=report.id))
+        created.append(report)
+    db.session.commit()
+    return created
+
+
+# QUERY_BUDGETS の各エンドポイントを計測するURL
+ENDPOINT_URLS = {
+    'mentor_dashboard': '/mentor/dashboard',
+    'mentor_dashboard_reports': '/mentor/dashboard/reports',
+    'mentee_dashboard': '/mentee/{mentee_id}',
+    'new_report': '/report/new/{mentee_id}',
+    'view_report': '/report/{report_id}',
+    'product_group_analysis': '/mentee/{mentee_id}/product-group-analysis',
+    'product_group_details': '/product-group/{product_group_id}/details',
+    'get_notifications': '/notifications',
+}
+
+
+def test_every_budgeted_endpoint_is_measured():
+    assert set(ENDPOINT_URLS) == set(QUERY_BUDGETS)
+
+
+@pytest.mark.parametrize('endpoint', sorted(ENDPOINT_URLS))
+def test_endpoint_stays_within_query_budget(mentor_client, mentee_with_group, reports, endpoint):
+    mentee, product_group = mentee_with_group
+    url = ENDPOINT_URLS[endpoint].format(mentee_id=mentee.id, product_group_id=product_group.id, report_id=reports[-1].id)
+    
+    response = assert_endpoint_query_budget(mentor_client, endpoint, url)
+    
+    assert response.status_code == 200
+
+
+def test_statements_from_other_threads_are_not_counted(app):
+    def run_query():
+        with app.app_context():
+            db.session.execute(db.text('SELECT 1'))
+    
+    with query_budget(0):
+        thread = threading.Thread(target=run_query)
+        thread.start()
+        thread.join()
+
+
+def test_new_report_submission_stays_within_query_budget(mentor_client, mentee_with_group, reports):
+    mentee, product_group = mentee_with_group
+    # 2回目以降の報告と同様に、Todoリストは作成済みとする
+    db.session.add(MenteeTodoList(mentee_id=mentee.id))
+    db.session.commit()
+    report_count = WeeklyReport.query.count()
+    
+    response = assert_endpoint_query_budget(mentor_client, 'new_report', f'/report/new/{mentee.id}', method='POST', data={
+        'planning_stage': 's6',
+        'product_group': product_group.id,
+        'self_evaluation': 2,
+        'progress_items': '見積もりを依頼',
+        'insights_concerns': '',
+    })
+    
+    assert response.status_code == 302
+    assert WeeklyReport.query.count() == report_count + 1
@@ -0,0 +1,48 @@
+import pytest
+
+import app as mentortrack
+from app import QueryBudgetExceeded, assert_endpoint_query_budget, db, query_budget
+
+
+@pytest.fixture
+def query_during_stream(monkeypatch):
+    """ストリーミング送出の途中でSQLを1件発行させる（テンプレートでの遅延読み込みの代わり）"""
+    buffer_chunks = mentortrack._buffer_chunks
+    
+    def querying_chunks(chunks, chunk_size):
+        for index, chunk in enumerate(buffer_chunks(chunks, chunk_size)):
+            if index == 0:
+                db.session.execute(db.text('SELECT 1'))
+            yield chunk
+    
+    monkeypatch.setattr(mentortrack, '_buffer_chunks', querying_chunks)
+
+
+def test_streamed_page_stats_are_recorded_when_stream_closes(app, mentor_client, query_during_stream, monkeypatch):
+    monkeypatch.setattr(mentortrack, 'DB_QUERY_STATS_ENABLED', True)
+    monkeypatch.setattr(mentortrack, 'db_query_stats', {})
+    
+    with query_budget(100) as counter:
+        response = mentor_client.get('/mentor/dashboard')
+        assert response.is_streamed
+        # 送出前のヘッダーでは本文生成中のSQLを数えられないため付与しない
+        assert 'X-DB-Queries' not in response.headers
+        assert 'mentor_dashboard' not in mentortrack.db_query_stats
+        response.get_data()
+        response.close()
+    
+    assert 'SELECT 1' in counter['statements']
+    assert mentortrack.db_query_stats['mentor_dashboard']['statements'] == len(counter['statements'])
+
+
+def test_endpoint_budget_includes_statements_issued_while_streaming(app, mentor_client, query_during_stream, monkeypatch):
+    with query_budget(100) as counter:
+        response = mentor_client.get('/mentor/dashboard')
+        response.get_data()
+        response.close()
+    monkeypatch.setitem(mentortrack.QUERY_BUDGETS, 'mentor_dashboard', len(counter['statements']) - 1)
+    # 報告件数・進捗カードのキャッシュで2回目の文の数が減らないようにする
+    mentortrack.fragment_cache.clear()
+    
+    with pytest.raises(QueryBudgetExceeded):
+        assert_endpoint_query_budget(mentor_client, 'mentor_dashboard', '/mentor/dashboard')
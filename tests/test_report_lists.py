@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import app as mentortrack
+from app import MentorComment, WeeklyReport, db, query_budget
+
+from conftest import post_weekly_report
+
+
+def add_reports(mentee, product_group, mentor, count):
+    """週次報告を count 件追加（半数にメンターコメントを付ける）"""
+    existing_count = WeeklyReport.query.count()
+    for i in range(existing_count, existing_count + count):
+        report_date = datetime(2026, 1, 5) + timedelta(days=i)
+        report = WeeklyReport(
+            mentee_id=mentee.id, planning_stage='s1', product_group=product_group.name,
+            product_group_id=product_group.id, self_evaluation=2, report_date=report_date, week_start=report_date,
+        )
+        db.session.add(report)
+        if i % 2 == 0:
+            db.session.flush()
+            db.session.add(MentorComment(report_id=report.id, mentor_id=mentor.id, comment='確認しました'))
+    db.session.commit()
+
+
+def count_statements(client, url):
+    """ページを最後まで取得し、発行されたSQL文の件数を返す"""
+    # 進捗カードのキャッシュの有無で件数が変わらないようにする
+    mentortrack.fragment_cache.clear()
+    with query_budget(1000) as counter:
+        response = client.get(url)
+        response.get_data()
+        response.close()
+    assert response.status_code == 200
+    return len(counter['statements'])
+
+
+@pytest.mark.parametrize('url', [
+    '/mentor/dashboard',
+    '/mentor/dashboard/reports',
+    '/mentee/{mentee_id}',
+    '/product-group/{product_group_id}/details',
+])
+def test_report_list_statement_count_does_not_grow_with_reports(mentor_client, mentor, mentee_with_group, url):
+    mentee, product_group = mentee_with_group
+    url = url.format(mentee_id=mentee.id, product_group_id=product_group.id)
+    report_count = 4
+    
+    add_reports(mentee, product_group, mentor, report_count)
+    statements_for_n = count_statements(mentor_client, url)
+    add_reports(mentee, product_group, mentor, report_count)
+    statements_for_2n = count_statements(mentor_client, url)
+    
+    # メンティ名・コメント有無を報告ごとに読み込むと件数が報告数に比例して増える
+    assert statements_for_2n == statements_for_n
+
+
+def test_mentor_dashboard_report_total_is_cached_until_reports_change(mentor_client, mentor, mentee_with_group):
+    mentee, product_group = mentee_with_group
+    add_reports(mentee, product_group, mentor, 3)
+    
+    def load_dashboard():
+        with query_budget(1000) as counter:
+            html = mentor_client.get('/mentor/dashboard').get_data(as_text=True)
+        counts = [statement for statement in counter['statements'] if 'count(*)' in statement.lower()]
+        return html, counts
+    
+    html, counts = load_dashboard()
+    assert '全報告: 3件' in html
+    assert counts
+    
+    html, counts = load_dashboard()
+    assert '全報告: 3件' in html
+    assert not counts
+    
+    # 報告の追加でメンティの data_version が進み、件数を数え直す
+    post_weekly_report(mentor_client, mentee.id, product_group.id)
+    html, counts = load_dashboard()
+    assert '全報告: 4件' in html
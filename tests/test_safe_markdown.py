@@ -0,0 +1,102 @@
+import os
+import re
+import time
+from datetime import datetime
+
+import pytest
+
+import app as mentortrack
+from app import DailyReport, Mentee, SAFE_HTML_VERSION, db, render_daily_report_html, render_safe_markdown
+
+
+@pytest.mark.parametrize('text', [
+    'hello\n{: onmouseover="alert(1)" }',
+    '[x](http://a){: onclick="alert(1)"}',
+    '![i](http://a/b.png){: onerror="alert(1)"}',
+    'hello\n{: style="position:fixed;top:0" }',
+])
+def test_attribute_lists_are_not_applied(app, text):
+    html = render_safe_markdown(text)
+    # 属性リストは本文の文字列として残るだけで、タグの属性にはならない
+    assert not re.search(r'<[^>]*\s(on\w+|style)=', html)
+
+
+def test_raw_html_and_unsafe_urls_are_removed(app):
+    assert '<script>' not in render_safe_markdown('<script>alert(1)</script>')
+    assert 'javascript:' not in render_safe_markdown('[x](javascript:alert(1))')
+    assert 'href="http://a"' in render_safe_markdown('[x](http://a)')
+
+
+def test_table_alignment_uses_align_attribute(app):
+    html = render_safe_markdown('|a|b|\n|:-|-:|\n|1|2|')
+    assert 'align="left"' in html
+    assert 'style=' not in html
+
+
+def test_outdated_report_html_is_rendered_again(app):
+    mentee = Mentee(name='テスト', email='mentee@example.com')
+    db.session.add(mentee)
+    db.session.flush()
+    daily_report = DailyReport(
+        mentee_id=mentee.id, report_date=datetime(2026, 1, 5), title='日報',
+        summary='要約', generated_content='本文',
+        summary_html='<p onmouseover="alert(1)">要約</p>', generated_content_html='<p>本文</p>', html_version=1,
+    )
+    db.session.add(daily_report)
+    db.session.commit()
+    
+    assert render_daily_report_html(missing_only=True) == 1
+    assert daily_report.summary_html == '<p>要約</p>'
+    assert daily_report.html_version == SAFE_HTML_VERSION
+    assert render_daily_report_html(missing_only=True) == 0
+
+
+def test_rendered_html_is_cached(app, tmp_path, monkeypatch):
+    monkeypatch.setattr(mentortrack, 'MARKDOWN_CACHE_DIR', str(tmp_path))
+    renders = mentortrack.markdown_render_stats['renders']
+    
+    html = render_safe_markdown('# 見出し')
+    assert render_safe_markdown('# 見出し') == html
+    assert mentortrack.markdown_render_stats['renders'] == renders + 1
+    
+    # 別プロセスの起動直後と同様に、メモリ上のキャッシュが空でもファイルキャッシュから返す
+    mentortrack.markdown_cache.clear()
+    assert render_safe_markdown('# 見出し') == html
+    assert mentortrack.markdown_render_stats['renders'] == renders + 1
+
+
+def cached_files(cache_dir):
+    return sorted(path.name for path in cache_dir.rglob('*.html'))
+
+
+def test_markdown_file_cache_is_pruned_by_age_and_size(app, tmp_path, monkeypatch):
+    monkeypatch.setattr(mentortrack, 'MARKDOWN_CACHE_DIR', str(tmp_path))
+    # 作成日時が 40日前・2日前・1日前 のキャッシュ
+    names = []
+    for text, days_ago in [('# 古い', 40), ('# 中間', 2), ('# 新しい', 1)]:
+        existing = set(cached_files(tmp_path))
+        render_safe_markdown(text)
+        path = next(path for path in tmp_path.rglob('*.html') if path.name not in existing)
+        modified_at = time.time() - days_ago * 86400
+        os.utime(path, (modified_at, modified_at))
+        names.append(path.name)
+    _, middle, newest = names
+    
+    assert mentortrack.prune_markdown_cache(max_age_days=30) == 1
+    assert cached_files(tmp_path) == sorted([middle, newest])
+    
+    # 合計サイズが上限を超える分は古い順に削除
+    newest_size = next(tmp_path.rglob(newest)).stat().st_size
+    assert mentortrack.prune_markdown_cache(max_age_days=30, max_bytes=newest_size) == 1
+    assert cached_files(tmp_path) == [newest]
+    
+    # 削除したものは変換し直して保存される
+    mentortrack.markdown_cache.clear()
+    renders = mentortrack.markdown_render_stats['renders']
+    render_safe_markdown('# 古い')
+    assert mentortrack.markdown_render_stats['renders'] == renders + 1
+    assert len(cached_files(tmp_path)) == 2
+
+
+def test_markdown_file_cache_pruning_without_cache_dir(app):
+    assert mentortrack.prune_markdown_cache() == 0
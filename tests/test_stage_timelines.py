@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta
+
+from app import WeeklyReport, build_stage_timelines, db
+
+NOW = datetime(2026, 3, 1)
+
+
+def day(month, day_of_month):
+    return datetime(2026, month, day_of_month)
+
+
+def by_stage(timeline):
+    return {entry['stage']: entry for entry in timeline}
+
+
+def test_repeated_visits_to_a_stage_are_summed():
+    rows = [
+        (1, day(1, 1), 's1'),
+        (1, day(1, 5), 's1'),
+        (1, day(1, 11), 's2'),
+        (1, day(1, 21), 's1'),
+        (1, day(1, 24), 's3'),
+    ]
+    
+    stages = by_stage(build_stage_timelines(rows, now=NOW)[1])
+    
+    assert stages['s1']['dwell_days'] == 10 + 3
+    assert stages['s1']['entered_at'] == day(1, 1)
+    assert stages['s2']['dwell_days'] == 10
+    assert stages['s3']['dwell_days'] == (NOW - day(1, 24)).days
+    assert stages['s3']['is_current']
+    assert not stages['s1']['is_current']
+
+
+def test_each_product_group_is_measured_separately():
+    rows = [
+        (1, day(1, 1), 's1'),
+        (1, day(1, 11), 's2'),
+        (2, day(2, 1), 's1'),
+        (2, day(2, 15), 's4'),
+    ]
+    
+    timelines = build_stage_timelines(rows, now=NOW)
+    
+    assert [entry['stage'] for entry in timelines[1]] == ['s1', 's2']
+    assert by_stage(timelines[1])['s2']['dwell_days'] == (NOW - day(1, 11)).days
+    assert by_stage(timelines[2])['s1']['dwell_days'] == 14
+    assert by_stage(timelines[2])['s4']['is_current']
+
+
+def test_completed_and_cancelled_stages_do_not_accumulate_dwell_time():
+    rows = [
+        (1, day(1, 1), 's5'),
+        (1, day(1, 11), 's12'),
+        (2, day(1, 1), 's3'),
+        (2, day(1, 8), 's13'),
+        (2, day(1, 20), 's13'),
+    ]
+    
+    timelines = build_stage_timelines(rows, now=NOW)
+    
+    completed = by_stage(timelines[1])
+    assert completed['s5']['dwell_days'] == 10
+    assert completed['s12']['dwell_days'] == 0
+    assert not completed['s12']['is_current']
+    assert completed['s12']['exited_at'] == day(1, 11)
+    cancelled = by_stage(timelines[2])
+    assert cancelled['s13']['dwell_days'] == 0
+    assert not any(entry['is_current'] for entry in timelines[2])
+
+
+def test_stage_aliases_are_normalized():
+    timelines = build_stage_timelines([(1, day(1, 1), 'first_order'), (1, day(1, 3), 's5')], now=NOW)
+    
+    assert [entry['stage'] for entry in timelines[1]] == ['s5']
+
+
+def test_analysis_page_does_not_report_the_final_stage_as_longest(mentor_client, mentee_with_group):
+    mentee, product_group = mentee_with_group
+    for days_ago, stage in ((40, 's5'), (30, 's12')):
+        report_date = datetime.utcnow() - timedelta(days=days_ago)
+        db.session.add(WeeklyReport(
+            mentee_id=mentee.id, planning_stage=stage, product_group=product_group.name, product_group_id=product_group.id,
+            self_evaluation=2, report_date=report_date, week_start=report_date,
+        ))
+    db.session.commit()
+    
+    html = mentor_client.get(f'/mentee/{mentee.id}/product-group-analysis').get_data(as_text=True)
+    
+    assert '初回発注（10日）' in html